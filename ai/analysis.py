@@ -1,26 +1,49 @@
 import logging
-from utilities import config, parse_output
+from functools import lru_cache
+from utilities import config, metrics, parse_output
+import asyncio
+from utilities.llm_config import collect_response, iter_response
+from ai.cache import analysis_cache, make_key
+from ai.long_document import analyze_long_policy, is_long_document
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def analyze_policy(input_data):
+@lru_cache(maxsize=None)
+def load_prompt_files():
     with open("prompts/goal_five_analysis.txt", "r") as f:
         prompt = f.read()
 
     with open("utilities/goal_five.txt", "r") as f:
         goal_5 = f.read()
 
-    if prompt:
-        prompt = prompt.replace("{policy}", input_data)
-        prompt = prompt.replace("{goal_5}", goal_5)
+    return prompt, goal_5
 
-    response = config.llm.generate_content(prompt)
-    response_text = response.text
-    logger.info(f"Raw LLM response: {response_text[:500]}...")  # Log first 500 characters
+@lru_cache(maxsize=None)
+def prompt_parts():
+    """The prompt template split around ``{policy}``, with ``{goal_5}`` already filled in."""
+    template, goal_5 = load_prompt_files()
+    before, _, after = template.partition("{policy}")
+    return before.replace("{goal_5}", goal_5), after.replace("{goal_5}", goal_5)
 
-    parsed_response = parse_output.parse_output_json(response_text)
-    logger.info(f"Parsed response: {parsed_response}")
+def build_prompt(input_data):
+    # Join around the policy instead of str.replace so a long bill is copied once, not scanned
+    with metrics.stage("prompt"):
+        before, after = prompt_parts()
+        return "".join((before, input_data, after))
+
+def cache_key_for(input_data):
+    # With a secondary provider any of the models may have answered, so the key names them all
+    template, goal_5 = load_prompt_files()
+    return make_key(input_data, template, goal_5, config.analysis_model_name())
+
+def finalize_response(response_text, cache_key, use_cache=True, parsed_response=None):
+    """Turn the complete LLM response into a report dict, caching it on success."""
+    logger.info(f"LLM response received ({len(response_text)} chars)")
+    logger.debug(f"Raw LLM response: {response_text[:500]}...")
+
+    if parsed_response is None:
+        with metrics.stage("parse"):
+            parsed_response = parse_output.parse_output_json(response_text)
 
     if parsed_response:
         if isinstance(parsed_response, list) and len(parsed_response) == 1:
@@ -28,12 +51,89 @@ def analyze_policy(input_data):
         
         if isinstance(parsed_response, dict):
             # Preserve all sections of the parsed response
+            if use_cache:
+                analysis_cache.set(cache_key, parsed_response)
             return parsed_response
         else:
             logger.warning(f"Parsed response is not a dictionary. Type: {type(parsed_response)}")
-    
+
     # If parsing failed or the result is not as expected, return a default structure
     logger.warning("Failed to parse the LLM response as expected. Using default structure.")
+    return default_report()
+
+def analyze_policy(input_data, use_cache=True):
+    cache_key = cache_key_for(input_data)
+    if use_cache:
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Analysis cache hit for {cache_key[:12]} ({analysis_cache.stats()})")
+            return cached
+
+    if is_long_document(input_data):
+        return analyze_long_document(input_data, cache_key, use_cache)
+
+    response_text = config.analysis_llm().get_response(build_prompt(input_data))
+    return finalize_response(response_text, cache_key, use_cache)
+
+async def analyze_policy_async(input_data, use_cache=True):
+    """``analyze_policy`` for callers running on the shared LLM event loop.
+
+    Long documents are analyzed in a worker thread, since their chunks are
+    themselves scheduled on the loop.
+    """
+    cache_key = cache_key_for(input_data)
+    if use_cache:
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    if is_long_document(input_data):
+        return await asyncio.to_thread(analyze_long_document, input_data, cache_key, use_cache)
+
+    response_text = await collect_response(config.analysis_llm(), build_prompt(input_data))
+    return finalize_response(response_text, cache_key, use_cache)
+
+def analyze_long_document(input_data, cache_key, use_cache=True):
+    report = analyze_long_policy(input_data, config.analysis_llm(), build_prompt)
+    if report is None:
+        logger.warning("No chunk of the long document could be parsed. Using default structure.")
+        return default_report()
+    if use_cache:
+        analysis_cache.set(cache_key, report)
+    return report
+
+def analyze_policy_stream(input_data, use_cache=True):
+    """Stream the analysis, yielding ``(section, value)`` for each top-level report
+    section as soon as it is complete. The generator returns the full report, so
+    callers can use ``report = yield from analyze_policy_stream(...)``.
+    """
+    cache_key = cache_key_for(input_data)
+    if use_cache:
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Analysis cache hit for {cache_key[:12]} ({analysis_cache.stats()})")
+            for section, value in cached.items():
+                yield section, value
+            return cached
+
+    if is_long_document(input_data):
+        # Chunks are analyzed concurrently, so sections only exist once they are merged
+        report = analyze_long_document(input_data, cache_key, use_cache)
+        for section, value in report.items():
+            yield section, value
+        return report
+
+    parser = parse_output.IncrementalJSONParser()
+    for chunk in iter_response(config.analysis_llm(), build_prompt(input_data)):
+        for section, value in parser.feed(chunk):
+            if section is not None:
+                yield section, value
+
+    with metrics.stage("parse"):
+        parsed_response = parser.close()
+    return finalize_response(parser.text, cache_key, use_cache, parsed_response)
+
+def default_report():
     return {
         "policy_summary": {
             "title": "Failed to parse response",
@@ -0,0 +1,194 @@
+"""Batch analysis of many bills from the command line.
+
+Inputs are LegiScan bill ids, a directory of PDF/DOC/DOCX/TXT files, or a
+JSONL file of ``{"id": ..., "text": ...}`` records. Each item is extracted
+in a worker thread and analyzed with ``analyze_policy_async`` on the shared
+LLM event loop, at most ``--concurrency`` items at a time. Every result is
+appended to the output JSONL as soon as it completes, so an interrupted run
+can simply be restarted: ids already analyzed successfully are skipped, and
+failed ones are retried.
+
+    python -m ai.batch --bills 1893012 1893544 -o reports.jsonl
+    python -m ai.batch --bill-file tx_2025_ids.txt -o tx_2025.jsonl -c 8
+    python -m ai.batch --dir bills/ -o reports.jsonl
+    python -m ai.batch --jsonl texts.jsonl -o reports.jsonl
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+from ai.analysis import analyze_policy_async
+from utilities import config
+from utilities.llm_config import gather_limited, run_async
+from utilities.llm_registry import registry
+from utilities.uploads import allowed_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", 4))
+
+
+def bill_items(bill_ids):
+    for bill_id in bill_ids:
+        yield str(bill_id), lambda bill_id=bill_id: load_bill(bill_id)
+
+
+def file_items(directory):
+    for path in sorted(Path(directory).iterdir()):
+        if path.is_file() and allowed_file(path.name):
+            yield path.name, lambda path=path: load_file(path)
+
+
+def jsonl_items(path):
+    # Items are listed before any is analyzed, so each text is read again
+    # from its offset when needed rather than kept in memory from the start.
+    with open(path, "rb") as f:
+        line_number = 0
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            line_number += 1
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            item_id = str(record.get("id", line_number))
+            yield item_id, lambda offset=offset: load_jsonl_text(path, offset)
+
+
+def load_jsonl_text(path, offset):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return json.loads(f.readline())["text"]
+
+
+def load_bill(bill_id):
+    from data.bill_index import document_text
+    from data.data_retrieval import get_bill_pdf
+
+    stored = get_bill_pdf(bill_id)
+    if stored is None:
+        raise ValueError(f"No text available for bill {bill_id}")
+    with open(stored.path, "rb") as f:
+        return document_text(f.read(), stored.mimetype)
+
+
+def load_file(path):
+    from process_input import extract_file
+
+    return extract_file(str(path)).text
+
+
+def completed_ids(output):
+    """Ids with a successful result in ``output``; a torn last line is ignored."""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "error" not in record:
+                done.add(record["id"])
+    return done
+
+
+class Progress:
+    """Live throughput on stderr; ``total`` is the number of items to analyze, if known."""
+
+    def __init__(self, total=None):
+        self.total = total
+        self.skipped = 0
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    def update(self, item_id, seconds, error=None):
+        self.done += 1
+        self.failed += error is not None
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed * 60 if elapsed else 0.0
+        remaining = self.total - self.done if self.total is not None else None
+        eta = f", ~{remaining / rate:.0f} min left" if remaining and rate else ""
+        status = "failed" if error else f"{seconds:.1f}s"
+        print(f"[{self.done} done, {self.failed} failed, {self.skipped} skipped] {item_id} {status} "
+              f"| {rate:.1f} docs/min{eta}", file=sys.stderr, flush=True)
+
+
+async def run_batch(items, output, concurrency=DEFAULT_CONCURRENCY, use_cache=True):
+    done = completed_ids(output)
+    pending = []
+    skipped = 0
+    for item_id, load in items:
+        if item_id in done:
+            skipped += 1
+        else:
+            pending.append((item_id, load))
+    # Only this run's inputs count: the output file may hold results of other runs
+    progress = Progress(len(pending))
+    progress.skipped = skipped
+
+    with open(output, "a", encoding="utf-8") as out:
+        def write(record):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+        async def analyze(item):
+            # Extraction happens inside the concurrency limit, so at most
+            # ``concurrency`` documents are held in memory at once.
+            item_id, load = item
+            start = time.monotonic()
+            try:
+                text = await asyncio.to_thread(load)
+                report = await analyze_policy_async(text, use_cache)
+            except Exception as e:
+                logger.exception(f"Analysis of {item_id} failed")
+                write({"id": item_id, "error": str(e)})
+                progress.update(item_id, time.monotonic() - start, e)
+                return
+            seconds = time.monotonic() - start
+            write({"id": item_id, "seconds": round(seconds, 2), "chars": len(text), "report": report})
+            progress.update(item_id, seconds)
+
+        await gather_limited(analyze, pending, max_concurrency=concurrency)
+    return progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze many bills and write the reports as JSONL.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--bills", nargs="+", help="LegiScan bill ids")
+    source.add_argument("--bill-file", help="file with one LegiScan bill id per line")
+    source.add_argument("--dir", help="directory of PDF, DOC, DOCX or TXT files")
+    source.add_argument("--jsonl", help='JSONL file of {"id": ..., "text": ...} records')
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to append results to")
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--no-cache", action="store_true", help="ignore and do not fill the analysis cache")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, force=True)
+
+    if args.bills or args.bill_file:
+        bill_ids = args.bills or [line.strip() for line in open(args.bill_file) if line.strip()]
+        items = bill_items(bill_ids)
+    elif args.dir:
+        items = file_items(args.dir)
+    else:
+        items = jsonl_items(args.jsonl)
+
+    config.analysis_llm()
+    registry.warm_up()
+    progress = run_async(run_batch(items, args.output, args.concurrency, not args.no_cache))
+    print(f"Finished: {progress.done - progress.failed} analyzed, {progress.failed} failed, "
+          f"{progress.skipped} already done", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
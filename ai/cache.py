@@ -0,0 +1,170 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get("ANALYSIS_CACHE_DIR", "cache/analysis")
+MEMORY_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MEMORY_ENTRIES", 256))
+DISK_MAX_BYTES = int(os.environ.get("ANALYSIS_CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024))
+TTL_SECONDS = int(os.environ.get("ANALYSIS_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+
+
+def normalize_policy_text(text):
+    """Collapse whitespace so reflowed copies of the same bill share a key."""
+    return " ".join(text.split())
+
+
+def make_key(policy_text, prompt_template, goal_5, model_name):
+    """Content address for one analysis: policy, prompt template, goal 5 text and model."""
+    digest = hashlib.sha256()
+    for part in (
+        normalize_policy_text(policy_text),
+        hashlib.sha256(prompt_template.encode("utf-8")).hexdigest(),
+        goal_5,
+        model_name,
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """Two-tier cache of parsed analysis reports.
+
+    Recent entries live in an in-memory LRU; every entry is also written to
+    ``cache_dir`` as a JSON file so results survive restarts. Disk entries
+    expire after ``ttl`` seconds and the directory is trimmed, oldest first,
+    whenever it grows past ``disk_max_bytes``.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, memory_entries=MEMORY_ENTRIES,
+                 disk_max_bytes=DISK_MAX_BYTES, ttl=TTL_SECONDS):
+        self.cache_dir = Path(cache_dir)
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, report = entry
+                if now - stored_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(report)
+                del self._memory[key]
+
+        report, stored_at = self._read_disk(key, now)
+        with self._lock:
+            if report is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, stored_at, copy.deepcopy(report))
+        return report
+
+    def set(self, key, report):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, copy.deepcopy(report))
+        self._write_disk(key, report)
+
+    def _remember(self, key, stored_at, report):
+        self._memory[key] = (stored_at, report)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key, now):
+        path = self._path(key)
+        try:
+            stored_at = path.stat().st_mtime
+            if now - stored_at > self.ttl:
+                path.unlink(missing_ok=True)
+                return None, None
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+            # Touch the file so disk eviction follows recency of use.
+            os.utime(path, (now, stored_at))
+            return report, stored_at
+        except FileNotFoundError:
+            return None, None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None, None
+
+    def _write_disk(self, key, report):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(report, f)
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        except OSError as e:
+            logger.warning(f"Could not persist analysis cache entry {key}: {e}")
+
+    def _evict_disk(self):
+        now = time.time()
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - st.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((st.st_atime, st.st_size, path))
+            total += st.st_size
+
+        if total <= self.disk_max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            path.unlink(missing_ok=True)
+            total -= size
+            if total <= self.disk_max_bytes:
+                break
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        for path in self.cache_dir.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.hits - self.disk_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+analysis_cache = AnalysisCache()
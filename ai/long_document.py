@@ -0,0 +1,227 @@
+import json
+import logging
+import os
+import re
+from collections import Counter
+
+from utilities import parse_output
+from utilities.llm_config import BaseLLM, batch_process_async, run_async
+
+logger = logging.getLogger(__name__)
+
+# Bills above this many estimated tokens are analyzed in chunks.
+LONG_DOCUMENT_TOKENS = int(os.environ.get("LONG_DOCUMENT_TOKENS", 60000))
+CHUNK_TOKENS = int(os.environ.get("LONG_DOCUMENT_CHUNK_TOKENS", 24000))
+MAX_PARALLEL_CHUNKS = int(os.environ.get("LONG_DOCUMENT_MAX_PARALLEL", 4))
+
+# Roughly four characters per token for English legislative text.
+CHARS_PER_TOKEN = 4
+
+# Extracted PDF text is joined into one line, so boundaries are matched
+# anywhere rather than at line starts.
+SECTION_BOUNDARY = re.compile(r"(?=\b(?:SECTION|Section|SEC\.|Sec\.)\s+\d+[A-Za-z]?\b)")
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.;:])\s+")
+
+RATING_ORDER = {"low": 0, "medium": 1, "high": 2}
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def is_long_document(text):
+    return estimate_tokens(text) > LONG_DOCUMENT_TOKENS
+
+
+def _pieces(text, pattern, max_chars, separator=""):
+    """Split ``text`` at ``pattern`` and merge neighbours back up to ``max_chars``."""
+    pieces = [p for p in pattern.split(text) if p.strip()]
+    merged = []
+    for piece in pieces:
+        if merged and len(merged[-1]) + len(separator) + len(piece) <= max_chars:
+            merged[-1] += separator + piece
+        else:
+            merged.append(piece)
+    return merged
+
+
+def split_into_chunks(text, max_tokens=CHUNK_TOKENS):
+    """Split a bill at section boundaries into chunks of at most ``max_tokens``.
+
+    Sections are packed greedily in document order. A single section that is
+    too long is split at sentence boundaries, and as a last resort at a
+    fixed width.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    for section in _pieces(text, SECTION_BOUNDARY, max_chars):
+        if len(section) <= max_chars:
+            chunks.append(section)
+            continue
+        for sentences in _pieces(section, SENTENCE_BOUNDARY, max_chars, separator=" "):
+            for start in range(0, len(sentences), max_chars):
+                chunks.append(sentences[start:start + max_chars])
+    return chunks
+
+
+def _chunk_prompt(build_prompt, chunk, index, total):
+    header = (f"[This is part {index} of {total} of a longer bill. Analyze only this part; "
+              f"the parts are analyzed separately and combined afterwards.]\n\n")
+    return build_prompt(header + chunk)
+
+
+def analyze_long_policy(text, llm: BaseLLM, build_prompt, max_tokens=CHUNK_TOKENS,
+                        max_concurrency=MAX_PARALLEL_CHUNKS):
+    """Map-reduce analysis of a long bill.
+
+    The bill is split with ``split_into_chunks`` and every chunk is analyzed
+    concurrently, at most ``max_concurrency`` at a time, through
+    ``batch_process_async``. Returns the merged report, or None if no chunk
+    produced a usable report.
+    """
+    chunks = split_into_chunks(text, max_tokens)
+    logger.info(f"Analyzing long document in {len(chunks)} chunks, {max_concurrency} at a time")
+    prompts = [_chunk_prompt(build_prompt, chunk, i, len(chunks)) for i, chunk in enumerate(chunks, 1)]
+
+    responses = run_async(batch_process_async(llm, prompts, max_concurrency=max_concurrency))
+
+    reports = []
+    weights = []
+    for i, (chunk, response) in enumerate(zip(chunks, responses), 1):
+        report = parse_output.parse_output_json(response)
+        if isinstance(report, list) and len(report) == 1:
+            report = report[0]
+        if isinstance(report, dict):
+            reports.append(report)
+            weights.append(len(chunk))
+        else:
+            logger.warning(f"Chunk {i} of {len(chunks)} did not return a usable report")
+
+    if not reports:
+        return None
+    return merge_reports(reports, weights)
+
+
+def _target_code(target):
+    return str(target).split(" - ")[0].strip()
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _weighted_mean(values, weights):
+    pairs = [(v, w) for v, w in zip(values, weights) if v is not None]
+    if not pairs:
+        return "N/A"
+    total = sum(w for _, w in pairs)
+    return round(sum(v * w for v, w in pairs) / total)
+
+
+def _unique(items):
+    """Concatenate in order, dropping exact duplicates."""
+    seen = set()
+    result = []
+    for item in items:
+        key = json.dumps(item, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            result.append(item)
+    return result
+
+
+def _join_text(values):
+    return " ".join(_unique(v for v in values if isinstance(v, str) and v.strip()))
+
+
+def _most_common(values):
+    """Most frequent value, ties broken by first appearance."""
+    values = [v for v in values if v]
+    if not values:
+        return "N/A"
+    counts = Counter(values)
+    return max(values, key=lambda v: (counts[v], -values.index(v)))
+
+
+def merge_reports(reports, weights):
+    """Combine per-chunk reports into one report with the usual schema.
+
+    The merge is deterministic for a given chunk order:
+
+    * each SDG 5 target takes the highest score any chunk gave it (a bill
+      addresses a target if any of its sections do), together with that
+      chunk's analysis; ties go to the earliest chunk
+    * the overall score and cost-effectiveness rating are averaged over
+      chunks, weighted by chunk length
+    * lists are concatenated in chunk order without duplicates, and free
+      text is joined
+    """
+    def section(name):
+        return [r.get(name) if isinstance(r.get(name), dict) else {} for r in reports]
+
+    summaries = section("policy_summary")
+    alignments = section("sdg5_alignment")
+    biases = section("bias_analysis")
+    costs = section("cost_effectiveness_analysis")
+    assessments = section("overall_assessment")
+    conclusions = section("conclusion")
+
+    best_targets = {}
+    order = []
+    for alignment in alignments:
+        for item in alignment.get("breakdown") or []:
+            if not isinstance(item, dict):
+                continue
+            code = _target_code(item.get("target", ""))
+            score = _number(item.get("score"))
+            if code not in best_targets:
+                order.append(code)
+                best_targets[code] = (score, item)
+                continue
+            best_score = best_targets[code][0]
+            if score is not None and (best_score is None or score > best_score):
+                best_targets[code] = (score, item)
+
+    ratings = [RATING_ORDER.get(str(c.get("overall_rating", "")).lower()) for c in costs]
+    mean_rating = _weighted_mean(ratings, weights)
+    overall_rating = "N/A" if mean_rating == "N/A" else {v: k for k, v in RATING_ORDER.items()}[mean_rating].capitalize()
+
+    def concat(sections, key):
+        return _unique(item for s in sections for item in (s.get(key) or []))
+
+    def concat_top(key):
+        return _unique(item for r in reports for item in (r.get(key) or []))
+
+    return {
+        "policy_summary": {
+            "title": next((s["title"] for s in summaries if s.get("title")), "Policy Analysis Report"),
+            "focus_area": _most_common([s.get("focus_area") for s in summaries]),
+            "brief_overview": _join_text(s.get("brief_overview") for s in summaries),
+        },
+        "sdg5_alignment": {
+            "overall_score": _weighted_mean([_number(a.get("overall_score")) for a in alignments], weights),
+            "breakdown": [best_targets[code][1] for code in order],
+        },
+        "bias_analysis": {
+            "explicit_biases": concat(biases, "explicit_biases"),
+            "implicit_biases": concat(biases, "implicit_biases"),
+        },
+        "cost_effectiveness_analysis": {
+            "overall_rating": overall_rating,
+            "explanation": _join_text(c.get("explanation") for c in costs),
+            "key_factors": concat(costs, "key_factors"),
+        },
+        "improvement_recommendations": concat_top("improvement_recommendations"),
+        "ai_integration_opportunities": concat_top("ai_integration_opportunities"),
+        "overall_assessment": {
+            key: concat(assessments, key) for key in ("strengths", "weaknesses", "opportunities", "threats")
+        },
+        "conclusion": {
+            "summary": _join_text(c.get("summary") for c in conclusions),
+            "key_takeaways": concat(conclusions, "key_takeaways"),
+            "final_recommendation": _join_text(c.get("final_recommendation") for c in conclusions),
+        },
+    }
@@ -1,32 +1,74 @@
-from flask import Flask, render_template, request, send_file, jsonify
+from flask import Flask, Response, render_template, request, send_file, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
 from werkzeug.utils import secure_filename
 import os
 import io
-from xhtml2pdf import pisa
-from reports.create_policy_report import create_policy_report_pdf
-from process_input import process_input
-import requests
-import time
-from utilities.constants import us_states, reproductive_rights_and_health, economic_equality, safety_and_security
+from process_input import extract_file
+from utilities.constants import us_states, reproductive_rights_and_health, economic_equality, safety_and_security, GOAL5_TARGETS
 from data import data_retrieval
-from ai.analysis import analyze_policy
-import pandas as pd
+from data.bill_store import bill_store
+from data.incident_stats import incident_statistics
+from ai.analysis import analyze_policy_stream
+from ai.cache import analysis_cache
+from utilities import config, metrics, profiling
+from utilities.llm_registry import registry as llm_registry
+from utilities.rate_limit import limiter_stats
+from utilities.text_cache import text_cache
+from utilities.uploads import UploadRequest, allowed_file
 import json
-from plots.create_plots import create_plots
 from data.civic_data import get_representatives
+from utilities.jobs import JobQueue, QueueFullError, DONE, FAILED
+from reports.render_service import render_service
+import multiprocessing
 import traceback
 import logging
+import time
 
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(
+    level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s',
+)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 
 
-UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt'}
+app.request_class = UploadRequest
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_BYTES', 32 * 1024 * 1024))
+
+# Profiling of single analyses: every analysis when PROFILE_ANALYSES is set,
+# or requests that send "X-Profile: <PROFILE_TOKEN>".
+app.config['PROFILE_ANALYSES'] = os.environ.get('PROFILE_ANALYSES') == '1'
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN')
+
+# Browsers revalidate bill texts after this many seconds.
+BILL_TEXT_MAX_AGE = int(os.environ.get('BILL_TEXT_MAX_AGE_SECONDS', 3600))
+
+job_queue = JobQueue(
+    max_workers=int(os.environ.get('ANALYSIS_WORKERS', 4)),
+    max_pending=int(os.environ.get('ANALYSIS_MAX_PENDING', 32)),
+    ttl=int(os.environ.get('ANALYSIS_JOB_TTL_SECONDS', 3600)),
+)
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+def warm_up_llm():
+    """Connect and authenticate the analysis model before the first request needs it."""
+    llm_registry.warm_up_in_background(config.analysis_llm)
+
+def warm_up_renderer():
+    """Start the report rendering processes before the first analysis finishes."""
+    render_service.start_in_background()
+
+# A preloading gunicorn master must not start threads, processes or open
+# connections before forking; gunicorn.conf.py warms up each worker after the
+# fork instead. Nor must the rendering processes, which import this module
+# again when the app is run as a script.
+if multiprocessing.parent_process() is None:
+    if os.environ.get('LLM_WARM_UP', '1') != '0':
+        warm_up_llm()
+    if os.environ.get('RENDER_WARM_UP', '1') != '0':
+        warm_up_renderer()
+    if os.environ.get('STATISTICS_WARM_UP', '1') != '0':
+        incident_statistics.load_in_background()
 
 topics = {
     "Reproductive Rights": reproductive_rights_and_health,
@@ -34,9 +76,14 @@ topics = {
     "Safety and Security": safety_and_security
 }
 
-def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    return jsonify({"error": f"The uploaded file is too large. The limit is {limit_mb} MB."}), 413
+
+@app.errorhandler(UnsupportedMediaType)
+def upload_unsupported(e):
+    return jsonify({"error": e.description}), 415
 
 @app.route('/', methods=['GET'])
 def index():
@@ -63,14 +110,27 @@ def policy_search():
     selected_topic = request.form.get('topic')
     selected_state = request.form.get('state')
     bills = data_retrieval.get_bills(selected_topic, selected_state)
-    print(bills)
     return jsonify(bills)
 
+def send_bill_text(bill_id):
+    stored = data_retrieval.get_bill_pdf(bill_id)
+    if stored is None:
+        return jsonify({"error": "The text of this bill is not available."}), 404
+    # Stored documents are content-addressed, so the SHA-256 is a strong ETag
+    # and the browser can revalidate with If-None-Match.
+    return send_file(stored.path, mimetype=stored.mimetype, as_attachment=False,
+                     etag=stored.etag, conditional=True, max_age=BILL_TEXT_MAX_AGE)
+
+@app.route('/bills/<int:bill_id>/text', methods=['GET'])
+def bill_text(bill_id):
+    return send_bill_text(bill_id)
+
 @app.route('/get_bill_pdf', methods=['POST'])
 def get_bill_pdf_route():
     bill_id = request.form.get('bill_id')
-    pdf_file = data_retrieval.get_bill_pdf(bill_id)
-    return send_file(pdf_file, as_attachment=False)
+    if not bill_id or not bill_id.isdigit():
+        return jsonify({"error": "Please select a bill."}), 400
+    return send_bill_text(int(bill_id))
 
 
 @app.route('/proxy/representatives')
@@ -85,105 +145,232 @@ def proxy_representatives():
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
 
+def run_analysis(job, policy_content=None, upload=None, filename=None):
+    started = time.perf_counter()
+    if upload is not None:
+        with upload, metrics.stage("process_input"):
+            extracted = extract_file(upload, filename)
+        logger.info(f"Processed file input: {filename} ({extracted.page_count} pages via {extracted.backend})")
+        text_cache.set(upload.digest, extracted)
+        policy_content = extracted.text
+
+    logger.info(f"Analyzing {len(policy_content)} chars for job {job.id}")
+    logger.debug(f"Policy content (first 500 chars): {policy_content[:500]}...")
+
+    sections = analyze_policy_stream(policy_content)
+    while True:
+        try:
+            section, value = next(sections)
+        except StopIteration as stop:
+            policy_report = stop.value
+            break
+        job.publish("section", {"name": section, "value": value})
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Policy report generated: {str(policy_report)[:500]}...")
+
+    # The report is served as JSON and HTML from this dict; the PDF is only
+    # rendered when it is first downloaded (job_report_pdf)
+    logger.info(f"Job {job.id} finished in {time.perf_counter() - started:.1f}s")
+    return policy_report
+
+def run_profiled_analysis(job, **kwargs):
+    # Runs in the job's worker thread, so that is the thread being sampled.
+    # The report is built here too, in this thread rather than the render
+    # pool, so the profile covers create_plots and create_policy_report_pdf;
+    # the download then serves this PDF.
+    with profiling.profile(f"analysis-{time.strftime('%Y%m%d-%H%M%S')}-{job.id}") as result:
+        policy_report = run_analysis(job, **kwargs)
+        try:
+            job.artifact("pdf", lambda: render_service.render(policy_report, inline=True))
+        except QueueFullError as e:
+            logger.warning(f"Profile of job {job.id} leaves out the PDF: {str(e)}")
+    if result.summary is not None:
+        job.publish("profile", {key: result.summary[key] for key in
+                                ("name", "duration_seconds", "samples", "peak_memory_bytes")})
+    return policy_report
+
+def profiling_requested():
+    if app.config['PROFILE_ANALYSES']:
+        return True
+    token = app.config['PROFILE_TOKEN']
+    return bool(token) and request.headers.get('X-Profile') == token
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
-    file = request.files.get('file')
-    text = request.form.get('text')
+    # Reading the form is what receives and spools the request body
+    with metrics.stage("upload"):
+        file = request.files.get('file')
+        text = request.form.get('text')
 
     if file and text:
         return jsonify({"error": "Please provide either a file or text input, not both."}), 400
 
+    analysis = run_profiled_analysis if profiling_requested() else run_analysis
+    upload = None
     try:
         if file and file.filename != '' and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
-            policy_content = process_input(file_path)
-            logger.info(f"Processed file input: {filename}")
+            spool = file.stream
+            extracted = text_cache.get(spool.digest)
+            if extracted is not None:
+                # Same document seen before: skip parsing it again
+                job = job_queue.submit(analysis, policy_content=extracted.text)
+                logger.info(f"Queued cached text of {filename} ({spool.digest[:12]}) as job {job.id}")
+            else:
+                upload = spool.detach()
+                job = job_queue.submit(analysis, upload=upload, filename=filename)
+                logger.info(f"Queued file input {filename} ({upload.size} bytes, "
+                            f"{'memory' if upload.in_memory else 'disk'}) as job {job.id}")
         elif text:
-            policy_content = text
-            logger.info("Received text input")
+            job = job_queue.submit(analysis, policy_content=text)
+            logger.info(f"Queued text input as job {job.id}")
         else:
             return jsonify({"error": "No valid input provided"}), 400
 
-        logger.info(f"Policy content (first 500 chars): {policy_content[:500]}...")
-
-        policy_report = analyze_policy(policy_content)
-        plot_html = create_plots(policy_report)
-        logger.info(f"Policy report generated: {str(policy_report)[:500]}...")
-
-        pdf_content = create_policy_report_pdf(policy_report, plot_html)
-        logger.info("PDF content generated")
-        
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.remove(file_path)
-            logger.info(f"Temporary file removed: {file_path}")
-
-        # Save the PDF temporarily
-        temp_pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], 'temp_report.pdf')
-        with open(temp_pdf_path, 'wb') as f:
-            f.write(pdf_content)
-        logger.info(f"Temporary PDF saved: {temp_pdf_path}")
-        
-        time.sleep(0.5)
-        
         return jsonify({
-            "success": True, 
-            "pdf_url": "/get_pdf",
-        })
-    
+            "success": True,
+            "job_id": job.id,
+            "status_url": f"/jobs/{job.id}",
+            "events_url": f"/jobs/{job.id}/events",
+            "report_url": f"/jobs/{job.id}/report",
+            "json_url": f"/jobs/{job.id}/report.json",
+            "pdf_url": f"/jobs/{job.id}/report.pdf",
+        }), 202
+
+    except QueueFullError as e:
+        if upload is not None:
+            upload.close()
+        logger.warning(f"Rejected analysis: {str(e)}")
+        return jsonify({"error": "The server is busy with other analyses. Please try again shortly."}), 503
     except Exception as e:
         logger.error(f"Error in analysis: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({"error": f"An error occurred during analysis: {str(e)}"}), 500
-    
-@app.route('/get_pdf')
-def get_pdf():
-    temp_pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], 'temp_report.pdf')
-    return send_file(temp_pdf_path, mimetype='application/pdf')
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
 
-@app.route('/statistics', methods=['GET'])
-def statistics():
-    with open("data/2024_cleaned.csv") as f:
-        data = pd.read_csv(f)
-    
-    # Filter data for female victims only
-    women_victims = data[data['Victim Sex'] == 'Female']
-    
-    # Calculate statistics
-    total_incidents = len(women_victims)
-    women_victims_percentage = (len(women_victims) / len(data)) * 100
-    
-    crime_types = women_victims['Type'].value_counts().to_dict()
-    offender_relationships = women_victims['Offender Relationship'].value_counts().to_dict()
-    weapons_used = women_victims['Weapon Type'].value_counts().to_dict()
-    injury_types = women_victims['Injury Type'].value_counts().to_dict()
-    incidents_by_location = women_victims['Location'].value_counts().to_dict()
-    offender_sex_dist = (women_victims['Offender Sex'].value_counts(normalize=True) * 100).to_dict()
-
-    # Calculate percentage of incidents resulting in injury
-    injury_percentage = (women_victims['Injury Type'] != 'No injury').mean() * 100
-
-    # Calculate percentage of domestic violence
-    domestic_violence = women_victims['Offender Relationship'].isin(['Intimate Partner', 'Other Relative'])
-    domestic_violence_percentage = domestic_violence.mean() * 100
-
-    # Prepare data for the template
-    stats = {
-        'total_incidents': total_incidents,
-        'women_victims_percentage': women_victims_percentage,
-        'crime_types': crime_types,
-        'offender_relationships': offender_relationships,
-        'weapons_used': weapons_used,
-        'injury_types': injury_types,
-        'incidents_by_location': incidents_by_location,
-        'offender_sex_dist': offender_sex_dist,
-        'injury_percentage': injury_percentage,
-        'domestic_violence_percentage': domestic_violence_percentage
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def stream():
+        index = 0
+        while True:
+            events = job.wait_for_events(index, timeout=15)
+            if not events:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            for event, data in events:
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+                if event in (DONE, FAILED):
+                    return
+            index += len(events)
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def finished_job(job_id):
+    """``(job, None)`` for a finished analysis, else ``(None, error response)``."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return None, (jsonify({"error": "Job not found"}), 404)
+    if job.status == FAILED:
+        return None, (jsonify({"error": f"An error occurred during analysis: {job.error}"}), 500)
+    if job.status != DONE:
+        return None, (jsonify(job.to_dict()), 409)
+    return job, None
+
+@app.route('/jobs/<job_id>/report.json', methods=['GET'])
+def job_report_json(job_id):
+    job, error = finished_job(job_id)
+    if error:
+        return error
+    return jsonify(job.result)
+
+@app.route('/jobs/<job_id>/report', methods=['GET'])
+def job_report_html(job_id):
+    job, error = finished_job(job_id)
+    if error:
+        return error
+    from plots.create_plots import chart_svg
+
+    title = (job.result.get('policy_summary') or {}).get('title', 'Policy Analysis Report')
+    return render_template('report.html', report=job.result, title=title, goal5_targets=GOAL5_TARGETS,
+                           chart_svg=job.artifact("chart_svg", lambda: chart_svg(job.result)),
+                           pdf_url=f"/jobs/{job.id}/report.pdf")
+
+@app.route('/jobs/<job_id>/report.pdf', methods=['GET'])
+def job_report_pdf(job_id):
+    job, error = finished_job(job_id)
+    if error:
+        return error
+    # Rendered on the first download only, then kept with the job
+    try:
+        pdf_content = job.artifact("pdf", lambda: render_service.render(job.result))
+    except QueueFullError as e:
+        logger.warning(f"Rejected PDF of job {job.id}: {str(e)}")
+        return jsonify({"error": "The server is busy rendering other reports. Please try again shortly."}), 503
+    return send_file(io.BytesIO(pdf_content), mimetype='application/pdf',
+                     download_name=f"policy_report_{job.id}.pdf")
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        "analysis": analysis_cache.stats(),
+        "extracted_text": text_cache.stats(),
+        "legiscan": data_retrieval.client.stats(),
+        "bill_texts": bill_store.stats(),
+        "llm_clients": llm_registry.stats(),
+        "incident_statistics": incident_statistics.stats(),
+        "report_renderer": render_service.stats(),
+    })
+
+
+def cache_metrics():
+    caches = {
+        "analysis": analysis_cache.stats(),
+        "extracted_text": text_cache.stats(),
+        "legiscan": data_retrieval.client.stats()["cache"],
+        "bill_texts": bill_store.stats(),
     }
+    for name, result in (("cache_hits_total", "hits"), ("cache_misses_total", "misses")):
+        yield (name, "counter", f"Lookups per cache that were {result}.",
+               [({"cache": cache}, stats[result]) for cache, stats in caches.items()])
+    limiters = limiter_stats()
+    yield ("llm_throttled_total", "counter", "LLM calls the provider rejected as rate limited.",
+           [({"provider": provider}, stats["throttled"]) for provider, stats in limiters.items()])
+    yield ("llm_concurrency_window", "gauge", "Current adaptive concurrency window per LLM provider.",
+           [({"provider": provider}, stats["window"]) for provider, stats in limiters.items()])
+    yield ("analysis_jobs_pending", "gauge", "Analysis jobs queued or running.",
+           [({}, job_queue.pending)])
+    renderer = render_service.stats()
+    yield ("report_renders_pending", "gauge", "Reports queued or rendering in the rendering processes.",
+           [({}, renderer["pending"])])
+    yield ("report_renders_rejected_total", "counter", "Reports not rendered because the rendering queue stayed full.",
+           [({}, renderer["rejected"])])
+
+
+metrics.register_collector(cache_metrics)
+
 
-    return render_template('statistics.html', stats=stats)
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/statistics', methods=['GET'])
+def statistics():
+    # Precomputed when the app starts and whenever the data file changes
+    return render_template('statistics.html', stats=incident_statistics.get())
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,95 @@
+"""Check that concurrent LLM streams overlap instead of blocking the event loop.
+
+Starts the local fake server of tests/fake_llm_server.py, streaming
+``--chunks`` chunks ``--delay`` seconds apart in both the OpenAI
+chat-completions SSE format (used by the OpenAI, Ollama and Hugging Face
+OpenAI-compatible providers), the text-generation-inference format
+(``HFTextLLM``) and Gemini's gRPC streaming API. For each provider it runs
+``--streams`` prompts at once through ``batch_process_async`` on the shared
+LLM event loop, after one warm-up call, while a heartbeat task measures how
+late the loop wakes up.
+
+Exits non-zero if the streams did not overlap: the batch must finish within
+``--max-ratio`` times the duration of a single stream, and the loop must
+never stall for longer than one chunk interval.
+
+    python benchmarks/bench_async_streaming.py [--streams 32] [--chunks 10] [--delay 0.1]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+for provider in ("OLLAMA", "HUGGINGFACE_TEXT", "GEMINI"):
+    os.environ.setdefault(f"LLM_RPM_{provider}", "1000000")
+    os.environ.setdefault(f"LLM_MAX_CONCURRENCY_{provider}", "1000")
+
+from tests.fake_llm_server import gemini_async_client, running_servers  # noqa: E402
+from utilities import rate_limit  # noqa: E402
+from utilities.llm_config import batch_process_async, collect_response, get_llm, run_async  # noqa: E402
+
+
+async def run_batch(llm, streams, heartbeat_interval):
+    lags = []
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        while not stop.is_set():
+            expected = time.perf_counter() + heartbeat_interval
+            await asyncio.sleep(heartbeat_interval)
+            lags.append(time.perf_counter() - expected)
+
+    beat = asyncio.ensure_future(heartbeat())
+    start = time.perf_counter()
+    responses = await batch_process_async(llm, [f"prompt {i}" for i in range(streams)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return elapsed, responses, max(lags, default=0.0)
+
+
+def run_providers(base_url, grpc_target, args):
+    for provider in ("ollama", "huggingface-text", "gemini"):
+        rate_limit.get_limiter(provider).window = 1000
+    gemini = get_llm("gemini", "models/fake", api_key="unused")
+    gemini.client._async_client = run_async(gemini_async_client(grpc_target))
+    providers = {
+        "openai-compatible": get_llm("ollama", "fake", base_url=f"{base_url}/v1"),
+        "huggingface-text": get_llm("huggingface-text", f"{base_url}/generate", api_key="unused"),
+        "gemini": gemini,
+    }
+    single = args.chunks * args.delay
+    print(f"{'provider':<20}{'streams':>8}{'seconds':>9}{'serial s':>10}{'overlap':>9}{'max lag ms':>12}  ok")
+    failed = False
+    for name, llm in providers.items():
+        # One call first, so client construction is not counted as loop lag
+        run_async(collect_response(llm, "warm-up"))
+        elapsed, responses, lag = run_async(run_batch(llm, args.streams, args.delay / 4))
+        complete = all(r.count("token") == args.chunks for r in responses)
+        ok = complete and elapsed < single * args.max_ratio and lag < args.delay
+        failed |= not ok
+        print(f"{name:<20}{args.streams:>8}{elapsed:>9.2f}{single * args.streams:>10.1f}"
+              f"{single * args.streams / elapsed:>8.1f}x{lag * 1e3:>12.1f}  {ok}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=32)
+    parser.add_argument("--chunks", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.1)
+    parser.add_argument("--max-ratio", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with running_servers(args.chunks, args.delay) as (base_url, grpc_target):
+        failed = run_providers(base_url, grpc_target, args)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark the local LegiScan bill index in data.bill_index.
+
+Builds synthetic session datasets laid out like LegiScan's ``getDataset``
+archives (one ``bill/*.json`` per bill, HTML documents under ``text/``),
+then times a full ingestion, an incremental re-ingestion where a few bills
+changed, and the three topic searches offered on the policy search page.
+No network access is needed; ``--keep`` writes the fixture archives out for
+manual ``python -m data.bill_index --zip`` runs.
+
+    python benchmarks/bench_bill_index.py [--bills 5000] [--changed 50]
+"""
+import argparse
+import base64
+import io
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from data.bill_index import BillIndex  # noqa: E402
+from utilities.topic_matcher import TOPIC_QUERIES  # noqa: E402
+
+SUBJECTS = [
+    "maternal health coverage for women", "equal pay for female employees", "domestic violence shelters",
+    "highway maintenance funding", "school district boundaries", "prenatal care for pregnant women",
+    "sexual harassment in the workplace", "agricultural water rights", "public safety and stalking protection",
+    "childcare assistance for working mothers", "tax exemptions for veterans", "breast cancer screening",
+]
+
+
+def make_bill(bill_id, session, change_hash, rng):
+    subject = rng.choice(SUBJECTS)
+    return {
+        "bill": {
+            "bill_id": bill_id,
+            "change_hash": change_hash,
+            "state": "TX",
+            "bill_number": f"HB{bill_id}",
+            "title": f"Relating to {subject}.",
+            "description": f"An act relating to {subject} and {rng.choice(SUBJECTS)}.",
+            "status": 1,
+            "status_date": "2025-03-01",
+            "url": f"https://legiscan.com/TX/bill/HB{bill_id}/2025",
+            "session": session,
+            "texts": [{"doc_id": bill_id * 10, "mime": "text/html"}],
+        }
+    }
+
+
+def make_text(bill_id, rng):
+    body = " ".join(f"<p>SECTION {i}. The state shall provide {rng.choice(SUBJECTS)}.</p>" for i in range(1, 20))
+    return {"text": {"doc_id": bill_id * 10, "bill_id": bill_id, "mime": "text/html",
+                     "doc": base64.b64encode(f"<html><body>{body}</body></html>".encode()).decode()}}
+
+
+def make_dataset(bills, changed=(), seed=1):
+    rng = random.Random(seed)
+    session = {"session_id": 2100, "session_name": "89th Legislature", "year_start": 2025, "year_end": 2026}
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for bill_id in range(1, bills + 1):
+            change_hash = f"{bill_id:x}-{'b' if bill_id in changed else 'a'}"
+            archive.writestr(f"TX/2025-2026_89th_Legislature/bill/HB{bill_id}.json",
+                             json.dumps(make_bill(bill_id, session, change_hash, rng)))
+            archive.writestr(f"TX/2025-2026_89th_Legislature/text/{bill_id * 10}.json",
+                             json.dumps(make_text(bill_id, rng)))
+    return buffer.getvalue()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bills", type=int, default=5000)
+    parser.add_argument("--changed", type=int, default=50)
+    parser.add_argument("--keep", help="directory to write the fixture archives to")
+    args = parser.parse_args()
+
+    first = make_dataset(args.bills)
+    changed = set(random.Random(2).sample(range(1, args.bills + 1), args.changed))
+    second = make_dataset(args.bills, changed)
+    if args.keep:
+        Path(args.keep).mkdir(parents=True, exist_ok=True)
+        Path(args.keep, "TX_initial.zip").write_bytes(first)
+        Path(args.keep, "TX_update.zip").write_bytes(second)
+
+    tmp = tempfile.mkdtemp()
+    try:
+        index = BillIndex(str(Path(tmp) / "bills.db"))
+        seconds, counts = timed(lambda: index.ingest_zip(first))
+        print(f"initial ingest   {seconds:8.2f} s  {counts}")
+        seconds, counts = timed(lambda: index.ingest_zip(second))
+        print(f"incremental      {seconds:8.2f} s  {counts}")
+
+        for topic, query in TOPIC_QUERIES.items():
+            index.search(query, "TX", 2025)
+            runs = 20
+            seconds, _ = timed(lambda: [index.search(query, "TX", 2025) for _ in range(runs)])
+            hits = len(index.search(query, "TX", 2025, limit=args.bills))
+            print(f"search {topic:<22}{seconds / runs * 1e3:8.2f} ms  {hits} matching bills")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Tail latency and extra cost of hedged LLM requests.
+
+Two fake providers stream a response after a simulated time to first
+chunk: the primary is usually fast but has a slow tail (``--tail-rate`` of
+calls take ``--tail-seconds``), the secondary is a little slower but
+steady. The same sequence of calls is made against the primary alone and
+through ``HedgedLLM``; the script reports latency percentiles and how many
+extra provider calls hedging cost.
+
+    python benchmarks/bench_llm_hedging.py [--calls 400] [--tail-rate 0.03]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+for provider in ("BENCH_PRIMARY", "BENCH_SECONDARY"):
+    os.environ.setdefault(f"LLM_RPM_{provider}", "1000000")
+
+from utilities.llm_config import BaseLLM, LLMConfig, collect_response, run_async  # noqa: E402
+from utilities.llm_hedging import HedgedLLM  # noqa: E402
+
+
+class FakeLLM(BaseLLM):
+    def __init__(self, name, delay):
+        super().__init__(LLMConfig(name, name, api_key="unused"))
+        self.delay = delay
+        self.calls = 0
+
+    def _create_client(self):
+        return None
+
+    def _get_response(self, prompt):
+        raise NotImplementedError
+
+    async def _get_aresponse(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.delay())
+        yield '{"policy_summary": '
+        yield '{"title": "ok"}}'
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def measure(llm, calls):
+    latencies = []
+    for i in range(calls):
+        start = time.monotonic()
+        await collect_response(llm, f"prompt {i}")
+        latencies.append(time.monotonic() - start)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--tail-rate", type=float, default=0.03)
+    parser.add_argument("--tail-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'setup':<14}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'provider calls':>16}")
+    for name in ("primary only", "hedged"):
+        rng = random.Random(7)
+        primary = FakeLLM("bench-primary",
+                          lambda: args.tail_seconds if rng.random() < args.tail_rate else rng.uniform(0.03, 0.06))
+        secondary = FakeLLM("bench-secondary", lambda: rng.uniform(0.08, 0.12))
+        llm = primary if name == "primary only" else HedgedLLM([primary, secondary], default_hedge_delay=0.5)
+        latencies = run_async(measure(llm, args.calls))
+        print(f"{name:<14}" + "".join(f"{percentile(latencies, q) * 1e3:>9.0f}" for q in (0.5, 0.95, 0.99, 1.0))
+              + f"{primary.calls + secondary.calls:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Throughput of LLM calls against a provider quota, with and without limiting.
+
+A fake provider admits ``--quota`` requests per minute (token bucket) and
+answers 429 with ``Retry-After`` beyond that, like Gemini and OpenAI. The
+same burst of concurrent calls is sent through ``BaseLLM.get_aresponse``
+with a provider limiter matching the quota, and straight to the raw
+``_get_aresponse`` as before limiting existed. Reports completed calls,
+429s seen by the provider, and achieved calls per second.
+
+    python benchmarks/bench_llm_limiter.py [--quota 600] [--calls 150] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utilities import rate_limit  # noqa: E402
+from utilities.llm_config import BaseLLM, LLMConfig  # noqa: E402
+
+
+class QuotaExceeded(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("429 quota exceeded")
+        self.response = type("Response", (), {"headers": {"retry-after": f"{retry_after:.2f}"}})()
+
+
+class FakeProvider:
+    """Admits ``quota_per_minute`` calls per minute from a bucket holding ``burst``."""
+
+    def __init__(self, quota_per_minute, burst, latency):
+        self.rate = quota_per_minute / 60
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.latency = latency
+        self.rejected = 0
+
+    async def call(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            self.rejected += 1
+            raise QuotaExceeded((1 - self.tokens) / self.rate)
+        self.tokens -= 1
+        await asyncio.sleep(self.latency)
+        return "ok"
+
+
+class FakeLLM(BaseLLM):
+    provider = None
+
+    def _create_client(self):
+        return None
+
+    def _get_response(self, prompt):
+        raise NotImplementedError
+
+    async def _get_aresponse(self, prompt):
+        yield await self.provider.call()
+
+
+async def run(stream, calls, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    succeeded = failed = 0
+
+    async def one(i):
+        nonlocal succeeded, failed
+        async with semaphore:
+            try:
+                async for _ in stream(f"prompt {i}"):
+                    pass
+                succeeded += 1
+            except QuotaExceeded:
+                failed += 1
+
+    start = time.monotonic()
+    await asyncio.gather(*[one(i) for i in range(calls)])
+    return succeeded, failed, time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quota", type=int, default=600, help="provider requests per minute")
+    parser.add_argument("--burst", type=int, default=20, help="requests the provider quota has left at start")
+    parser.add_argument("--calls", type=int, default=150)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    rate_limit.BACKOFF_BASE = 0.05
+    print(f"{'case':<13}{'ok':>6}{'failed':>8}{'429s':>7}{'seconds':>9}{'ok/s':>7}  (quota {args.quota / 60:.1f}/s)")
+    for name in ("limited", "no limiter"):
+        provider = FakeProvider(args.quota, args.burst, args.latency)
+        limiter = rate_limit.ProviderLimiter(name, rpm=args.quota, tpm=10 ** 9, max_concurrency=args.concurrency)
+        # Start with the same headroom as the provider.
+        limiter._requests = float(args.burst)
+        rate_limit._limiters["bench"] = limiter
+        FakeLLM.provider = provider
+        llm = FakeLLM(LLMConfig("bench", "fake", api_key="unused"))
+        stream = llm.get_aresponse if name == "limited" else llm._get_aresponse
+        ok, failed, seconds = asyncio.run(run(stream, args.calls, args.concurrency))
+        print(f"{name:<13}{ok:>6}{failed:>8}{provider.rejected:>7}{seconds:>9.2f}{ok / seconds:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Micro-benchmark for utilities.parse_output.parse_output_json.
+
+Compares the single-pass parser against the previous multi-pass
+implementation (json.loads, fence regex, greedy regex, json_repair) over a
+corpus of Gemini-style responses: clean, fenced, prose-wrapped and several
+common malformations. Reports mean latency and peak allocation per parse.
+
+    python benchmarks/bench_parse_output.py [--repeat N]
+"""
+import argparse
+import contextlib
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import json_repair
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utilities.parse_output import parse_output_json  # noqa: E402
+
+
+def legacy_parse_output_json(output):
+    """The pre-rewrite implementation, kept verbatim apart from the function name."""
+    print("Entered parse_output_json")
+    print(f"Received output: {output[:100]}...")
+    if isinstance(output, (list, dict)):
+        return output
+    if not isinstance(output, str):
+        return None
+
+    def try_json_parse(json_str):
+        try:
+            return json.loads(json_str)
+        except json.JSONDecodeError:
+            return None
+
+    parsed = try_json_parse(output)
+    print("Parsed: ", parsed)
+    if parsed:
+        print("Parsed JSON: ", parsed)
+        return parsed
+    json_block_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', output)
+    if json_block_match:
+        parsed = try_json_parse(json_block_match.group(1))
+        if parsed:
+            print("Parsed JSON block: ", parsed)
+            return parsed
+    json_like_match = re.search(r'\{[\s\S]*\}|\[[\s\S]*\]', output)
+    if json_like_match:
+        parsed = try_json_parse(json_like_match.group(0))
+        if parsed:
+            print("Parsed JSON-like: ", parsed)
+            return parsed
+    try:
+        repaired_json = json_repair.loads(output)
+        print("Repaired JSON: ", repaired_json)
+        return repaired_json
+    except Exception as e:
+        print(f"Error: {e}")
+    return None
+
+
+def sample_report(scale=1):
+    sentence = "The policy expands access to services for women and girls, but funding is uncertain. "
+    targets = ["5.1", "5.2", "5.3", "5.4", "5.5", "5.6", "5.A", "5.B", "5.C"]
+    return {
+        "policy_summary": {
+            "title": "An Act relating to maternal health coverage",
+            "focus_area": "Women and girl's healthcare",
+            "brief_overview": sentence * 3 * scale,
+        },
+        "sdg5_alignment": {
+            "overall_score": 62,
+            "breakdown": [
+                {"target": f"{t} - Target text", "score": 6, "analysis": sentence * 4 * scale}
+                for t in targets
+            ],
+        },
+        "bias_analysis": {
+            "explicit_biases": [
+                {"description": sentence, "potential_impact": sentence * scale, "recommendation": sentence}
+            ] * 2,
+            "implicit_biases": [
+                {"description": sentence, "potential_impact": sentence * scale, "recommendation": sentence}
+            ] * 3,
+        },
+        "cost_effectiveness_analysis": {
+            "overall_rating": "Medium",
+            "explanation": sentence * 3 * scale,
+            "key_factors": [sentence] * 4,
+        },
+        "improvement_recommendations": [
+            {
+                "area": "Eligibility",
+                "current_state": sentence,
+                "proposed_change": sentence * 2 * scale,
+                "expected_impact": sentence,
+                "implementation_challenges": sentence,
+                "priority_level": "High",
+            }
+        ] * 4,
+        "ai_integration_opportunities": [{"area": "Outreach", "description": sentence}] * 2,
+        "overall_assessment": {key: [sentence] * 3 for key in ("strengths", "weaknesses", "opportunities", "threats")},
+        "conclusion": {
+            "summary": sentence * 2 * scale,
+            "key_takeaways": [sentence] * 4,
+            "final_recommendation": sentence,
+        },
+    }
+
+
+def build_corpus():
+    corpus = {}
+    for scale in (1, 8):
+        body = json.dumps(sample_report(scale), indent=2)
+        suffix = f"x{scale}"
+        corpus[f"bare-{suffix}"] = body
+        corpus[f"fenced-{suffix}"] = f"```json\n{body}\n```"
+        corpus[f"prose-{suffix}"] = f"Here is the analysis you requested:\n\n```json\n{body}\n```\n\nLet me know if you need more."
+        corpus[f"trailing-comma-{suffix}"] = "```json\n" + body.replace('"High"\n', '"High",\n') + "\n```"
+        corpus[f"unescaped-quote-{suffix}"] = "```json\n" + body.replace("Eligibility", 'The "Eligibility" clause', 1).replace('\\"', '"') + "\n```"
+        corpus[f"truncated-{suffix}"] = "```json\n" + body[: int(len(body) * 0.9)]
+    # A bracket in the prose ahead of the fenced block, and inner quotes left unescaped
+    corpus["prose-bracket"] = 'Sure [note: see below]\n```json\n{"a": 1}\n```'
+    corpus["inner-quotes"] = '{"a": "he said "hi" ok", "b": 2}'
+    # An odd number of them, which leaves a scanner inside a string
+    corpus["odd-quote"] = '{"a": "a 5" screen", "b": 2, "c": [3]}'
+    # The prompt's own example uses ranges such as `0-100` as values, which
+    # Gemini occasionally echoes back.
+    prompt = (ROOT / "prompts" / "goal_five_analysis.txt").read_text()
+    corpus["prompt-example"] = prompt[prompt.index("```json"):]
+    return corpus
+
+
+def measure(fn, text, repeat):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        fn(text)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn(text)
+        elapsed = (time.perf_counter() - start) / repeat
+
+        tracemalloc.start()
+        fn(text)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'case':<26}{'bytes':>9}{'old ms':>10}{'new ms':>10}{'speedup':>9}{'old KiB':>10}{'new KiB':>10}  same")
+    for name, text in build_corpus().items():
+        old_t, old_peak = measure(legacy_parse_output_json, text, args.repeat)
+        new_t, new_peak = measure(parse_output_json, text, args.repeat)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            same = legacy_parse_output_json(text) == parse_output_json(text)
+        print(f"{name:<26}{len(text):>9}{old_t * 1e3:>10.3f}{new_t * 1e3:>10.3f}{old_t / new_t:>8.1f}x"
+              f"{old_peak / 1024:>10.1f}{new_peak / 1024:>10.1f}  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark PDF text extraction backends in process_input.
+
+Generates synthetic bills of 50-500 pages with reportlab, then times every
+installed backend sequentially and through the process pool (from a path
+and from bytes in memory), plus the previous PyPDF2
+``policy += page.extract_text()`` loop for reference.
+
+    python benchmarks/bench_pdf_extraction.py [--pages 50 200 500]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import process_input  # noqa: E402
+from PyPDF2 import PdfReader  # noqa: E402
+
+
+def make_bill(path, pages):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    line = "The Department shall ensure that women and girls have equal access to services under this Act."
+    c = canvas.Canvas(str(path), pagesize=letter)
+    for page in range(1, pages + 1):
+        c.setFont("Helvetica", 10)
+        c.drawString(72, 740, f"SECTION {page}. Short title and definitions.")
+        for row in range(55):
+            c.drawString(72, 720 - row * 12, f"({row}) {line}")
+        c.showPage()
+    c.save()
+
+
+def legacy_route_pdf(path):
+    reader = PdfReader(path)
+    policy = ""
+    for page in reader.pages:
+        policy += page.extract_text()
+    return " ".join(policy.split("\n"))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200, 500])
+    args = parser.parse_args()
+
+    backends = process_input.available_pdf_backends()
+    print(f"backends: {', '.join(backends)}; pool workers: {process_input.PDF_WORKERS}")
+    print(f"{'pages':>6}  {'method':<22}{'seconds':>9}{'pages/s':>10}{'chars':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = str(Path(tmp) / f"bill_{pages}.pdf")
+            make_bill(path, pages)
+
+            runs = [("legacy pypdf2 +=", lambda: legacy_route_pdf(path))]
+            for backend in backends:
+                runs.append((f"{backend}", lambda b=backend: process_input.extract_pdf_text(path, b, parallel=False)))
+                runs.append((f"{backend} pool", lambda b=backend: process_input.extract_pdf_text(path, b, parallel=True)))
+                # An upload held in memory: spilled to a temporary file once for the pool
+                runs.append((f"{backend} pool, bytes",
+                             lambda b=backend: process_input.extract_pdf_text(Path(path).read_bytes(), b, parallel=True)))
+
+            for name, fn in runs:
+                seconds, text = timed(fn)
+                print(f"{pages:>6}  {name:<22}{seconds:>9.3f}{pages / seconds:>10.0f}{len(text):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Report rendering in threads versus the pre-warmed process pool.
+
+Renders ``--reports`` synthetic analyses (see bench_report.py) from
+``--concurrency`` threads, the way finished analysis jobs do:
+
+* inline: in the calling threads, as before reports/render_service.py;
+* pool N: through a ``RenderService`` with N worker processes, for N from 1
+  up to ``--max-workers`` (default: the number of cores).
+
+For each it reports reports per second and how late a 10 ms heartbeat
+thread in the same process woke up while rendering ran (p50 and max): the
+stall a Flask request thread or SSE stream sees while reports render.
+
+    python benchmarks/bench_render_pool.py [--reports 24] [--concurrency 8] [--max-workers N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_report import analysis  # noqa: E402
+from reports.render_service import RenderService, render_report, warm_up_worker  # noqa: E402
+
+HEARTBEAT = 0.01
+
+
+class Heartbeat:
+    """Measures how much later than asked a sleeping thread wakes up."""
+
+    def __init__(self):
+        self.lateness = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            time.sleep(HEARTBEAT)
+            self.lateness.append(time.perf_counter() - started - HEARTBEAT)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run(label, render, reports, concurrency):
+    report = analysis()
+    with Heartbeat() as heartbeat, ThreadPoolExecutor(concurrency) as threads:
+        started = time.perf_counter()
+        list(threads.map(lambda _: render(report), range(reports)))
+        elapsed = time.perf_counter() - started
+    lateness = heartbeat.lateness or [0]
+    print(f"{label:<10}{reports / elapsed:>12.2f}{statistics.median(lateness) * 1000:>14.1f}"
+          f"{max(lateness) * 1000:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    print(f"{os.cpu_count()} cores, {args.reports} reports from {args.concurrency} threads")
+    print(f"{'renderer':<10}{'reports/s':>12}{'stall p50 ms':>14}{'max ms':>12}")
+    warm_up_worker()
+    run("inline", render_report, args.reports, args.concurrency)
+
+    workers = 1
+    while workers <= args.max_workers:
+        service = RenderService(max_workers=workers, max_pending=args.concurrency, queue_timeout=600)
+        service.start()
+        run(f"pool {workers}", service.render, args.reports, args.concurrency)
+        service.shutdown()
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Throughput and peak memory of the PDF report, small and very large analyses.
+
+Builds reports for synthetic analyses with reports.create_policy_report:
+
+* small: the nine Goal 5 targets, a few biases and recommendations, and
+  short answers, about the size of a typical Gemini analysis;
+* large: every section ``--scale`` times longer, with answers of several
+  hundred words that split across pages, as a long bill can produce.
+
+For each size it reports the first report in the process (which also builds
+the cached styles, target paragraphs and letterhead), reports per second
+over ``--repeat`` further builds, pages and PDF size, and the peak memory
+traced by tracemalloc while one report is built.
+
+    python benchmarks/bench_report.py [--repeat 10] [--scale 5] [--words 300]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from plots.create_plots import create_plots  # noqa: E402
+from reports.create_policy_report import create_policy_report_pdf  # noqa: E402
+
+TARGETS = ["5.1", "5.2", "5.3", "5.4", "5.5", "5.6", "5.A", "5.B", "5.C"]
+WORDS = ("the bill requires employers to report wage data by gender and establishes a review board "
+         "with authority over remedies for unpaid care and access to services").split()
+
+
+def text(words, seed=0):
+    return " ".join(WORDS[(seed + i) % len(WORDS)] for i in range(words))
+
+
+def bias(words, i):
+    return {"description": text(words, i), "potential_impact": text(words, i + 1),
+            "recommendation": text(words, i + 2)}
+
+
+def analysis(scale=1, words=40):
+    return {
+        "policy_summary": {"title": "An Act Concerning Pay Equity", "focus_area": "Employment",
+                           "brief_overview": text(words)},
+        "sdg5_alignment": {
+            "overall_score": 62,
+            "breakdown": [{"target": f"{code} - {code}", "score": (i * 7) % 11, "analysis": text(words, i)}
+                          for i, code in enumerate(TARGETS * scale)],
+        },
+        "bias_analysis": {"explicit_biases": [bias(words, i) for i in range(2 * scale)],
+                          "implicit_biases": [bias(words, i) for i in range(2 * scale)]},
+        "cost_effectiveness_analysis": {"overall_rating": "Medium", "explanation": text(words),
+                                        "key_factors": [text(8, i) for i in range(3 * scale)]},
+        "improvement_recommendations": [
+            {"area": f"Area {i + 1}", "current_state": text(words, i), "proposed_change": text(words, i + 1),
+             "expected_impact": text(words, i + 2), "implementation_challenges": text(words, i + 3),
+             "priority_level": "High"}
+            for i in range(3 * scale)
+        ],
+        "overall_assessment": {key: [text(12, i) for i in range(2 * scale)]
+                               for key in ("strengths", "weaknesses", "opportunities", "threats")},
+        "conclusion": {"summary": text(words), "key_takeaways": [text(12, i) for i in range(3 * scale)],
+                       "final_recommendation": text(words)},
+    }
+
+
+def build(report):
+    return create_policy_report_pdf(report, create_plots(report))
+
+
+def pages(pdf):
+    return pdf.count(b"/Type /Page\n") or pdf.count(b"/Type /Page ")
+
+
+def measure(label, report, repeat):
+    started = time.perf_counter()
+    pdf = build(report)
+    first = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        build(report)
+    per_report = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    build(report)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(f"{label:<8}{first * 1000:>10.0f}{per_report * 1000:>10.0f}{1 / per_report:>10.2f}"
+          f"{pages(pdf):>8}{len(pdf) / 1024:>10.0f}{peak / 2 ** 20:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--scale", type=int, default=5, help="how many times longer each section of the large analysis is")
+    parser.add_argument("--words", type=int, default=300, help="words per answer in the large analysis")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    print(f"{'size':<8}{'first ms':>10}{'ms':>10}{'reports/s':>10}{'pages':>8}{'KiB':>10}{'peak MiB':>10}")
+    measure("small", analysis(), args.repeat)
+    measure("large", analysis(args.scale, args.words), max(1, args.repeat // 5))
+
+
+if __name__ == "__main__":
+    main()
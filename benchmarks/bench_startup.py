@@ -0,0 +1,95 @@
+"""Cold-start import time of the web app, per module, against a budget.
+
+Imports ``app`` in ``--runs`` fresh interpreters with ``-X importtime`` and
+reports the fastest run: total time and the modules ``app`` imports
+directly, by cumulative time. Also shows what importing the lazily loaded
+heavy libraries costs (``utilities.preload``), i.e. what the first
+request that needs them, or a preloading gunicorn master, pays.
+
+Exits non-zero if the import takes longer than ``--budget-ms`` or pulls in
+any of the heavy libraries that routes are meant to load on first use.
+
+    python benchmarks/bench_startup.py [--runs 5] [--budget-ms 1000] [--top 15]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Packages that must not be imported by ``import app``
+HEAVY = ("pandas", "matplotlib", "seaborn", "reportlab", "xhtml2pdf", "PyPDF2", "docx",
+         "google.generativeai", "openai", "huggingface_hub", "pymupdf", "pypdfium2")
+
+
+def environment():
+    env = dict(os.environ)
+    env.setdefault("LEGISCAN_KEY", "benchmark")
+    env.setdefault("GENAI_API_KEY", "benchmark")
+    env["LLM_WARM_UP"] = "0"
+    env["RENDER_WARM_UP"] = "0"
+    env["STATISTICS_WARM_UP"] = "0"
+    return env
+
+
+def import_times(module):
+    """``{name: (self_us, cumulative_us, depth)}`` for one cold import of ``module``."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, env=environment(), capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        times[name.strip()] = (int(own), int(cumulative), depth)
+    return times
+
+
+def preload_times():
+    code = "import json; from utilities.preload import preload; print(json.dumps(preload(freeze=False)))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=environment(),
+                            capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]) if result.returncode == 0 else {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1000)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [import_times("app") for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times["app"][1])
+    total_ms = best["app"][1] / 1000
+
+    direct = sorted(((name, cumulative) for name, (_, cumulative, depth) in best.items() if depth == 1),
+                    key=lambda item: item[1], reverse=True)
+    print(f"import app: {total_ms:.0f} ms (best of {args.runs}; budget {args.budget_ms:.0f} ms)")
+    print(f"{'module':<40}{'ms':>9}")
+    for name, cumulative in direct[:args.top]:
+        print(f"{name:<40}{cumulative / 1000:>9.1f}")
+
+    heavy = sorted(name for name in best if name in HEAVY)
+    print("\nloaded on first use (utilities.preload):")
+    for name, seconds in preload_times().items():
+        print(f"{name:<40}{seconds * 1000:>9.1f}")
+
+    failed = False
+    if total_ms > args.budget_ms:
+        print(f"\nFAIL: import app took {total_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if heavy:
+        print(f"\nFAIL: import app loads {', '.join(heavy)}; import these where they are used")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
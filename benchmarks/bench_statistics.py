@@ -0,0 +1,129 @@
+"""The /statistics figures: recomputed per view versus precomputed.
+
+Writes a synthetic incident file with ``--rows`` rows (by default two
+million, kept in the temp directory between runs) with the columns of
+data/2024_cleaned.csv and a few the page does not use, then compares:
+
+* per view: the previous route body, pd.read_csv of the whole file, the
+  female-victim filter and seven value_counts and means;
+* cold: data.incident_stats reading only the used columns as categoricals
+  and computing every figure from their codes, as at startup or after the
+  file changes;
+* warm: ``IncidentStatistics.get`` once computed, i.e. a page view.
+
+Reports time and tracemalloc peak for each and checks that both produce
+the same figures.
+
+    python benchmarks/bench_statistics.py [--rows 2000000] [--views 1000]
+"""
+import argparse
+import math
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from data.incident_stats import IncidentStatistics, compute_statistics, load_columns, _csv_engine  # noqa: E402
+
+VALUES = {
+    "Type": ["Assault", "Aggravated Assault", "Robbery", "Homicide", "Sexual Assault", "Stalking", "Kidnapping"],
+    "Victim Sex": ["Female", "Male", "Unknown"],
+    "Offender Sex": ["Male", "Female", "Unknown"],
+    "Offender Relationship": ["Intimate Partner", "Other Relative", "Acquaintance", "Stranger", "Unknown"],
+    "Weapon Type": ["None", "Handgun", "Knife", "Blunt Object", "Personal Weapons", "Other"],
+    "Injury Type": ["No injury", "Minor injury", "Serious injury", "Fatal"],
+    "Location": ["Residence", "Street", "Parking Lot", "School", "Workplace", "Park", "Other"],
+}
+
+
+def write_incidents(path, rows, seed=2024):
+    rng = np.random.default_rng(seed)
+    columns = {"Incident ID": np.arange(rows), "Date": "2024-01-01", "Victim Age": rng.integers(12, 90, rows)}
+    for name, values in VALUES.items():
+        weights = rng.random(len(values)) + 0.2
+        column = rng.choice(np.array(values, dtype=object), rows, p=weights / weights.sum())
+        # A few missing values, as in the real export
+        column[rng.random(rows) < 0.01] = None
+        columns[name] = column
+    pd.DataFrame(columns).to_csv(path, index=False)
+
+
+def legacy_statistics(path):
+    """The previous /statistics route body, minus render_template."""
+    with open(path) as f:
+        data = pd.read_csv(f)
+    women_victims = data[data['Victim Sex'] == 'Female']
+    return {
+        'total_incidents': len(women_victims),
+        'women_victims_percentage': (len(women_victims) / len(data)) * 100,
+        'crime_types': women_victims['Type'].value_counts().to_dict(),
+        'offender_relationships': women_victims['Offender Relationship'].value_counts().to_dict(),
+        'weapons_used': women_victims['Weapon Type'].value_counts().to_dict(),
+        'injury_types': women_victims['Injury Type'].value_counts().to_dict(),
+        'incidents_by_location': women_victims['Location'].value_counts().to_dict(),
+        'offender_sex_dist': (women_victims['Offender Sex'].value_counts(normalize=True) * 100).to_dict(),
+        'injury_percentage': (women_victims['Injury Type'] != 'No injury').mean() * 100,
+        'domestic_violence_percentage':
+            women_victims['Offender Relationship'].isin(['Intimate Partner', 'Other Relative']).mean() * 100,
+    }
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def same(a, b):
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same(a[key], b[key]) for key in a)
+    if isinstance(a, float) or isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9)
+    return a == b
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--views", type=int, default=1000)
+    args = parser.parse_args()
+
+    path = Path(tempfile.gettempdir()) / f"incidents-{args.rows}.csv"
+    if not path.exists():
+        started = time.perf_counter()
+        write_incidents(path, args.rows)
+        print(f"wrote {path} in {time.perf_counter() - started:.1f}s")
+    print(f"{args.rows:,} rows, {path.stat().st_size / 2 ** 20:.0f} MiB; csv engine {_csv_engine()}")
+
+    legacy, legacy_seconds, legacy_peak = measure(lambda: legacy_statistics(path))
+    stats, cold_seconds, cold_peak = measure(lambda: compute_statistics(load_columns(path)))
+
+    statistics = IncidentStatistics(path)
+    statistics.get()
+    started = time.perf_counter()
+    for _ in range(args.views):
+        statistics.get()
+    warm_seconds = (time.perf_counter() - started) / args.views
+
+    print(f"{'':<10}{'ms':>12}{'peak MiB':>10}")
+    print(f"{'per view':<10}{legacy_seconds * 1000:>12.0f}{legacy_peak / 2 ** 20:>10.0f}")
+    print(f"{'cold':<10}{cold_seconds * 1000:>12.0f}{cold_peak / 2 ** 20:>10.0f}")
+    print(f"{'warm':<10}{warm_seconds * 1000:>12.4f}{'':>10}")
+    if not same(legacy, stats):
+        sys.exit("FAIL: the precomputed statistics differ from the per-view computation")
+    print("figures match")
+
+
+if __name__ == "__main__":
+    main()
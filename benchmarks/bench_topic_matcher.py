@@ -0,0 +1,79 @@
+"""Throughput of utilities.topic_matcher on the three topic queries.
+
+Classifies synthetic bill titles and full bill texts with the shared
+Aho-Corasick matcher and, for comparison, with a straightforward evaluator
+that runs one compiled regular expression per query term. Both must agree
+on every document; throughput is reported in documents per second.
+
+    python benchmarks/bench_topic_matcher.py [--docs 2000]
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utilities.topic_matcher import TOPIC_QUERIES, TopicMatcher, _evaluate  # noqa: E402
+
+VOCABULARY = (
+    "the state shall provide funding for services to residents under this act including "
+    "women female health care medical maternal prenatal pregnancy equal pay wage employment "
+    "discrimination domestic violence shelter stalking protection safety security highway school "
+    "tax agriculture water county board commission report annual department"
+).split()
+
+
+def make_document(rng, words):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words)) + "."
+
+
+class RegexMatcher:
+    """One regular expression per term, evaluated over the same expression trees."""
+
+    def __init__(self, matcher):
+        self.queries = matcher.queries
+        self.patterns = {
+            term_id: re.compile(r"\b" + r"\W+".join(map(re.escape, words)) + r"\b", re.IGNORECASE)
+            for words, term_id in matcher.terms.items()
+        }
+
+    def classify(self, text):
+        found = {term_id for term_id, pattern in self.patterns.items() if pattern.search(text)}
+        return [name for name, node in self.queries.items() if _evaluate(node, found)]
+
+
+def throughput(fn, documents):
+    start = time.perf_counter()
+    results = [fn(doc) for doc in documents]
+    return len(documents) / (time.perf_counter() - start), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=2000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    matcher = TopicMatcher(TOPIC_QUERIES)
+    print(f"compiled {len(matcher.queries)} queries, {len(matcher.terms)} terms "
+          f"in {(time.perf_counter() - start) * 1e3:.1f} ms")
+    baseline = RegexMatcher(matcher)
+
+    rng = random.Random(0)
+    corpora = {
+        "titles (15 words)": [make_document(rng, 15) for _ in range(args.docs)],
+        "bills (3,000 words)": [make_document(rng, 3000) for _ in range(max(args.docs // 10, 1))],
+    }
+    print(f"{'corpus':<22}{'aho-corasick docs/s':>21}{'regex docs/s':>14}{'speedup':>9}  same")
+    for name, documents in corpora.items():
+        fast, fast_results = throughput(matcher.classify, documents)
+        slow, slow_results = throughput(baseline.classify, documents)
+        print(f"{name:<22}{fast:>21,.0f}{slow:>14,.0f}{fast / slow:>8.1f}x  {fast_results == slow_results}")
+
+
+if __name__ == "__main__":
+    main()
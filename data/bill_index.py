@@ -0,0 +1,272 @@
+"""Local SQLite/FTS5 index of LegiScan session datasets.
+
+LegiScan publishes every state session as a zip archive (``getDatasetList``
+/ ``getDataset``) holding one JSON file per bill under ``<state>/<session>/bill``
+and, for archives that include them, the bill documents under ``.../text``.
+``BillIndex.ingest_zip`` loads such an archive into SQLite: bill metadata in
+``bills`` and titles, descriptions and document text in the ``bills_fts``
+full-text index. Bills whose ``change_hash`` is unchanged are skipped, and
+whole archives are skipped when their ``dataset_hash`` is.
+
+    python -m data.bill_index --zip TX_2025.zip        # local archives
+    python -m data.bill_index --state TX               # download from LegiScan
+"""
+import argparse
+import base64
+import datetime
+import html
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = os.environ.get("BILL_INDEX_PATH", "data/legiscan.db")
+SEARCH_LIMIT = int(os.environ.get("BILL_INDEX_SEARCH_LIMIT", 200))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    session_id INTEGER PRIMARY KEY,
+    state TEXT NOT NULL,
+    session_name TEXT,
+    year_start INTEGER,
+    year_end INTEGER,
+    dataset_hash TEXT,
+    ingested_at REAL
+);
+CREATE TABLE IF NOT EXISTS bills (
+    bill_id INTEGER PRIMARY KEY,
+    session_id INTEGER,
+    state TEXT NOT NULL,
+    bill_number TEXT,
+    title TEXT,
+    description TEXT,
+    status INTEGER,
+    status_date TEXT,
+    url TEXT,
+    year_start INTEGER,
+    year_end INTEGER,
+    change_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS bills_state_year ON bills (state, year_end);
+CREATE VIRTUAL TABLE IF NOT EXISTS bills_fts USING fts5(
+    title, description, text, tokenize = 'porter unicode61'
+);
+"""
+
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\()|(\))|([^\s()"]+)')
+_OPERATORS = {"AND", "OR", "NOT"}
+_TAG = re.compile(r"<[^>]+>")
+
+
+def to_fts_query(expression):
+    """Translate a LegiScan-style boolean search into an FTS5 MATCH expression.
+
+    ``AND``/``OR``/``NOT``, parentheses and ``"quoted phrases"`` carry over
+    unchanged. Every other word is quoted so punctuation such as ``women's``
+    or ``self-defense`` cannot be read as FTS5 syntax, and adjacent words are
+    implicitly ANDed as they are by LegiScan.
+    """
+    expression = expression.strip()
+    if len(expression) > 1 and expression[0] == expression[-1] == "'":
+        expression = expression[1:-1]
+    parts = []
+    for phrase, open_paren, close_paren, word in _QUERY_TOKEN.findall(expression):
+        if open_paren or close_paren:
+            parts.append(open_paren or close_paren)
+        elif word in _OPERATORS:
+            parts.append(word)
+        else:
+            text = phrase if phrase else word.strip("'")
+            if text.strip():
+                parts.append('"' + text.replace('"', '""') + '"')
+    return " ".join(parts)
+
+
+def document_text(content, mime=""):
+    """Plain text of a LegiScan bill document (PDF, HTML or plain text)."""
+    if not content:
+        return ""
+    if mime == "application/pdf" or content.startswith(b"%PDF-"):
+        from process_input import extract_pdf_text
+        return extract_pdf_text(content, parallel=False)
+    decoded = content.decode("utf-8", "ignore")
+    if "html" in mime:
+        decoded = html.unescape(_TAG.sub(" ", decoded))
+    return " ".join(decoded.split())
+
+
+def _archive_text(text):
+    """Plain text of one ``text/*.json`` document from a dataset archive."""
+    try:
+        return document_text(base64.b64decode(text.get("doc") or ""), text.get("mime") or "")
+    except Exception as e:
+        logger.warning(f"Could not extract text of doc {text.get('doc_id')}: {e}")
+        return ""
+
+
+def _clean(value):
+    return html.unescape(value.encode("utf-8", "ignore").decode("utf-8")) if value else ""
+
+
+class BillIndex:
+    """SQLite database of bills from LegiScan datasets with a full-text index.
+
+    One connection is kept per thread. Writes are serialized by SQLite, and
+    WAL mode lets searches run while an ingestion is in progress.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def has_state(self, state):
+        row = self._connect().execute("SELECT 1 FROM datasets WHERE state = ? LIMIT 1", (state,)).fetchone()
+        return row is not None
+
+    def dataset_hash(self, session_id):
+        row = self._connect().execute(
+            "SELECT dataset_hash FROM datasets WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else None
+
+    def ingest_zip(self, source, dataset_hash=None):
+        """Load one dataset archive (path, bytes or file object).
+
+        Returns a dict with the number of bills added, updated and skipped.
+        """
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        counts = {"added": 0, "updated": 0, "unchanged": 0}
+        with zipfile.ZipFile(source) as archive:
+            names = archive.namelist()
+            # Documents are stored as text/<doc_id>.json and listed in each
+            # bill's "texts", so they are only read for bills that changed.
+            documents = {os.path.basename(name)[:-5]: name for name in names
+                         if "/text/" in name and name.endswith(".json")}
+
+            conn = self._connect()
+            sessions = {}
+            with conn:
+                for name in names:
+                    if "/bill/" not in name or not name.endswith(".json"):
+                        continue
+                    bill = json.loads(archive.read(name)).get("bill", {})
+                    if not bill.get("bill_id"):
+                        continue
+                    session = bill.get("session") or {}
+                    if session.get("session_id"):
+                        sessions[session["session_id"]] = (bill.get("state"), session)
+                    text_names = [documents[str(t.get("doc_id"))] for t in bill.get("texts") or []
+                                  if str(t.get("doc_id")) in documents]
+                    outcome = self._upsert_bill(conn, bill, session, archive, text_names)
+                    counts[outcome] += 1
+
+                for session_id, (state, session) in sessions.items():
+                    conn.execute(
+                        "INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (session_id, state, session.get("session_name"), session.get("year_start"),
+                         session.get("year_end"), dataset_hash, time.time()))
+        logger.info(f"Ingested dataset: {counts}")
+        return counts
+
+    def _upsert_bill(self, conn, bill, session, archive, text_names):
+        bill_id = int(bill["bill_id"])
+        row = conn.execute("SELECT change_hash FROM bills WHERE bill_id = ?", (bill_id,)).fetchone()
+        if row is not None and row[0] == bill.get("change_hash"):
+            return "unchanged"
+
+        title = _clean(bill.get("title"))
+        description = _clean(bill.get("description"))
+        text = " ".join(_archive_text(json.loads(archive.read(name)).get("text", {})) for name in text_names)
+        conn.execute(
+            "INSERT OR REPLACE INTO bills VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (bill_id, session.get("session_id"), bill.get("state"), bill.get("bill_number"), title,
+             description, bill.get("status"), bill.get("status_date"), bill.get("url"),
+             session.get("year_start"), session.get("year_end"), bill.get("change_hash")))
+        conn.execute("DELETE FROM bills_fts WHERE rowid = ?", (bill_id,))
+        conn.execute("INSERT INTO bills_fts (rowid, title, description, text) VALUES (?, ?, ?, ?)",
+                     (bill_id, title, description, text))
+        return "added" if row is None else "updated"
+
+    def search(self, expression, state=None, year=None, limit=SEARCH_LIMIT):
+        """Bills matching a boolean ``expression``, best matches first.
+
+        ``year`` keeps bills from sessions running in or after that year,
+        mirroring LegiScan's current-year search.
+        """
+        sql = ("SELECT b.bill_id, b.title FROM bills_fts JOIN bills b ON b.bill_id = bills_fts.rowid "
+               "WHERE bills_fts MATCH ?")
+        params = [to_fts_query(expression)]
+        if state:
+            sql += " AND b.state = ?"
+            params.append(state)
+        if year:
+            sql += " AND b.year_end >= ?"
+            params.append(year)
+        sql += " ORDER BY bm25(bills_fts) LIMIT ?"
+        params.append(limit)
+        return [{"bill_id": bill_id, "title": title}
+                for bill_id, title in self._connect().execute(sql, params)]
+
+    def stats(self):
+        conn = self._connect()
+        return {
+            "datasets": conn.execute("SELECT COUNT(*) FROM datasets").fetchone()[0],
+            "bills": conn.execute("SELECT COUNT(*) FROM bills").fetchone()[0],
+        }
+
+
+def sync_state(index, client, state):
+    """Download and ingest every changed dataset LegiScan lists for ``state``."""
+    datasets = client.call("getDatasetList", state=state).get("datasetlist", [])
+    for dataset in datasets:
+        session_id = dataset["session_id"]
+        if index.dataset_hash(session_id) == dataset.get("dataset_hash"):
+            logger.info(f"Dataset {session_id} ({dataset.get('session_name')}) is unchanged")
+            continue
+        archive = client.call("getDataset", id=session_id, access_key=dataset["access_key"])
+        index.ingest_zip(base64.b64decode(archive["dataset"]["zip"]), dataset.get("dataset_hash"))
+
+
+def current_year():
+    return datetime.date.today().year
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load LegiScan datasets into the local bill index.")
+    parser.add_argument("--db", default=INDEX_PATH)
+    parser.add_argument("--zip", nargs="*", default=[], help="dataset archives to ingest")
+    parser.add_argument("--state", nargs="*", default=[], help="states to download from LegiScan")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    index = BillIndex(args.db)
+    for path in args.zip:
+        index.ingest_zip(path)
+    if args.state:
+        from data.data_retrieval import client
+        for state in args.state:
+            sync_state(index, client, state)
+    print(json.dumps(index.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows, where the app runs in a single process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = os.environ.get("BILL_STORE_DIR", "cache/bills")
+MAX_BYTES = int(os.environ.get("BILL_STORE_MAX_BYTES", 512 * 1024 * 1024))
+# How long a bill's resolved document is trusted before its change_hash is
+# checked against LegiScan again.
+RECHECK_SECONDS = int(os.environ.get("BILL_STORE_RECHECK_SECONDS", 6 * 3600))
+
+EXTENSIONS = {"application/pdf": ".pdf", "text/html": ".html"}
+
+StoredText = namedtuple("StoredText", ["path", "etag", "mimetype", "size"])
+
+
+class BillTextStore:
+    """Persistent store of bill documents from LegiScan.
+
+    Documents are saved once under the SHA-256 of their bytes, which also
+    serves as their ETag. ``index.json`` maps each ``doc_id`` to its blob and
+    each ``bill_id`` to the document it resolved to together with the bill's
+    ``change_hash`` at that time. The total size of stored blobs is capped at
+    ``max_bytes``; least recently used documents are evicted first.
+
+    Several processes (gunicorn workers) may share one store. Changes are
+    made under an exclusive lock on ``index.lock``, after reloading
+    ``index.json`` if another process has replaced it, so no process
+    overwrites another's entries or evicts by a stale view of the blobs.
+    """
+
+    def __init__(self, root=STORE_DIR, max_bytes=MAX_BYTES, recheck=RECHECK_SECONDS):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.recheck = recheck
+        self._lock = threading.Lock()
+        self._docs = OrderedDict()
+        self._bills = {}
+        self._size = 0
+        self._index_version = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._refresh()
+
+    @property
+    def _index_path(self):
+        return self.root / "index.json"
+
+    def _refresh(self):
+        """Reload ``index.json`` if it changed since this process last read or wrote it."""
+        try:
+            stat = os.stat(self._index_path)
+            version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if version == self._index_version:
+                return
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable bill store index: {e}")
+            return
+        self._index_version = version
+        self.reloads += 1
+
+        # Keep what this process saw since: recency of use and bill validations
+        for doc_id, doc in index.get("docs", {}).items():
+            if doc_id in self._docs:
+                doc["used"] = max(doc.get("used", 0), self._docs[doc_id]["used"])
+        for bill_id, bill in index.get("bills", {}).items():
+            seen = self._bills.get(bill_id)
+            if seen is not None and seen["change_hash"] == bill["change_hash"]:
+                bill["checked"] = max(bill["checked"], seen["checked"])
+
+        # Entries whose blob has gone are dropped, and saved, when next read
+        docs = sorted(index.get("docs", {}).items(), key=lambda item: item[1].get("used", 0))
+        self._docs = OrderedDict(docs)
+        self._size = sum(doc["size"] for doc in self._unique_blobs().values())
+        self._bills = index.get("bills", {})
+
+    @contextmanager
+    def _updating(self):
+        """Hold the store against other threads and processes, with the index up to date."""
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / "index.lock", "a") as lock_file:
+                if fcntl is not None:
+                    # Released when the file is closed
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._refresh()
+                yield
+
+    def _unique_blobs(self):
+        return {doc["blob"]: doc for doc in self._docs.values()}
+
+    def _save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._index_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"docs": self._docs, "bills": self._bills}, f)
+        os.replace(tmp_path, self._index_path)
+        stat = os.stat(self._index_path)
+        self._index_version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _stored(self, doc):
+        return StoredText(str(self.root / doc["blob"]), doc["blob"].split(".")[0], doc["mimetype"], doc["size"])
+
+    def resolve(self, bill_id, change_hash=None):
+        """Document stored for ``bill_id``, or None.
+
+        Without ``change_hash`` the entry is only trusted if it was validated
+        within the last ``recheck`` seconds. With it, the entry is valid if
+        it was recorded for that version of the bill, and is marked as
+        validated again for every process sharing the store.
+        """
+        bill_id = str(bill_id)
+        with self._lock:
+            self._refresh()
+            bill = self._bills.get(bill_id)
+            if bill is None or change_hash not in (None, bill["change_hash"]):
+                return None
+            if change_hash is None and time.time() - bill["checked"] > self.recheck:
+                return None
+            doc_id = bill["doc_id"]
+        if change_hash is not None:
+            with self._updating():
+                bill = self._bills.get(bill_id)
+                if bill is None or bill["change_hash"] != change_hash:
+                    return None
+                bill["checked"] = time.time()
+                doc_id = bill["doc_id"]
+                self._save_quietly()
+        return self.get(doc_id)
+
+    def get(self, doc_id):
+        """Stored document for ``doc_id``, or None."""
+        doc_id = str(doc_id)
+        with self._lock:
+            self._refresh()
+            doc = self._docs.get(doc_id)
+            if doc is not None and (self.root / doc["blob"]).exists():
+                # Recency stays in memory; _refresh merges it into the index
+                # that the next change saves
+                doc["used"] = time.time()
+                self._docs.move_to_end(doc_id)
+                self.hits += 1
+                return self._stored(doc)
+            self.misses += 1
+            if doc is None:
+                return None
+        # The blob was deleted (by hand, or evicted by a process whose index
+        # this one has not seen yet): drop the entry for every process
+        with self._updating():
+            doc = self._docs.get(doc_id)
+            if doc is not None and not (self.root / doc["blob"]).exists():
+                self._forget(doc_id)
+                self._save_quietly()
+        return None
+
+    def record_bill(self, bill_id, doc_id, change_hash):
+        """Remember that ``bill_id`` at ``change_hash`` resolves to ``doc_id``."""
+        with self._updating():
+            self._bills[str(bill_id)] = {"doc_id": str(doc_id), "change_hash": change_hash, "checked": time.time()}
+            self._save_quietly()
+
+    def put(self, doc_id, content, mimetype="application/pdf", change_hash=None):
+        """Store ``content`` for ``doc_id`` and return it as a ``StoredText``."""
+        digest = hashlib.sha256(content).hexdigest()
+        blob = digest + EXTENSIONS.get(mimetype, ".bin")
+        path = self.root / blob
+        self.root.mkdir(parents=True, exist_ok=True)
+        if not path.exists():
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+        with self._updating():
+            new_blob = blob not in self._unique_blobs()
+            previous = self._docs.pop(str(doc_id), None)
+            doc = {"blob": blob, "size": len(content), "mimetype": mimetype,
+                   "change_hash": change_hash, "used": time.time()}
+            self._docs[str(doc_id)] = doc
+            if new_blob:
+                self._size += len(content)
+            if previous is not None and previous["blob"] != blob:
+                self._release(previous)
+            self._evict(keep=str(doc_id))
+            self._save_quietly()
+            return self._stored(doc)
+
+    # _release, _forget and _evict change the index and blobs: callers hold _updating()
+
+    def _release(self, doc):
+        """Delete ``doc``'s blob unless another document still shares it."""
+        if doc["blob"] in self._unique_blobs():
+            return
+        self._size -= doc["size"]
+        (self.root / doc["blob"]).unlink(missing_ok=True)
+
+    def _forget(self, doc_id):
+        doc = self._docs.pop(doc_id, None)
+        if doc is not None:
+            self._release(doc)
+
+    def _evict(self, keep):
+        while self._size > self.max_bytes and len(self._docs) > 1:
+            doc_id = next(iter(self._docs))
+            if doc_id == keep:
+                break
+            logger.info(f"Evicting bill text {doc_id} from the store")
+            self._forget(doc_id)
+
+    def _save_quietly(self):
+        try:
+            self._save()
+        except OSError as e:
+            logger.warning(f"Could not persist bill store index: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "documents": len(self._docs),
+                "bills": len(self._bills),
+                "bytes": self._size,
+                "index_reloads": self.reloads,
+            }
+
+
+bill_store = BillTextStore()
@@ -1,108 +1,107 @@
-import requests
-import json
+import logging
 import os
 from dotenv import load_dotenv
 from pathlib import Path
-from urllib.parse import quote_plus
 import base64
-import tempfile
 import html
 
+from data.bill_index import BillIndex, current_year
+from data.bill_store import bill_store
+from data.legiscan import LegiScanClient, LegiScanError
+from utilities.topic_matcher import TOPIC_QUERIES
+
+logger = logging.getLogger(__name__)
+
 # Load environment variables from .env file 
 env_path = Path('.') / '.env'
 load_dotenv(dotenv_path=env_path)
 
-base_url = "https://api.legiscan.com/"
-
 api_key = os.getenv("LEGISCAN_KEY")
 if not api_key:
-    print("API key not found. Please check your .env file.")
-    exit()
+    logger.error("API key not found. Please check your .env file.")
+
+client = LegiScanClient(api_key)
+bill_index = BillIndex()
+
+# The search form's label for federal bills; LegiScan datasets use "US".
+INDEX_STATES = {"US/Federal": "US"}
 
 def get_bills(topic, state):
-    query = quote_plus(topic)
+    """Bills for ``topic`` in ``state`` this year.
 
-    payload = {
-        "key": api_key,
-        "op": "getSearch",
-        "state": state,
-        "query": query,
-        "year": 2
-    }
+    States whose LegiScan datasets have been ingested (see
+    ``data.bill_index``) are answered from the local full-text index,
+    without a result cap of one page; other states fall back to a live
+    ``getSearch``. Both search with the topic's boolean query, so a state
+    yields the same matches whether or not it has been ingested.
+    """
+    query = TOPIC_QUERIES.get(topic, topic)
+    index_state = INDEX_STATES.get(state, state)
+    if bill_index.has_state(index_state):
+        return bill_index.search(query, index_state, year=current_year())
 
     try:
-        response = requests.get(base_url, params=payload)
-        response.raise_for_status()  # Raises a HTTPError if the status is 4xx, 5xx
-    except requests.exceptions.RequestException as e:
-        print(f"Request failed: {e}")
+        data = client.search(query, state)
+    except LegiScanError as e:
+        logger.error(f"Request failed: {e}")
         return []
 
-    if response.status_code == 200:
-        try:
-            data = response.json()
-            search_result = data.get('searchresult', {})
-            bills = [search_result[key] for key in search_result if key.isdigit()]
-            cleaned_bills = []
-            for bill in bills:
-                title = bill.get('title', '')
-                # Clean up the title to remove non-UTF-8 characters and decode HTML entities
-                cleaned_title = html.unescape(title.encode('utf-8', 'ignore').decode('utf-8'))
-                cleaned_bills.append({"bill_id": bill.get('bill_id'), "title": cleaned_title})
-            return cleaned_bills
-        except json.JSONDecodeError:
-            print("Failed to parse JSON response")
-            return []
-    else:
-        print(f"Failed to fetch the search results. Status code: {response.status_code}")
-        return []
+    search_result = data.get('searchresult', {})
+    bills = [search_result[key] for key in search_result if key.isdigit()]
+    cleaned_bills = []
+    for bill in bills:
+        title = bill.get('title', '')
+        # Clean up the title to remove non-UTF-8 characters and decode HTML entities
+        cleaned_title = html.unescape(title.encode('utf-8', 'ignore').decode('utf-8'))
+        cleaned_bills.append({"bill_id": bill.get('bill_id'), "title": cleaned_title})
+    return cleaned_bills
 
 def get_bill_pdf(bill_id):
+    """Return the bill's first text document as a ``StoredText``, or None.
+
+    Bills viewed recently are answered from the bill store without calling
+    LegiScan. Otherwise the bill's ``change_hash`` decides whether the stored
+    document is still current, and the text is only downloaded when the
+    store does not already hold its ``doc_id``.
+    """
+    stored = bill_store.resolve(bill_id)
+    if stored:
+        return stored
+
     # First, get the bill details
-    bill_payload = {
-        "key": api_key,
-        "op": "getBill",
-        "id": bill_id
-    }
-
-    bill_response = requests.get(base_url, params=bill_payload)
-
-    if bill_response.status_code == 200:
-        bill_data = bill_response.json().get('bill', {})
-        print(bill_data)
-        # Now get the bill text
-        text_docs = bill_data.get('texts', [])
-        if text_docs:
-            doc_id = text_docs[0].get('doc_id')  # Get the first available text document
-            
-            if doc_id:
-                text_payload = {
-                    "key": api_key,
-                    "op": "getBillText",
-                    "id": doc_id
-                }
-
-                text_response = requests.get(base_url, params=text_payload)
-                
-                if text_response.status_code == 200:
-                    text_data = text_response.json().get('text', {})
-                    bill_text_base64 = text_data.get('doc', '')  # This is the base64 encoded document
-                    
-                    # Decode the base64-encoded text
-                    bill_text_pdf = base64.b64decode(bill_text_base64)
-                    
-                    # Create a temporary file to save the PDF
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf:
-                        temp_pdf.write(bill_text_pdf)
-                        return temp_pdf.name
-                else:
-                    print(f"Failed to fetch bill text for doc_id: {doc_id}. Status code: {text_response.status_code}")
-                    return None
-            else:
-                print(f"Doc ID not found in texts for bill_id: {bill_id}")
-                return None
-        else:
-            print(f"No texts found for bill_id: {bill_id}")
+    try:
+        bill_data = client.get_bill(bill_id).get('bill', {})
+    except LegiScanError as e:
+        logger.error(f"Failed to fetch bill data for bill_id: {bill_id}: {e}")
+        return None
+
+    change_hash = bill_data.get('change_hash')
+    stored = bill_store.resolve(bill_id, change_hash)
+    if stored:
+        return stored
+
+    # Now get the bill text
+    text_docs = bill_data.get('texts', [])
+    if not text_docs:
+        logger.warning(f"No texts found for bill_id: {bill_id}")
+        return None
+
+    doc_id = text_docs[0].get('doc_id')  # Get the first available text document
+    if not doc_id:
+        logger.warning(f"Doc ID not found in texts for bill_id: {bill_id}")
+        return None
+
+    stored = bill_store.get(doc_id)
+    if stored is None:
+        try:
+            text_data = client.get_bill_text(doc_id).get('text', {})
+        except LegiScanError as e:
+            logger.error(f"Failed to fetch bill text for doc_id: {doc_id}: {e}")
             return None
-    else:
-        print(f"Failed to fetch bill data for bill_id: {bill_id}. Status code: {bill_response.status_code}")
-        return None
\ No newline at end of file
+
+        bill_text_base64 = text_data.get('doc', '')  # This is the base64 encoded document
+        stored = bill_store.put(doc_id, base64.b64decode(bill_text_base64),
+                                text_data.get('mime') or 'application/pdf', change_hash)
+
+    bill_store.record_bill(bill_id, doc_id, change_hash)
+    return stored
@@ -0,0 +1,149 @@
+"""Precomputed statistics on incidents with female victims for /statistics.
+
+The incident file is read once into categorical columns: only the seven
+columns the page uses, each stored as small integer codes plus its
+distinct values, instead of one Python string per cell. Every aggregate
+the page shows is computed from those codes with ``numpy.bincount``, in a
+single pass per column. After that only the aggregates are kept, so a page
+view is a dictionary lookup. The file's modification time and size are
+checked on each lookup, and the statistics are recomputed when either
+changes.
+
+The CSV is parsed with pyarrow's multi-threaded reader when pyarrow is
+installed, and with pandas' own parser otherwise.
+"""
+import importlib.util
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+INCIDENT_DATA_PATH = os.environ.get("INCIDENT_DATA_PATH", "data/2024_cleaned.csv")
+
+VICTIM_SEX = "Victim Sex"
+# Columns shown as value counts, by the key the statistics template uses
+COUNTED_COLUMNS = {
+    "crime_types": "Type",
+    "offender_relationships": "Offender Relationship",
+    "weapons_used": "Weapon Type",
+    "injury_types": "Injury Type",
+    "incidents_by_location": "Location",
+}
+OFFENDER_SEX = "Offender Sex"
+COLUMNS = [VICTIM_SEX, *COUNTED_COLUMNS.values(), OFFENDER_SEX]
+
+NO_INJURY = "No injury"
+DOMESTIC_RELATIONSHIPS = ("Intimate Partner", "Other Relative")
+
+
+def _csv_engine():
+    return "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+
+
+def load_columns(path):
+    """``{column: (codes, categories)}`` for the columns used, read from the CSV at ``path``."""
+    import pandas as pd
+
+    frame = pd.read_csv(path, usecols=COLUMNS, dtype="category", engine=_csv_engine())
+    return {name: (frame[name].cat.codes.to_numpy(), list(frame[name].cat.categories)) for name in COLUMNS}
+
+
+def _counts(codes, categories):
+    """Non-empty value counts, most frequent first, like ``Series.value_counts()``."""
+    import numpy as np
+
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+    order = np.argsort(-counts, kind="stable")
+    return {categories[i]: int(counts[i]) for i in order if counts[i]}
+
+
+def _code(categories, value):
+    try:
+        return categories.index(value)
+    except ValueError:
+        return None
+
+
+def compute_statistics(columns):
+    """The statistics page's figures from ``load_columns`` output."""
+    import numpy as np
+
+    sex_codes, sex_categories = columns[VICTIM_SEX]
+    female = _code(sex_categories, "Female")
+    women = sex_codes == female if female is not None else np.zeros(len(sex_codes), dtype=bool)
+    total = int(women.sum())
+
+    def share(mask):
+        return float(mask.mean() * 100) if len(mask) else float("nan")
+
+    stats = {
+        "total_incidents": total,
+        "women_victims_percentage": share(women),
+    }
+    for key, column in COUNTED_COLUMNS.items():
+        codes, categories = columns[column]
+        stats[key] = _counts(codes[women], categories)
+
+    codes, categories = columns[OFFENDER_SEX]
+    offender_sex = _counts(codes[women], categories)
+    known = sum(offender_sex.values())
+    stats["offender_sex_dist"] = {value: count / known * 100 for value, count in offender_sex.items()}
+
+    # Incidents with no recorded injury type count as injured, as with pandas' != comparison
+    codes, categories = columns[COUNTED_COLUMNS["injury_types"]]
+    stats["injury_percentage"] = share(codes[women] != _code(categories, NO_INJURY))
+
+    codes, categories = columns[COUNTED_COLUMNS["offender_relationships"]]
+    domestic = [code for code in (_code(categories, value) for value in DOMESTIC_RELATIONSHIPS) if code is not None]
+    stats["domestic_violence_percentage"] = share(np.isin(codes[women], domestic))
+    return stats
+
+
+class IncidentStatistics:
+    """The statistics of one incident file, recomputed when the file changes."""
+
+    def __init__(self, path=INCIDENT_DATA_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._cached = (None, None)  # (file version, statistics)
+        self.loads = 0
+        self.load_seconds = None
+
+    def _file_version(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self):
+        """The current statistics; raises ``OSError`` if the file cannot be read."""
+        version = self._file_version()
+        cached_version, stats = self._cached
+        if cached_version == version:
+            return stats
+        with self._lock:
+            cached_version, stats = self._cached
+            if cached_version != version:
+                started = time.perf_counter()
+                stats = compute_statistics(load_columns(self.path))
+                self._cached = (version, stats)
+                self.loads += 1
+                self.load_seconds = round(time.perf_counter() - started, 3)
+                logger.info(f"Computed statistics of {self.path} in {self.load_seconds}s")
+            return stats
+
+    def load_in_background(self):
+        """Compute the statistics ahead of the first page view."""
+        def run():
+            try:
+                self.get()
+            except Exception as e:
+                logger.warning(f"Could not compute statistics of {self.path}: {e}")
+
+        threading.Thread(target=run, name="incident-stats", daemon=True).start()
+
+    def stats(self):
+        return {"path": self.path, "loads": self.loads, "load_seconds": self.load_seconds}
+
+
+incident_statistics = IncidentStatistics()
@@ -0,0 +1,240 @@
+import copy
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utilities import metrics
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://api.legiscan.com/"
+
+TIMEOUT = (float(os.environ.get("LEGISCAN_CONNECT_TIMEOUT", 5)),
+           float(os.environ.get("LEGISCAN_READ_TIMEOUT", 30)))
+MAX_RETRIES = int(os.environ.get("LEGISCAN_MAX_RETRIES", 3))
+BACKOFF_BASE = float(os.environ.get("LEGISCAN_BACKOFF_SECONDS", 0.5))
+BACKOFF_MAX = 30.0
+POOL_SIZE = int(os.environ.get("LEGISCAN_POOL_SIZE", 10))
+
+# The public API key allows 30,000 queries a month. The bucket refills at
+# that average rate and absorbs bursts of up to LEGISCAN_BURST queries.
+MONTHLY_QUOTA = int(os.environ.get("LEGISCAN_MONTHLY_QUOTA", 30000))
+BURST = int(os.environ.get("LEGISCAN_BURST", 60))
+RATE_WAIT_SECONDS = float(os.environ.get("LEGISCAN_RATE_WAIT_SECONDS", 5))
+
+CACHE_ENTRIES = int(os.environ.get("LEGISCAN_CACHE_ENTRIES", 1024))
+# Seconds a response stays fresh, per operation. Operations not listed are
+# never cached; bill documents are large and are stored separately.
+CACHE_TTL = {
+    "getSearch": int(os.environ.get("LEGISCAN_SEARCH_TTL_SECONDS", 3600)),
+    "getBill": int(os.environ.get("LEGISCAN_BILL_TTL_SECONDS", 6 * 3600)),
+    "getMasterList": 3600,
+    "getDatasetList": 3600,
+    "getSessionList": 24 * 3600,
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LegiScanError(Exception):
+    """The LegiScan API could not be reached or returned an error."""
+
+
+class RateLimitExceeded(LegiScanError):
+    """No query quota is available within the allowed wait."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket holding up to ``capacity`` tokens, refilled at ``rate`` per second."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting up to ``timeout`` seconds. Returns False if none became available."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    @property
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class TTLCache:
+    """Small LRU of API responses whose entries expire after a per-entry TTL."""
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+class LegiScanClient:
+    """Client for the LegiScan Pull API.
+
+    All calls share one pooled ``requests.Session`` with connect/read
+    timeouts. Each HTTP attempt takes a token from a bucket sized to the
+    monthly query quota; transient failures (connection errors, timeouts,
+    429 and 5xx) are retried with exponential backoff and full jitter,
+    honouring ``Retry-After``. Responses to the operations in ``CACHE_TTL``
+    are cached by operation and parameters, so repeated searches and bill
+    lookups are answered locally while fresh.
+    """
+
+    def __init__(self, api_key, base_url=BASE_URL, timeout=TIMEOUT, max_retries=MAX_RETRIES,
+                 backoff=BACKOFF_BASE, rate_limiter=None, cache=None, cache_ttl=None,
+                 pool_size=POOL_SIZE, session=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.rate_limiter = rate_limiter or TokenBucket(MONTHLY_QUOTA / (30 * 24 * 3600), BURST)
+        self.cache = cache if cache is not None else TTLCache()
+        self.cache_ttl = CACHE_TTL if cache_ttl is None else cache_ttl
+        self.session = session or self._create_session(pool_size)
+        self.requests_sent = 0
+
+    @staticmethod
+    def _create_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @staticmethod
+    def cache_key(op, params):
+        return (op,) + tuple(sorted((k, str(v)) for k, v in params.items()))
+
+    def _sleep_before_retry(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(BACKOFF_MAX, self.backoff * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        time.sleep(delay)
+
+    def _send(self, op, params):
+        query = {"key": self.api_key, "op": op, **params}
+        for attempt in range(self.max_retries + 1):
+            if not self.rate_limiter.acquire(timeout=RATE_WAIT_SECONDS):
+                raise RateLimitExceeded(f"LegiScan query quota exhausted; {op} not sent")
+            last_attempt = attempt == self.max_retries
+            try:
+                self.requests_sent += 1
+                response = self.session.get(self.base_url, params=query, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_attempt:
+                    raise LegiScanError(f"{op} failed: {e}") from e
+                logger.warning(f"LegiScan {op} attempt {attempt + 1} failed: {e}")
+                self._sleep_before_retry(attempt)
+                continue
+
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                logger.warning(f"LegiScan {op} attempt {attempt + 1} returned {response.status_code}")
+                self._sleep_before_retry(attempt, response.headers.get("Retry-After"))
+                continue
+            try:
+                response.raise_for_status()
+                data = response.json()
+            except (requests.RequestException, ValueError) as e:
+                raise LegiScanError(f"{op} failed: {e}") from e
+            if data.get("status") != "OK":
+                message = (data.get("alert") or {}).get("message", "unknown error")
+                raise LegiScanError(f"{op} returned an error: {message}")
+            return data
+
+    def call(self, op, **params):
+        """Run one API operation and return the decoded JSON body.
+
+        Raises ``LegiScanError`` if the request fails after retries or the
+        API reports an error, and ``RateLimitExceeded`` if the quota bucket
+        stays empty for longer than ``RATE_WAIT_SECONDS``.
+        """
+        if not self.api_key:
+            raise LegiScanError("LEGISCAN_KEY is not set")
+        ttl = self.cache_ttl.get(op)
+        key = self.cache_key(op, params) if ttl else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        with metrics.EXTERNAL_SECONDS.time(service="legiscan", operation=op):
+            data = self._send(op, params)
+        if key is not None:
+            self.cache.set(key, data, ttl)
+        return data
+
+    def search(self, query, state, year=2):
+        return self.call("getSearch", state=state, query=query, year=year)
+
+    def get_bill(self, bill_id):
+        return self.call("getBill", id=bill_id)
+
+    def get_bill_text(self, doc_id):
+        return self.call("getBillText", id=doc_id)
+
+    def stats(self):
+        return {
+            "requests_sent": self.requests_sent,
+            "tokens_available": round(self.rate_limiter.available, 2),
+            "cache": self.cache.stats(),
+        }
@@ -0,0 +1,52 @@
+"""gunicorn settings: ``gunicorn app:app`` picks this file up automatically.
+
+Threaded workers, because analyses report progress over long-lived SSE
+connections. One worker by default: analysis jobs, their event streams and
+their reports live in the memory of the process that runs them
+(utilities/jobs.py), so with several workers ``/jobs/<id>`` and its
+streams and reports return 404 whenever a request reaches another worker.
+Scale with GUNICORN_THREADS instead; report rendering already runs in its
+own processes. Only raise GUNICORN_WORKERS behind a proxy that keeps each
+client on one worker.
+
+With GUNICORN_PRELOAD=1 the master imports the app and its heavy libraries
+once (utilities/preload.py) and the workers share them after forking; LLM
+clients and the report rendering processes (reports/render_service.py) are
+then started in each worker, never in the master, since connections, the
+LLM event loop thread and child processes do not survive a fork.
+"""
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 1))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 16))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+preload_app = os.environ.get("GUNICORN_PRELOAD") == "1"
+
+if preload_app:
+    # app.py must not warm up the LLM clients or start the rendering processes in the master
+    os.environ["LLM_WARM_UP"] = "0"
+    os.environ["RENDER_WARM_UP"] = "0"
+    os.environ["STATISTICS_WARM_UP"] = "0"
+
+
+def on_starting(server):
+    if preload_app:
+        from data.incident_stats import incident_statistics
+        from utilities.preload import preload
+
+        preload()
+        # Computed once here, the statistics are shared with every worker
+        try:
+            incident_statistics.get()
+        except OSError as e:
+            server.log.warning(f"Could not compute incident statistics: {e}")
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app import warm_up_llm, warm_up_renderer
+
+        warm_up_llm()
+        warm_up_renderer()
@@ -1,66 +1,121 @@
-import seaborn as sns
-import matplotlib.pyplot as plt
-import pandas as pd
-import io
-import base64
-
-def create_plots(policy_report):
-    sns.set_theme(style="whitegrid")
-
-    if 'sdg5_alignment' in policy_report and 'breakdown' in policy_report['sdg5_alignment']:
-        breakdown = policy_report['sdg5_alignment']['breakdown']
-        if breakdown:
-            breakdown_df = pd.DataFrame(breakdown)
-            
-            # Create a dictionary for short names
-            short_names = {
-                "5.1": "End discrimination",
-                "5.2": "Eliminate violence",
-                "5.3": "Eliminate harmful practices",
-                "5.4": "Value unpaid care",
-                "5.5": "Ensure participation",
-                "5.6": "Ensure health rights",
-                "5.A": "Equal economic rights",
-                "5.B": "Enhance technology use",
-                "5.C": "Strengthen policies"
-            }
-            
-            # Add short names to the dataframe
-            breakdown_df['short_target'] = breakdown_df['target'].apply(lambda x: short_names[x.split(' - ')[0]])
-            
-            # Sort the dataframe by score in descending order
-            breakdown_df = breakdown_df.sort_values('score', ascending=False)
-            
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            # Create the barplot using short names
-            barplot = sns.barplot(x="score", y="short_target", data=breakdown_df, ax=ax, 
-                                  palette="viridis")
-            
-            ax.set_title("Goal 5 Alignment", fontsize=16, fontweight='bold')
-            ax.set_xlabel("Score", fontsize=12)
-            ax.set_ylabel("Target", fontsize=12)
-            
-            # Increase font size of tick labels
-            ax.tick_params(axis='both', which='major', labelsize=10)
-            
-            # Add value annotations to the end of each bar
-            for p in barplot.patches:
-                ax.annotate(f'{p.get_width():.1f}', 
-                            (p.get_width(), p.get_y() + p.get_height() / 2),
-                            ha='left', va='center',
-                            xytext=(5, 0), textcoords='offset points',
-                            fontsize=10, fontweight='bold')
-            
-            # Adjust layout and save
-            plt.tight_layout()
-            fig = fig_to_base64(fig)
-            return fig
-
-def fig_to_base64(fig):
-    img = io.BytesIO()
-    fig.savefig(img, format='png', bbox_inches='tight', dpi=300)
-    img.seek(0)
-    new_fig = base64.b64encode(img.getvalue())
-    html = '<img src="data:image/png;base64,{}">'.format(new_fig.decode('utf-8'))
-    return html
\ No newline at end of file
+from reportlab.graphics.charts.barcharts import HorizontalBarChart
+from reportlab.graphics.shapes import Drawing, Group, String
+from reportlab.lib.colors import HexColor
+from reportlab.lib.units import inch
+
+# Create a dictionary for short names
+short_names = {
+    "5.1": "End discrimination",
+    "5.2": "Eliminate violence",
+    "5.3": "Eliminate harmful practices",
+    "5.4": "Value unpaid care",
+    "5.5": "Ensure participation",
+    "5.6": "Ensure health rights",
+    "5.A": "Equal economic rights",
+    "5.B": "Enhance technology use",
+    "5.C": "Strengthen policies"
+}
+
+# The viridis palette, dark to light, as seaborn draws it for nine bars
+VIRIDIS = ['#482374', '#404387', '#345e8d', '#29788e', '#20908c', '#22a784', '#44be70', '#79d151', '#bdde26']
+
+MAX_SCORE = 10
+CHART_WIDTH = 6.5 * inch
+
+
+def _score(item):
+    try:
+        return float(item.get('score', 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _palette(n):
+    if n == 1:
+        return [HexColor(VIRIDIS[0])]
+    return [HexColor(VIRIDIS[round(i * (len(VIRIDIS) - 1) / (n - 1))]) for i in range(n)]
+
+
+def create_plots(policy_report, width=CHART_WIDTH):
+    """The SDG 5 alignment bar chart as a vector reportlab ``Drawing``, or None without scores.
+
+    The drawing is a flowable, so the PDF report places it directly; it can
+    also be rendered to SVG with ``reportlab.graphics.renderSVG``.
+    """
+    alignment = policy_report.get('sdg5_alignment')
+    breakdown = alignment.get('breakdown') if isinstance(alignment, dict) else None
+    if not breakdown:
+        return None
+
+    rows = []
+    for item in breakdown:
+        target = str(item.get('target', ''))
+        code = target.split(' - ')[0]
+        rows.append((short_names.get(code, code), _score(item)))
+    # Highest score first; the chart draws categories bottom-up, hence the reversal
+    rows.sort(key=lambda row: row[1], reverse=True)
+    rows.reverse()
+
+    height = width * 0.6
+    drawing = Drawing(width, height)
+
+    chart = HorizontalBarChart()
+    chart.x = 150
+    chart.y = 40
+    chart.width = width - chart.x - 30
+    chart.height = height - chart.y - 40
+    chart.data = [[score for _, score in rows]]
+    chart.barWidth = 10
+    chart.groupSpacing = 4
+    chart.bars.strokeColor = None
+    for i, color in enumerate(reversed(_palette(len(rows)))):
+        chart.bars[(0, i)].fillColor = color
+
+    chart.categoryAxis.categoryNames = [name for name, _ in rows]
+    chart.categoryAxis.labels.fontName = 'Helvetica'
+    chart.categoryAxis.labels.fontSize = 10
+    chart.categoryAxis.labels.boxAnchor = 'e'
+    chart.categoryAxis.labels.dx = -6
+    chart.categoryAxis.visibleTicks = False
+    chart.categoryAxis.strokeColor = None
+
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.valueMax = max([MAX_SCORE] + [score for _, score in rows])
+    chart.valueAxis.valueStep = 2
+    chart.valueAxis.labels.fontName = 'Helvetica'
+    chart.valueAxis.labels.fontSize = 10
+    chart.valueAxis.strokeColor = None
+    chart.valueAxis.visibleTicks = False
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = HexColor('#DDDDDD')
+    chart.valueAxis.gridStrokeWidth = 0.5
+
+    # Value annotations at the end of each bar
+    chart.barLabelFormat = '%.1f'
+    chart.barLabels.boxAnchor = 'w'
+    chart.barLabels.dx = 5
+    chart.barLabels.fontName = 'Helvetica-Bold'
+    chart.barLabels.fontSize = 10
+    drawing.add(chart)
+
+    drawing.add(String(width / 2, height - 20, "Goal 5 Alignment", fontName='Helvetica-Bold', fontSize=16,
+                       textAnchor='middle'))
+    drawing.add(String(chart.x + chart.width / 2, 10, "Score", fontName='Helvetica', fontSize=12,
+                       textAnchor='middle'))
+    target_label = Group(String(0, 0, "Target", fontName='Helvetica', fontSize=12, textAnchor='middle'))
+    target_label.translate(14, chart.y + chart.height / 2)
+    target_label.rotate(90)
+    drawing.add(target_label)
+    return drawing
+
+
+def chart_svg(policy_report):
+    """The chart as an ``<svg>`` element to inline in HTML, or None without scores."""
+    from reportlab.graphics import renderSVG
+
+    drawing = create_plots(policy_report)
+    if drawing is None:
+        return None
+    svg = renderSVG.drawToString(drawing)
+    # Drop the XML declaration and doctype
+    return svg[svg.index('<svg'):]
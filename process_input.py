@@ -1,7 +1,41 @@
-from PyPDF2 import PdfReader
 from io import BytesIO
-from docx import Document
-import chardet
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import importlib.util
+import multiprocessing
+import os
+import tempfile
+import threading
+
+# Documents with at least this many pages are extracted in a process pool.
+PARALLEL_PAGE_THRESHOLD = int(os.environ.get("PDF_PARALLEL_PAGE_THRESHOLD", 64))
+PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", 16))
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", os.cpu_count() or 1))
+
+# Optional extraction budget applied to uploaded documents; unset means no limit.
+PDF_MAX_PAGES = int(os.environ["PDF_MAX_PAGES"]) if os.environ.get("PDF_MAX_PAGES") else None
+PDF_MAX_CHARS = int(os.environ["PDF_MAX_CHARS"]) if os.environ.get("PDF_MAX_CHARS") else None
+
+# Preferred first; PyPDF2 is always installed and is the last resort.
+PDF_BACKEND_ORDER = ("pymupdf", "pypdfium2", "pypdf2")
+_BACKEND_MODULES = {"pymupdf": "pymupdf", "pypdfium2": "pypdfium2", "pypdf2": "PyPDF2"}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+ExtractedText = namedtuple("ExtractedText", ["text", "page_count", "backend"])
+
+# python-docx, chardet and the PDF libraries are imported on first use, so
+# importing this module (and the web app) does not pay for them.
+
+def _detect_encoding(data):
+    import chardet
+    return chardet.detect(data)['encoding'] or 'utf-8'
+
+def _docx_text(source):
+    from docx import Document
+    doc = Document(source)
+    return "\n".join([para.text for para in doc.paragraphs])
 
 def process_input(input_data):
     """
@@ -23,48 +57,223 @@ def process_input(input_data):
         # Handle uploaded file content
         try:
             # Attempt to detect the encoding
-            detected = chardet.detect(input_data)
-            encoding = detected['encoding'] or 'utf-8'
-            return input_data.decode(encoding)
+            return input_data.decode(_detect_encoding(input_data))
         except UnicodeDecodeError:
             # If decoding fails, treat it as binary data
             return handle_binary_data(input_data)
     else:
         return "Unsupported input type"
 
+def extract_file(source, filename=None):
+    """
+    Extract the text of an uploaded file together with its page count (None
+    for non-PDF files) and the backend that read it. ``source`` is a path or
+    a binary file object such as an upload spool, in which case ``filename``
+    decides the format. Raises ValueError when the file cannot be read.
+    """
+    filename = filename or source
+    if filename.endswith('.pdf'):
+        backend = default_pdf_backend()
+        try:
+            pages = list(iter_pdf_pages(source, backend, PDF_MAX_PAGES, PDF_MAX_CHARS))
+        except Exception as e:
+            raise ValueError(f"Error loading PDF: {str(e)}")
+        return ExtractedText(" ".join(pages), len(pages), backend)
+
+    if filename.endswith(('.docx', '.doc')):
+        try:
+            text = _docx_text(source)
+        except Exception as e:
+            raise ValueError(f"Error loading DOCX: {str(e)}")
+        return ExtractedText(text, None, "python-docx")
+
+    if filename.endswith('.txt'):
+        if isinstance(source, str):
+            text = route_txt(source)
+            if isinstance(text, dict):
+                raise ValueError(text["error"])
+        else:
+            raw_data = source.read()
+            text = raw_data.decode(_detect_encoding(raw_data), errors='replace')
+        return ExtractedText(text, None, "text")
+
+    raise ValueError(f"Unsupported file type: {filename}")
+
 def handle_binary_data(data):
     """
     Handle binary data by attempting to parse it as different file types.
     """
     # Try to parse as PDF
     try:
-        pdf = PdfReader(BytesIO(data))
-        text = ""
-        for page in pdf.pages:
-            text += page.extract_text()
-        return text
-    except:
+        return extract_pdf_text(data)
+    except Exception:
         pass
 
     # Try to parse as DOCX
     try:
-        doc = Document(BytesIO(data))
-        return "\n".join([para.text for para in doc.paragraphs])
+        return _docx_text(BytesIO(data))
     except:
         pass
 
     # If all attempts fail, return an error message
     return "Unable to process the uploaded file. Please ensure it's a valid PDF, DOCX, or text file."
 
+def available_pdf_backends():
+    return [name for name in PDF_BACKEND_ORDER if importlib.util.find_spec(_BACKEND_MODULES[name])]
+
+def default_pdf_backend():
+    return available_pdf_backends()[0]
+
+def _pdf_buffer(source):
+    """Bytes of a PDF given as bytes or a file object, without copying in-memory uploads."""
+    if isinstance(source, (bytes, memoryview)):
+        return source
+    buffer = source.getbuffer() if hasattr(source, "getbuffer") else None
+    if buffer is not None:
+        return buffer
+    source.seek(0)
+    return source.read()
+
+def _pdf_stream(source):
+    """File object for a PDF given as bytes or a file object."""
+    if isinstance(source, (bytes, memoryview)):
+        return BytesIO(source)
+    source.seek(0)
+    return source
+
+# Each opener returns (page_count, page_text(i), close()).
+
+def _open_pymupdf(source):
+    import pymupdf
+    if isinstance(source, str):
+        doc = pymupdf.open(source)
+    else:
+        doc = pymupdf.open(stream=_pdf_buffer(source), filetype="pdf")
+    return doc.page_count, lambda i: doc[i].get_text(), doc.close
+
+def _open_pypdfium2(source):
+    import pypdfium2
+    pdf = pypdfium2.PdfDocument(source if isinstance(source, str) else _pdf_stream(source))
+
+    def page_text(i):
+        page = pdf[i]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
+
+    return len(pdf), page_text, pdf.close
+
+def _open_pypdf2(source):
+    from PyPDF2 import PdfReader
+    reader = PdfReader(source if isinstance(source, str) else _pdf_stream(source))
+    return len(reader.pages), lambda i: reader.pages[i].extract_text() or "", lambda: None
+
+PDF_BACKENDS = {
+    "pymupdf": _open_pymupdf,
+    "pypdfium2": _open_pypdfium2,
+    "pypdf2": _open_pypdf2,
+}
+
+def _extract_page_range(path, backend, start, stop):
+    """Process-pool task: extract pages ``start``..``stop`` of the PDF at ``path``."""
+    _, page_text, close = PDF_BACKENDS[backend](path)
+    try:
+        return [page_text(i) for i in range(start, stop)]
+    finally:
+        close()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # forkserver avoids forking the multi-threaded web process
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else None
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context(method))
+    return _pool
+
+def _spill_pdf(source):
+    """Write an in-memory PDF to a temporary file; the caller deletes it."""
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        try:
+            f.write(_pdf_buffer(source))
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    return f.name
+
+def _parallel_pages(path, backend, page_count):
+    """Yield page texts in order while at most two batches per worker are in flight.
+
+    Tasks carry the path of the PDF rather than its bytes, so each worker
+    reads only the pages it extracts.
+    """
+    pool = _get_pool()
+    batches = iter(range(0, page_count, PAGES_PER_TASK))
+    in_flight = deque()
+    try:
+        for start in batches:
+            in_flight.append(pool.submit(_extract_page_range, path, backend, start, min(start + PAGES_PER_TASK, page_count)))
+            if len(in_flight) >= 2 * PDF_WORKERS:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+def iter_pdf_pages(source, backend=None, max_pages=None, max_chars=None, parallel=None):
+    """
+    Stream the text of each page of a PDF given as a path, bytes or a binary
+    file object.
+
+    Line breaks within a page are replaced by spaces. Extraction stops after
+    ``max_pages`` pages or once ``max_chars`` characters have been produced,
+    truncating the last page. Documents of ``PARALLEL_PAGE_THRESHOLD`` pages
+    or more are extracted in a process pool unless ``parallel`` says otherwise.
+    """
+    backend = backend or default_pdf_backend()
+    page_count, page_text, close = PDF_BACKENDS[backend](source)
+    spilled = None
+    pages = None
+    remaining = max_chars
+    try:
+        if max_pages is not None:
+            page_count = min(page_count, max_pages)
+        if parallel is None:
+            parallel = PDF_WORKERS > 1 and page_count >= PARALLEL_PAGE_THRESHOLD
+
+        if parallel:
+            if not isinstance(source, str):
+                source = spilled = _spill_pdf(source)
+            pages = _parallel_pages(source, backend, page_count)
+        else:
+            pages = (page_text(i) for i in range(page_count))
+
+        for text in pages:
+            text = text.replace("\r", "").replace("\n", " ")
+            if remaining is not None:
+                if len(text) >= remaining:
+                    yield text[:remaining]
+                    return
+                remaining -= len(text)
+            yield text
+    finally:
+        if pages is not None:
+            pages.close()
+        close()
+        if spilled is not None:
+            os.unlink(spilled)
+
+def extract_pdf_text(source, backend=None, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS, parallel=None):
+    return " ".join(iter_pdf_pages(source, backend, max_pages, max_chars, parallel))
+
 def route_pdf(path):
     try:
-        reader = PdfReader(path)
-        policy = ""
-        for page in reader.pages:
-            policy += page.extract_text()
-        
-        # Join pages
-        policy = " ".join(policy.split("\n"))
+        policy = extract_pdf_text(path)
     except Exception as e:
         return {"error": f"Error loading PDF: {str(e)}"}
 
@@ -72,15 +281,13 @@ def route_pdf(path):
 
 def route_docx(path):
     try:
-        doc = Document(path)
-        return "\n".join([para.text for para in doc.paragraphs])
+        return _docx_text(path)
     except Exception as e:
         return {"error": f"Error loading DOCX: {str(e)}"}
 
 def route_doc(path):
     try:
-        doc = Document(path)
-        return "\n".join([para.text for para in doc.paragraphs])
+        return _docx_text(path)
     except Exception as e:
         return {"error": f"Error loading DOC: {str(e)}"}
 
@@ -88,8 +295,6 @@ def route_txt(path):
     try:
         with open(path, 'rb') as f:
             raw_data = f.read()
-            detected = chardet.detect(raw_data)
-            encoding = detected['encoding'] or 'utf-8'
-            return raw_data.decode(encoding)
+            return raw_data.decode(_detect_encoding(raw_data))
     except Exception as e:
         return {"error": f"Error loading TXT: {str(e)}"}
\ No newline at end of file
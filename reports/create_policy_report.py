@@ -1,38 +1,183 @@
+"""PDF report for one policy analysis.
+
+Everything that does not depend on the analysis is built once per process:
+the paragraph and table styles, the nine Goal 5 target paragraphs and the
+letterhead image, whose PNG-to-PDF encoding used to dominate the time spent
+building a report.
+
+The document is laid out in a single pass. The sections appear in a fixed
+order, so the table of contents is known before layout begins: it is built
+from the headings in the element list rather than collected while a first
+pass runs. Page numbers, which are only known at the end, are drawn as form
+XObjects that each page refers to and ``ReportCanvas.save`` defines once
+the last page is done: "Page x of y" in every footer and the page of each
+table of contents entry.
+
+This relies on reportlab internals (``_digester``, ``_setXObjects``,
+``_curr_tx_info``, ``TableOfContents._lastEntries`` and ``wrap``), so
+reportlab is pinned in requirements.txt and tests/test_report_pdf.py checks
+the footers and table of contents of a built report against its pages.
+"""
+import copy
+from datetime import date
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.colors import HexColor
-from reportlab.platypus import BaseDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image as PlatypusImage
+from reportlab.platypus import BaseDocTemplate, Flowable, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT
 from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfdoc
 from reportlab.platypus.frames import Frame
 from reportlab.platypus.doctemplate import PageTemplate
 from reportlab.pdfgen import canvas
-from reportlab.platypus.tableofcontents import TableOfContents as TOC
-from datetime import date
-from io import BytesIO
-import base64
-from PIL import Image as PILImage
+from reportlab.platypus.tableofcontents import TableOfContents as TOC, drawPageNumbers
+from utilities.constants import GOAL5_TARGETS
 
-class CustomTableOfContents(TOC):
-    def __init__(self):
-        TOC.__init__(self)
-        self.dotsMinLevel = 0  # Remove dots in the table of contents
-    
-    def wrap(self, availWidth, availHeight):
-        "Overide wrap to set the availableWidth"
-        self.availableWidth = availWidth
-        return TOC.wrap(self, availWidth, availHeight)
+LETTERHEAD_PATH = Path(__file__).resolve().parent.parent / "static" / "Letterhead.png"
+
+# Table of contents level of each heading style
+SECTION_LEVELS = {'Heading1': 0, 'Heading2': 1}
+
+
+@lru_cache(maxsize=None)
+def report_styles():
+    """The report's paragraph styles, built once and shared by every report."""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='SectionHeader',
+                              fontSize=14,
+                              fontName='Helvetica-Bold',
+                              textColor=HexColor('#FFFFFF')))
+    styles.add(ParagraphStyle(name='ContentHeader',
+                              fontSize=11,
+                              fontName='Helvetica-Bold',
+                              textColor=HexColor('#000000')))
+    styles.add(ParagraphStyle(name='ContentText',
+                              fontSize=10,
+                              fontName='Helvetica',
+                              textColor=HexColor('#000000')))
+    styles.add(ParagraphStyle(name='TableCell',
+                              fontName='Helvetica',
+                              fontSize=9,
+                              leading=12,
+                              alignment=TA_LEFT,
+                              wordWrap='CJK'))
+    styles.add(ParagraphStyle(name='TOCHeading1', fontSize=14, leftIndent=20, firstLineIndent=-20, spaceBefore=5,
+                              leading=16))
+    styles.add(ParagraphStyle(name='TOCHeading2', fontSize=12, leftIndent=40, firstLineIndent=-20, spaceBefore=3,
+                              leading=14))
+    styles.add(ParagraphStyle(name='TOCHeading3', fontSize=10, leftIndent=60, firstLineIndent=-20, spaceBefore=2,
+                              leading=12))
+    return styles
+
+
+@lru_cache(maxsize=None)
+def _goal5_paragraphs():
+    return tuple(Paragraph(text) for text in GOAL5_TARGETS)
+
+
+def goal5_target_paragraphs():
+    """The nine Goal 5 target paragraphs, parsed once; copies, since layout stores state on them."""
+    return [copy.copy(paragraph) for paragraph in _goal5_paragraphs()]
 
-    def drawEntries(self, canvas, page):
-        """Don't do anything. We'll handle this in draw() method."""
-        pass
+
+@lru_cache(maxsize=None)
+def _letterhead_xobject():
+    # Named the way canvas.drawImage names an image file, so that drawImage finds and reuses it
+    name = canvas._digester(f"{LETTERHEAD_PATH}auto".encode('utf-8'))
+    image = pdfdoc.PDFImageXObject(name, str(LETTERHEAD_PATH), mask='auto')
+    image.name = name
+    return image
+
+
+def warm_up():
+    """Build the per-process caches (styles, target paragraphs, letterhead) ahead of the first report."""
+    report_styles()
+    _table_style()
+    _goal5_paragraphs()
+    _letterhead_xobject()
+
+
+class Letterhead(Flowable):
+    """The letterhead image, encoded for PDF once per process instead of once per report."""
+
+    def __init__(self, width, height):
+        Flowable.__init__(self)
+        self.hAlign = 'CENTER'
+        self.width = width
+        self.height = height
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
 
     def draw(self):
-        """Draw the table of contents without any placeholder text."""
-        if len(self._entries) > 0:
-            return TOC.draw(self)
+        self._register(self.canv)
+        self.canv.drawImage(str(LETTERHEAD_PATH), 0, 0, self.width, self.height, mask='auto')
+
+    @staticmethod
+    def _register(canv):
+        """Add the encoded image, and its transparency mask, to the canvas's document, as drawImage would."""
+        image = _letterhead_xobject()
+        document = canv._doc
+        regName = document.getXObjectName(image.name)
+        if regName in document.idToObject:
+            return
+        imgObj = copy.copy(image)
+        smask = getattr(imgObj, '_smask', None)
+        if smask:
+            del imgObj._smask
+        canv._setXObjects(imgObj)
+        document.Reference(imgObj, regName)
+        document.addForm(image.name, imgObj)
+        if smask:
+            smask = copy.copy(smask)
+            canv._setXObjects(smask)
+            imgObj.smask = document.Reference(smask, document.getXObjectName(smask.name))
+
+
+class SectionIndex(TOC):
+    """Table of contents laid out in a single pass from the report's headings.
+
+    ``add_sections`` gives it every heading before the build starts, so it
+    is complete the first time it is wrapped. Each entry ends with the form
+    XObject ``tocEntry<i>``, which ``ReportCanvas.save`` defines with the
+    dot leader and the page number once the heading has been drawn.
+    """
+
+    def __init__(self):
+        styles = report_styles()
+        TOC.__init__(self, dotsMinLevel=0,
+                     levelStyles=[styles['TOCHeading1'], styles['TOCHeading2'], styles['TOCHeading3']])
+        self.sections = {}
+
+    def add_sections(self, elements):
+        """Index the Heading1 and Heading2 paragraphs in ``elements``, in document order."""
+        entries = []
+        for flowable in elements:
+            if isinstance(flowable, Paragraph) and flowable.style.name in SECTION_LEVELS:
+                self.sections[id(flowable)] = len(entries)
+                # The entry's page number field holds its index until the page is known
+                entries.append((SECTION_LEVELS[flowable.style.name], flowable.getPlainText(), len(entries), None))
+        self._lastEntries = entries
+
+    def wrap(self, availWidth, availHeight):
+        size = TOC.wrap(self, availWidth, availHeight)
+
+        def mark_entry_end(canv, kind, label):
+            index, level = (int(value) for value in label.split(',')[:2])
+            canv.toc_marks[index] = (canv._curr_tx_info['cur_x'], canv._curr_tx_info['cur_y'], availWidth,
+                                     self.getLevelStyle(level))
+            canv.doForm(f"tocEntry{index}")
+        # reportlab 5 looks onDraw callbacks up by name, 4.x as canvas attributes
+        if hasattr(self.canv, 'setNamedCB'):
+            self.canv.setNamedCB('drawTOCEntryEnd', mark_entry_end)
         else:
-            return []
+            self.canv.drawTOCEntryEnd = mark_entry_end
+        return size
+
 
 class MyDocTemplate(BaseDocTemplate):
     def __init__(self, filename, **kw):
@@ -40,84 +185,61 @@ class MyDocTemplate(BaseDocTemplate):
         BaseDocTemplate.__init__(self, filename, **kw)
         template = PageTemplate('normal', [Frame(
             self.leftMargin, self.bottomMargin, self.width, self.height-0.4*inch, id='normal'
-        )], onPage=header_footer, onPageEnd=header_footer)
+        )], onPage=header_footer)
         self.addPageTemplates([template])
-        self.toc = CustomTableOfContents()
+        self.toc = SectionIndex()
         self.content = {}
         self.pagesize = letter
         self.width, self.height = self.pagesize
 
     def afterFlowable(self, flowable):
-        "Registers TOC entries."
-        if flowable.__class__.__name__ == 'Paragraph':
-            text = flowable.getPlainText()
-            style = flowable.style.name
-            if style == 'Heading1':
-                self.notify('TOCEntry', (0, text, self.page))
-            elif style == 'Heading2':
-                self.notify('TOCEntry', (1, text, self.page))
-
-class NumberedCanvas(canvas.Canvas):
+        "Records the page of each table of contents entry."
+        index = self.toc.sections.get(id(flowable))
+        if index is not None:
+            self.canv.toc_pages[index] = self.page
+
+
+class ReportCanvas(canvas.Canvas):
+    """Numbers pages "Page x of y" without keeping each page's state until the page count is known."""
+
     def __init__(self, *args, **kwargs):
         canvas.Canvas.__init__(self, *args, **kwargs)
-        self._saved_page_states = []
+        self.toc_marks = {}
+        self.toc_pages = {}
 
     def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
+        self.doForm(f"pageNumber{self._pageNumber}")
+        canvas.Canvas.showPage(self)
 
     def save(self):
-        """add page info to each page (page x of y)"""
-        num_pages = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            self.draw_page_number(num_pages)
-            canvas.Canvas.showPage(self)
+        """define the page number forms (page x of y) and the table of contents page numbers"""
+        if len(self._code):
+            self.showPage()
+        num_pages = self._pageNumber - 1
+        for page in range(1, num_pages + 1):
+            self.beginForm(f"pageNumber{page}")
+            self.draw_page_number(page, num_pages)
+            self.endForm()
+        page_width, page_height = self._pagesize
+        for index, (x, y, availWidth, style) in self.toc_marks.items():
+            self.beginForm(f"tocEntry{index}", -page_width, -page_height, page_width, page_height)
+            self._curr_tx_info = {'cur_x': x, 'cur_y': y}
+            drawPageNumbers(self, style, [(self.toc_pages.get(index, ''), None)], availWidth, 0, ' . ')
+            self.endForm()
         canvas.Canvas.save(self)
 
-    def draw_page_number(self, page_count):
+    def draw_page_number(self, page, page_count):
         self.setFont("Helvetica", 9)
-        self.drawRightString(7.5*inch, 0.75*inch, f"Page {self._pageNumber} of {page_count}")
+        self.drawRightString(7.5*inch, 0.75*inch, f"Page {page} of {page_count}")
 
 def header_footer(canvas, doc):
     canvas.saveState()
-    
-    # Header
-    page_width, page_height = letter
-
-    # Adjust the header image to fit the width of the page
-    header_image_path = 'static/letterhead.png'
-    header_image_width = page_width
-    header_image_height = 1*inch
-
-    # canvas.drawImage(header_image_path, 0, page_height - header_image_height, width=header_image_width, height=header_image_height, preserveAspectRatio=True)
-    
-    # Footer
     canvas.setFont("Helvetica", 9)
-    footer_text = f"{date.today().strftime('%B %d, %Y')} | {doc.content.get('title', '')}"
-    canvas.drawString(1*inch, 0.75*inch, footer_text)
-    
+    canvas.drawString(1*inch, 0.75*inch, doc.content['footer'])
     canvas.restoreState()
 
 def generate_table(data, colWidths=None):
-    # Create paragraph styles for cell content
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        fontName='Helvetica-Bold',
-        fontSize=10,
-        leading=12,
-        alignment=TA_LEFT,
-        textColor=HexColor('#000000')
-    )
-    
-    cell_style = ParagraphStyle(
-        'CellStyle',
-        fontName='Helvetica',
-        fontSize=9,
-        leading=12,
-        alignment=TA_LEFT,
-        wordWrap='CJK'
-    )
+    cell_style = report_styles()['TableCell']
 
     # Convert all cell contents to Paragraphs for proper wrapping
     formatted_data = []
@@ -134,10 +256,18 @@ def generate_table(data, colWidths=None):
     # Calculate column widths if not provided
     if colWidths is None:
         colWidths = [None] * len(data[0])  # Equal width for all columns
-    t = Table(formatted_data, colWidths=colWidths)
+    # Rows longer than a page are split across pages
+    t = Table(formatted_data, colWidths=colWidths, splitInRow=1)
 
     # Set alternating row colors using TableStyle
-    t.setStyle(TableStyle([
+    t.setStyle(_table_style())
+
+    return t
+
+
+@lru_cache(maxsize=None)
+def _table_style():
+    return TableStyle([
         ('LINEABOVE', (0,0), (-1,0), 1, HexColor('#000000')),
         ('LINEABOVE', (0,1), (-1,-1), .50, HexColor('#000000')),
         ('LINEBELOW', (0,-1), (-1,-1), 1, HexColor('#000000')),
@@ -148,97 +278,50 @@ def generate_table(data, colWidths=None):
         ('GRID', (0, 0), (-1, -1), 0.25, HexColor('#CCCCCC')),
         ('TOPPADDING', (0, 0), (-1, -1), 4),
         ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-
-    ]))
-
-    # Apply alternating row colors
-    t.setStyle(TableStyle([
+        # Apply alternating row colors
         ('ROWBACKGROUNDS', (0, 1), (-1, -1), [HexColor('#c2c4d2 '), HexColor('#FFFFFF')]),
-    ]))
+    ])
 
-    return t
 
-def create_policy_report_pdf(policy_report, plot_html):
+def create_policy_report_pdf(policy_report, chart=None):
     buffer = BytesIO()
     title = policy_report.get('policy_summary', {}).get('title', 'Policy Analysis Report')
     doc = MyDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=36, bottomMargin=72)
-    doc.content = {'title': title}
-
-    frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height - 0.4*inch, id='normal')
-    template = PageTemplate(id='test', frames=frame, onPage=header_footer)
-    doc.addPageTemplates([template])
+    doc.content = {'title': title, 'footer': f"{date.today().strftime('%B %d, %Y')} | {title}"}
     elements = []
- 
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='SectionHeader',
-                              fontSize=14,
-                              fontName='Helvetica-Bold',
-                              textColor=HexColor('#FFFFFF')))
-    styles.add(ParagraphStyle(name='ContentHeader',
-                              fontSize=11,
-                              fontName='Helvetica-Bold',
-                              textColor=HexColor('#000000')))
-    styles.add(ParagraphStyle(name='ContentText',
-                              fontSize=10,
-                              fontName='Helvetica',
-                              textColor=HexColor('#000000')))
-    
+
+    styles = report_styles()
+
     # Add the header image and spacer to the elements list
-    elements.append(PlatypusImage('static/letterhead.png', width=doc.width, height=1*inch))
+    elements.append(Letterhead(doc.width, 1*inch))
     elements.append(Spacer(1, 86))
     
     elements.append(Paragraph(title, styles['Title']))
     elements.append(Spacer(1, 24))
 
-    toc = CustomTableOfContents()
-    toc.levelStyles = [
-        ParagraphStyle(name='TOCHeading1', fontSize=14, leftIndent=20, firstLineIndent=-20, spaceBefore=5, leading=16),
-        ParagraphStyle(name='TOCHeading2', fontSize=12, leftIndent=40, firstLineIndent=-20, spaceBefore=3, leading=14),
-        ParagraphStyle(name='TOCHeading3', fontSize=10, leftIndent=60, firstLineIndent=-20, spaceBefore=2, leading=12),
-    ]
     elements.append(PageBreak())
     elements.append(Paragraph("Table of Contents", styles['Heading1']))
-    elements.append(toc)
+    elements.append(doc.toc)
     elements.append(PageBreak())
 
     elements.append(Paragraph("United Nations Goal 5 Targets: ", styles['Heading1']))
     elements.append(Spacer(1, 32))
-    elements.append(Paragraph("5.1 End all forms of discrimination against all women and girls everywhere."))
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph("5.2 Eliminate all forms of violence against all women and girls in the public and private spheres, including trafficking and sexual and other types of exploitation."))
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph("5.3 Eliminate all harmful practices, such as child, early and forced marriage and female genital mutilation."))
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph("5.4 Recognize and value unpaid care and domestic work through the provision of public services, infrastructure and social protection policies and the promotion of shared responsibility within the household and the family as nationally appropriate."))
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph("5.5 Ensure women's full and effective participation and equal opportunities for leadership at all levels of decision-making in political, economic and public life."))
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph("5.6 Ensure universal access to sexual and reproductive health and reproductive rights as agreed in accordance with the Programme of Action of the International Conference on Population and Development and the Beijing Platform for Action and the outcome documents of their review conferences."))
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph("5.A Undertake reforms to give women equal rights to economic resources, as well as access to ownership and control over land and other forms of property, financial services, inheritance and natural resources, in accordance with national laws."))
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph("5.B Enhance the use of enabling technology, in particular information and communications technology, to promote the empowerment of women."))
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph("5.C Adopt and strengthen sound policies and enforceable legislation for for the promotion of gender equality and the empowerment of all women and girls at all levels."))
+    for i, target in enumerate(goal5_target_paragraphs()):
+        if i:
+            elements.append(Spacer(1, 12))
+        elements.append(target)
 
     elements.append(PageBreak())
 
-    # Add plot
-    if plot_html:
+    # Add chart
+    if chart is not None:
         elements.append(Paragraph("Goal 5 Alignment Chart", styles['Heading1']))
-        elements.append(Spacer(1, 22)) 
-        try:
-            img_data = plot_html.split('base64,')[1].split('"')[0]
-            img_bytes = base64.b64decode(img_data)
-            img = PILImage.open(BytesIO(img_bytes))
-            img_width, img_height = img.size
-            aspect = img_height / float(img_width)
-            img_width = 7 * inch
-            img_height = aspect * img_width
-            elements.append(PlatypusImage(BytesIO(img_bytes), width=img_width, height=img_height))
-        except Exception as e:
-            print(f"Error processing plot image: {e}")
-            elements.append(Paragraph("Error: Plot image could not be included"))
+        elements.append(Spacer(1, 22))
+        if chart.width > doc.width:
+            factor = doc.width / chart.width
+            chart.scale(factor, factor)
+            chart.width, chart.height = doc.width, chart.height * factor
+        elements.append(chart)
         elements.append(PageBreak())
 
     # Policy Summary
@@ -385,7 +468,8 @@ def create_policy_report_pdf(policy_report, plot_html):
             elements.append(Paragraph(f"{conclusion.get('final_recommendation', 'N/A')}"))
         elements.append(PageBreak())
 
-    # Build the PDF
-    doc.multiBuild(elements, canvasmaker=NumberedCanvas)
+    # Build the PDF in one pass; the table of contents is known up front
+    doc.toc.add_sections(elements)
+    doc.build(elements, canvasmaker=ReportCanvas)
     buffer.seek(0)
     return buffer.getvalue()
\ No newline at end of file
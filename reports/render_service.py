@@ -0,0 +1,187 @@
+"""Renders the chart and PDF of finished analyses in worker processes.
+
+Building the chart and the PDF is pure-Python, CPU-bound reportlab work. In
+an analysis thread it holds the GIL, stalling every other thread of the web
+worker, SSE streams included, and several reports render no faster than
+one. ``RenderService`` runs it in a ``ProcessPoolExecutor`` instead, so
+rendering throughput scales with cores.
+
+The workers are pre-warmed: they are forked from a forkserver that has
+already imported reportlab and the report modules, and each builds the
+report's cached styles, Goal 5 paragraphs and encoded letterhead in its
+initializer. ``start`` launches all of them ahead of the first report.
+
+At most ``max_pending`` reports are queued or rendering. ``render`` waits up
+to ``queue_timeout`` seconds for a slot and then raises ``QueueFullError``,
+so a burst of finished analyses holds back the analysis threads instead of
+piling report dicts up in the pool's queue.
+
+With ``RENDER_WORKERS=0`` reports are rendered in the calling thread, as is
+a ``render(..., inline=True)`` call; profiled analyses use that so the
+profile of their thread includes building the report.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utilities import metrics
+from utilities.jobs import QueueFullError
+
+logger = logging.getLogger(__name__)
+
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", os.cpu_count() or 1))
+RENDER_MAX_PENDING = int(os.environ.get("RENDER_MAX_PENDING", 4 * max(RENDER_WORKERS, 1)))
+RENDER_QUEUE_TIMEOUT = float(os.environ.get("RENDER_QUEUE_TIMEOUT_SECONDS", 30))
+
+# Imported once by the forkserver, so every worker starts with them loaded
+PRELOAD_MODULES = ["reports.create_policy_report", "plots.create_plots"]
+
+
+def warm_up_worker():
+    from reports import create_policy_report
+
+    create_policy_report.warm_up()
+
+
+def render_report(policy_report):
+    """Chart and PDF for ``policy_report``: ``(pdf_bytes, {stage: seconds})``."""
+    from plots.create_plots import create_plots
+    from reports.create_policy_report import create_policy_report_pdf
+
+    started = time.perf_counter()
+    chart = create_plots(policy_report)
+    plotted = time.perf_counter()
+    pdf_content = create_policy_report_pdf(policy_report, chart)
+    return pdf_content, {"create_plots": plotted - started, "create_pdf": time.perf_counter() - plotted}
+
+
+def _worker_pid():
+    return os.getpid()
+
+
+def _context():
+    # fork is unsafe in a process that already runs threads; forkserver is
+    # not available on Windows
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(method)
+    if method == "forkserver":
+        context.set_forkserver_preload(PRELOAD_MODULES)
+    return context
+
+
+class RenderService:
+    def __init__(self, max_workers=RENDER_WORKERS, max_pending=RENDER_MAX_PENDING,
+                 queue_timeout=RENDER_QUEUE_TIMEOUT):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._init_state()
+        os.register_at_fork(after_in_child=self._init_state)
+
+    def _init_state(self):
+        # After a fork the pool's processes and management thread belong to the parent
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self.pending = 0
+        self.rendered = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.warm_up_seconds = None
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.max_workers, mp_context=_context(),
+                                                     initializer=warm_up_worker)
+            return self._executor
+
+    def start(self):
+        """Start and warm up every worker process, and wait until they are ready."""
+        started = time.monotonic()
+        if self.max_workers:
+            pool = self._pool()
+            # The pool starts a process per task while none is idle
+            pids = {future.result() for future in [pool.submit(_worker_pid) for _ in range(self.max_workers)]}
+            logger.info(f"Started {len(pids)} report rendering process(es)")
+        else:
+            warm_up_worker()
+        self.warm_up_seconds = round(time.monotonic() - started, 3)
+
+    def start_in_background(self):
+        """``start`` without blocking the caller."""
+        def run():
+            try:
+                self.start()
+            except Exception as e:
+                logger.warning(f"Could not start the report rendering processes: {e!r}")
+
+        threading.Thread(target=run, name="render-warm-up", daemon=True).start()
+
+    def render(self, policy_report, inline=False):
+        """PDF bytes for ``policy_report``; raises ``QueueFullError`` when no slot frees up in time.
+
+        ``inline`` renders in the calling thread instead of a worker process.
+        """
+        waited = time.perf_counter()
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise QueueFullError(f"{self.max_pending} reports already waiting to be rendered")
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - waited, stage="render_queue")
+        with self._lock:
+            self.pending += 1
+        try:
+            if self.max_workers and not inline:
+                pdf_content, timings = self._render_in_pool(policy_report)
+            else:
+                pdf_content, timings = render_report(policy_report)
+        finally:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+        for stage, seconds in timings.items():
+            metrics.STAGE_SECONDS.observe(seconds, stage=stage)
+        with self._lock:
+            self.rendered += 1
+        return pdf_content
+
+    def _render_in_pool(self, policy_report):
+        pool = self._pool()
+        try:
+            return pool.submit(render_report, policy_report).result()
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory); replace the pool for later reports
+            with self._lock:
+                if self._executor is pool:
+                    self._executor = None
+                    self.restarts += 1
+            pool.shutdown(wait=False)
+            logger.error("A report rendering process died; restarting the pool")
+            raise
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes; the next report starts a new pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "rendered": self.rendered,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+                "warm_up_seconds": self.warm_up_seconds,
+            }
+
+
+render_service = RenderService()
@@ -14,13 +14,110 @@ function showError(message) {
     }
 }
 
+async function waitForJob(statusUrl) {
+    // Poll the analysis job until the report is ready, backing off up to 5 s
+    let delay = 500;
+    while (true) {
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+        if (!response.ok) {
+            throw new Error(job.error || 'Unable to check analysis status');
+        }
+        if (job.status === 'done') {
+            return job;
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Analysis failed');
+        }
+        await new Promise(resolve => setTimeout(resolve, delay));
+        delay = Math.min(delay * 1.5, 5000);
+    }
+}
+
+const SECTION_TITLES = {
+    policy_summary: 'Policy Summary',
+    sdg5_alignment: 'Target Goal Alignment',
+    bias_analysis: 'Bias Analysis',
+    cost_effectiveness_analysis: 'Cost Effectiveness Analysis',
+    improvement_recommendations: 'Improvement Recommendations',
+    ai_integration_opportunities: 'AI Integration Opportunities',
+    overall_assessment: 'Overall Assessment',
+    conclusion: 'Conclusion'
+};
+
+function describeSection(name, value) {
+    if (name === 'policy_summary' && value) {
+        return value.brief_overview || value.title || '';
+    }
+    if (name === 'sdg5_alignment' && value && value.overall_score !== undefined) {
+        return `Overall score: ${value.overall_score}/100`;
+    }
+    if (name === 'conclusion' && value) {
+        return value.summary || '';
+    }
+    if (Array.isArray(value)) {
+        return `${value.length} item(s)`;
+    }
+    return '';
+}
+
+function showSection(name, value) {
+    const progressElement = document.getElementById('analysis-progress');
+    if (!progressElement) return;
+    progressElement.classList.remove('hidden');
+
+    const item = document.createElement('div');
+    item.className = 'mb-2';
+    const heading = document.createElement('p');
+    heading.className = 'font-semibold text-primary-700';
+    heading.textContent = SECTION_TITLES[name] || name;
+    const detail = document.createElement('p');
+    detail.className = 'text-sm';
+    detail.textContent = describeSection(name, value);
+    item.appendChild(heading);
+    item.appendChild(detail);
+    progressElement.appendChild(item);
+}
+
+function followJob(job) {
+    // Show report sections as they stream in; fall back to polling without EventSource
+    if (!window.EventSource || !job.events_url) {
+        return waitForJob(job.status_url);
+    }
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(job.events_url);
+        source.addEventListener('section', (event) => {
+            const section = JSON.parse(event.data);
+            showSection(section.name, section.value);
+        });
+        source.addEventListener('done', (event) => {
+            source.close();
+            resolve(JSON.parse(event.data));
+        });
+        source.addEventListener('failed', (event) => {
+            source.close();
+            reject(new Error(JSON.parse(event.data).error || 'Analysis failed'));
+        });
+        source.onerror = () => {
+            source.close();
+            waitForJob(job.status_url).then(resolve, reject);
+        };
+    });
+}
+
 async function sendForAnalysis(source) {
     const loadingElement = document.getElementById('loading-searched');
     const analysisContentElement = document.getElementById('analysis-content');
     const analysisResultsElement = document.getElementById('analysis-results');
     const analysisPdfViewer = document.getElementById('analysis-pdf-viewer');
     
+    const progressElement = document.getElementById('analysis-progress');
+
     if (loadingElement) loadingElement.classList.remove('hidden');
+    if (progressElement) {
+        progressElement.innerHTML = '';
+        progressElement.classList.add('hidden');
+    }
     if (analysisContentElement) analysisContentElement.classList.add('hidden');
     if (analysisResultsElement) analysisResultsElement.classList.add('hidden');
 
@@ -29,15 +126,7 @@ async function sendForAnalysis(source) {
 
         if (source === 'pdf') {
             const billId = document.getElementById('bills').value;
-            const response = await fetch('/get_bill_pdf', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                },
-                body: new URLSearchParams({
-                    'bill_id': billId
-                })
-            });
+            const response = await fetch(`/bills/${encodeURIComponent(billId)}/text`);
             const blob = await response.blob();
             formData.append('file', blob, 'bill.pdf');
         } else if (source === 'file') {
@@ -52,19 +141,22 @@ async function sendForAnalysis(source) {
             body: formData
         });
 
+        const data = await analysisResponse.json();
         if (!analysisResponse.ok) {
-            throw new Error('Network response was not ok');
+            throw new Error(data.error || 'Network response was not ok');
         }
 
-        const data = await analysisResponse.json();
+        await followJob(data);
         if (loadingElement) loadingElement.classList.add('hidden');
+        if (progressElement) progressElement.classList.add('hidden');
 
         console.log("Analysis response data:", data); // Debug log
 
         if (data.success) {
             if (analysisPdfViewer) {
-                console.log("Setting analysis PDF URL:", data.pdf_url); // Debug log
-                analysisPdfViewer.src = data.pdf_url;
+                // The HTML report is ready at once; the PDF is rendered when downloaded
+                console.log("Setting analysis report URL:", data.report_url); // Debug log
+                analysisPdfViewer.src = data.report_url;
             } else {
                 console.error("Analysis PDF viewer element not found");
             }
@@ -190,15 +282,7 @@ function initializeScript() {
         }
 
         try {
-            const response = await fetch('/get_bill_pdf', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                },
-                body: new URLSearchParams({
-                    'bill_id': billId
-                })
-            });
+            const response = await fetch(`/bills/${encodeURIComponent(billId)}/text`);
             if (!response.ok) {
                 const errorData = await response.json();
                 throw errorData;
@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+TARGETS = ["5.1", "5.2", "5.3", "5.4", "5.5", "5.6", "5.A", "5.B", "5.C"]
+WORDS = ("the bill requires employers to report wage data by gender and establishes a review board "
+         "with authority over remedies for unpaid care and access to services").split()
+
+
+def text(words, seed=0):
+    return " ".join(WORDS[(seed + i) % len(WORDS)] for i in range(words))
+
+
+def bias(words, i):
+    return {"description": text(words, i), "potential_impact": text(words, i + 1),
+            "recommendation": text(words, i + 2)}
+
+
+def analysis(scale=1, words=40):
+    """A complete analysis of the shape ``analyze_policy`` returns, ``scale`` times the usual length."""
+    return {
+        "policy_summary": {"title": "An Act Concerning Pay Equity", "focus_area": "Employment",
+                           "brief_overview": text(words)},
+        "sdg5_alignment": {
+            "overall_score": 62,
+            "breakdown": [{"target": f"{code} - {code}", "score": (i * 7) % 11, "analysis": text(words, i)}
+                          for i, code in enumerate(TARGETS * scale)],
+        },
+        "bias_analysis": {"explicit_biases": [bias(words, i) for i in range(2 * scale)],
+                          "implicit_biases": [bias(words, i) for i in range(2 * scale)]},
+        "cost_effectiveness_analysis": {"overall_rating": "Medium", "explanation": text(words),
+                                        "key_factors": [text(8, i) for i in range(3 * scale)]},
+        "improvement_recommendations": [
+            {"area": f"Area {i + 1}", "current_state": text(words, i), "proposed_change": text(words, i + 1),
+             "expected_impact": text(words, i + 2), "implementation_challenges": text(words, i + 3),
+             "priority_level": "High"}
+            for i in range(3 * scale)
+        ],
+        "overall_assessment": {key: [text(12, i) for i in range(2 * scale)]
+                               for key in ("strengths", "weaknesses", "opportunities", "threats")},
+        "conclusion": {"summary": text(words), "key_takeaways": [text(12, i) for i in range(3 * scale)],
+                       "final_recommendation": text(words)},
+    }
+
@@ -0,0 +1,111 @@
+"""Local stand-ins for LLM providers that stream ``chunks`` tokens ``delay`` seconds apart.
+
+One aiohttp server speaks the OpenAI chat-completions SSE format (used by
+the OpenAI, Ollama and Hugging Face OpenAI-compatible providers) and the
+text-generation-inference format (``HFTextLLM``). A grpc.aio server speaks
+Gemini's ``GenerativeService.StreamGenerateContent``, which is what
+``genai.GenerativeModel.generate_content_async`` calls.
+
+``running_servers`` starts both on a background event loop and yields
+``(http_base_url, grpc_target)``. Used by tests/test_async_streaming.py and
+benchmarks/bench_async_streaming.py.
+"""
+import asyncio
+import json
+import threading
+from contextlib import contextmanager
+
+import grpc
+from aiohttp import web
+from google.ai import generativelanguage_v1beta as glm
+
+GEMINI_SERVICE = "google.ai.generativelanguage.v1beta.GenerativeService"
+
+
+def make_app(chunks, delay):
+    async def openai_stream(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i in range(chunks):
+            await asyncio.sleep(delay)
+            event = {"id": "fake", "object": "chat.completion.chunk", "created": 0, "model": "fake",
+                     "choices": [{"index": 0, "delta": {"content": f"token{i} "}, "finish_reason": None}]}
+            await response.write(f"data: {json.dumps(event)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def tgi_stream(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i in range(chunks):
+            await asyncio.sleep(delay)
+            event = {"index": i, "token": {"id": i, "text": f"token{i} ", "logprob": 0.0, "special": False},
+                     "generated_text": None, "details": None, "top_tokens": None}
+            await response.write(f"data:{json.dumps(event)}\n\n".encode())
+        return response
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", openai_stream)
+    app.router.add_post("/{tail:.*}", tgi_stream)
+    return app
+
+
+def gemini_handler(chunks, delay):
+    async def stream_generate_content(request, context):
+        for i in range(chunks):
+            await asyncio.sleep(delay)
+            part = glm.Part(text=f"token{i} ")
+            yield glm.GenerateContentResponse(
+                candidates=[glm.Candidate(index=0, content=glm.Content(role="model", parts=[part]))])
+
+    return grpc.method_handlers_generic_handler(GEMINI_SERVICE, {
+        "StreamGenerateContent": grpc.unary_stream_rpc_method_handler(
+            stream_generate_content,
+            request_deserializer=glm.GenerateContentRequest.deserialize,
+            response_serializer=glm.GenerateContentResponse.serialize,
+        ),
+    })
+
+
+async def gemini_async_client(target):
+    """``GenerativeServiceAsyncClient`` over a plaintext channel to ``target``.
+
+    Must run on the event loop that will use it.
+    """
+    from google.ai.generativelanguage_v1beta.services.generative_service.transports.grpc_asyncio import (
+        GenerativeServiceGrpcAsyncIOTransport,
+    )
+
+    channel = grpc.aio.insecure_channel(target)
+    return glm.GenerativeServiceAsyncClient(transport=GenerativeServiceGrpcAsyncIOTransport(channel=channel))
+
+
+@contextmanager
+def running_servers(chunks, delay):
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="fake-llm-server", daemon=True)
+    thread.start()
+
+    def run(coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    async def start():
+        runner = web.AppRunner(make_app(chunks, delay))
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        http_port = runner.addresses[0][1]
+        server = grpc.aio.server()
+        server.add_generic_rpc_handlers((gemini_handler(chunks, delay),))
+        grpc_port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        return runner, server, http_port, grpc_port
+
+    runner, server, http_port, grpc_port = run(start())
+    try:
+        yield f"http://127.0.0.1:{http_port}", f"127.0.0.1:{grpc_port}"
+    finally:
+        run(server.stop(None))
+        run(runner.cleanup())
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+for provider in ("GEMINI", "HUGGINGFACE_TEXT"):
+    os.environ.setdefault(f"LLM_RPM_{provider}", "1000000")
+    os.environ.setdefault(f"LLM_TPM_{provider}", "1000000000")
+    os.environ.setdefault(f"LLM_MAX_CONCURRENCY_{provider}", "1000")
+
+from fake_llm_server import gemini_async_client, running_servers  # noqa: E402
+from utilities.llm_config import batch_process_async, collect_response, get_llm, run_async  # noqa: E402
+
+STREAMS = 16
+CHUNKS = 5
+DELAY = 0.05
+
+
+@pytest.fixture(scope="module")
+def servers():
+    with running_servers(CHUNKS, DELAY) as addresses:
+        yield addresses
+
+
+def gemini(servers):
+    llm = get_llm("gemini", "models/test", api_key="unused")
+    # The SDK's own async client and gRPC stream, over plaintext to the local server
+    llm.client._async_client = run_async(gemini_async_client(servers[1]))
+    return llm
+
+
+def huggingface_text(servers):
+    return get_llm("huggingface-text", f"{servers[0]}/generate", api_key="unused")
+
+
+async def run_with_heartbeat(llm, prompts):
+    lateness = []
+
+    async def heartbeat():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lateness.append(time.perf_counter() - started - 0.01)
+
+    ticker = asyncio.ensure_future(heartbeat())
+    try:
+        started = time.perf_counter()
+        responses = await batch_process_async(llm, prompts)
+        elapsed = time.perf_counter() - started
+    finally:
+        ticker.cancel()
+    # A loop blocked throughout never lets the heartbeat wake up at all
+    return responses, elapsed, max(lateness, default=elapsed)
+
+
+@pytest.mark.parametrize("make_llm", [gemini, huggingface_text])
+def test_streams_overlap_without_blocking_the_loop(servers, make_llm):
+    llm = make_llm(servers)
+    # One call first, so opening the connection is not counted as loop lag
+    assert run_async(collect_response(llm, "warm-up")).count("token") == CHUNKS
+    prompts = [f"p{i}" for i in range(STREAMS)]
+
+    responses, elapsed, max_lag = run_async(run_with_heartbeat(llm, prompts))
+
+    assert responses == ["".join(f"token{i} " for i in range(CHUNKS))] * STREAMS
+    # Run one after another the streams would take STREAMS * CHUNKS * DELAY; the
+    # limiter's adaptive window starts small, so they do not all overlap at once
+    assert elapsed < STREAMS * CHUNKS * DELAY / 2
+    assert max_lag < DELAY
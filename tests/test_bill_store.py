@@ -0,0 +1,75 @@
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from data.bill_store import BillTextStore
+
+PDF = "application/pdf"
+
+
+def put(root, doc_id, content, max_bytes=1 << 20):
+    BillTextStore(root, max_bytes=max_bytes).put(doc_id, content, PDF)
+
+
+def get(root, doc_id):
+    return BillTextStore(root).get(doc_id) is not None
+
+
+def validate(root, bill_id, change_hash):
+    return BillTextStore(root).resolve(bill_id, change_hash=change_hash) is not None
+
+
+@pytest.fixture
+def other_process():
+    """Runs store operations in a second process, as another gunicorn worker would."""
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        yield lambda fn, *args: pool.submit(fn, *args).result()
+
+
+def index(root):
+    return json.loads((root / "index.json").read_text())
+
+
+def test_missing_blob_is_dropped_for_every_process(tmp_path, other_process):
+    store = BillTextStore(tmp_path)
+    missing = store.put(1, b"first", PDF)
+    store.put(2, b"second", PDF)
+    (tmp_path / f"{missing.etag}.pdf").unlink()
+
+    assert other_process(get, tmp_path, 1) is False
+    assert "1" not in index(tmp_path)["docs"]
+
+    # This process still holds the entry, but must not write it back
+    store.put(3, b"third", PDF)
+    assert sorted(index(tmp_path)["docs"]) == ["2", "3"]
+    assert store.get(1) is None
+    assert store.stats()["bytes"] == len(b"second") + len(b"third")
+
+
+def test_blob_evicted_by_another_process(tmp_path, other_process):
+    store = BillTextStore(tmp_path, max_bytes=10)
+    evicted = store.put(1, b"12345678", PDF)
+
+    other_process(put, tmp_path, 2, b"abcdefgh", 10)
+
+    assert not (tmp_path / f"{evicted.etag}.pdf").exists()
+    assert store.get(1) is None
+    assert store.get(2) is not None
+    assert sorted(index(tmp_path)["docs"]) == ["2"]
+    assert store.stats()["bytes"] == 8
+
+
+def test_validation_is_shared_between_processes(tmp_path, other_process):
+    store = BillTextStore(tmp_path, recheck=0.2)
+    store.put(10, b"text", PDF)
+    store.record_bill(1, 10, "hash-a")
+    time.sleep(0.3)
+    assert store.resolve(1) is None
+
+    assert other_process(validate, tmp_path, 1, "hash-a") is True
+
+    assert store.resolve(1) is not None
+    assert other_process(validate, tmp_path, 1, "hash-b") is False
@@ -0,0 +1,98 @@
+import base64
+import io
+import json
+import zipfile
+
+import pytest
+
+from data import data_retrieval
+from data.bill_index import BillIndex, current_year
+from utilities.topic_matcher import TOPIC_QUERIES
+
+TOPIC = "Reproductive Rights"
+
+
+def bill(bill_id, title, description, doc_id):
+    year = current_year()
+    return {"bill": {
+        "bill_id": bill_id, "state": "TX", "bill_number": f"HB{bill_id}", "title": title,
+        "description": description, "change_hash": f"hash{bill_id}", "texts": [{"doc_id": doc_id}],
+        "session": {"session_id": 2001, "session_name": f"{year} Regular Session",
+                    "year_start": year, "year_end": year},
+    }}
+
+
+def document(doc_id, html_text):
+    return {"text": {"doc_id": doc_id, "mime": "text/html",
+                     "doc": base64.b64encode(html_text.encode()).decode()}}
+
+
+def fixture_zip():
+    files = {
+        "TX/2026-2026_Regular/bill/HB1.json": bill(
+            1, "Relating to maternal health coverage", "Medicaid for pregnant women", 101),
+        "TX/2026-2026_Regular/text/101.json": document(
+            101, "<p>Women's health care: prenatal care and postnatal care for every female resident.</p>"),
+        # Names the topic label but none of the terms its query requires
+        "TX/2026-2026_Regular/bill/HB2.json": bill(
+            2, "Reproductive rights study commission", "Creates a commission", 102),
+        "TX/2026-2026_Regular/text/102.json": document(102, "<p>The commission shall meet quarterly.</p>"),
+        "TX/2026-2026_Regular/bill/HB3.json": bill(
+            3, "Relating to highway maintenance", "Road funding", 103),
+        "TX/2026-2026_Regular/text/103.json": document(103, "<p>Funds for highway repairs.</p>"),
+    }
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, json.dumps(content))
+    return buffer.getvalue()
+
+
+class FakeClient:
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def search(self, query, state, year=2):
+        self.queries.append(query)
+        return {"searchresult": {str(i): result for i, result in enumerate(self.results)}}
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    index = BillIndex(str(tmp_path / "legiscan.db"))
+    assert index.ingest_zip(fixture_zip())["added"] == 3
+    searched = []
+    search = index.search
+
+    def recording_search(expression, *args, **kwargs):
+        searched.append(expression)
+        return search(expression, *args, **kwargs)
+
+    monkeypatch.setattr(index, "search", recording_search)
+    monkeypatch.setattr(data_retrieval, "bill_index", index)
+    index.searched = searched
+    return index
+
+
+def test_ingested_state_is_searched_with_the_topic_query(index):
+    bills = data_retrieval.get_bills(TOPIC, "TX")
+
+    assert [b["bill_id"] for b in bills] == [1]
+    assert index.searched == [TOPIC_QUERIES[TOPIC]]
+
+
+def test_both_paths_use_the_same_query(index, monkeypatch):
+    client = FakeClient([{"bill_id": 9, "title": "Maternal health &amp; women"}])
+    monkeypatch.setattr(data_retrieval, "client", client)
+
+    data_retrieval.get_bills(TOPIC, "TX")
+    bills = data_retrieval.get_bills(TOPIC, "CA")
+
+    assert bills == [{"bill_id": 9, "title": "Maternal health & women"}]
+    assert client.queries == index.searched == [TOPIC_QUERIES[TOPIC]]
+
+
+def test_topic_queries_have_no_wrapping_quotes():
+    for query in TOPIC_QUERIES.values():
+        assert query == query.strip() and not query.startswith("'")
@@ -0,0 +1,70 @@
+import os
+
+import pandas as pd
+import pytest
+
+from data.incident_stats import COLUMNS, IncidentStatistics
+
+ROWS = [
+    ("Female", "Assault", "Intimate Partner", "Knife", "Minor", "Residence", "Male"),
+    ("Female", "Robbery", "Stranger", "Firearm", "No injury", "Street", "Male"),
+    ("Male", "Assault", "Acquaintance", "None", "Minor", "Bar", "Male"),
+    ("Female", "Assault", "Other Relative", "None", "Serious", "Residence", "Female"),
+]
+
+
+def write_incidents(path, rows):
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(path, index=False)
+
+
+@pytest.fixture
+def incidents(tmp_path):
+    path = tmp_path / "incidents.csv"
+    write_incidents(path, ROWS)
+    return path
+
+
+def test_statistics_match_the_file(incidents):
+    stats = IncidentStatistics(str(incidents)).get()
+    assert stats["total_incidents"] == 3
+    assert stats["women_victims_percentage"] == 75.0
+    assert stats["crime_types"] == {"Assault": 2, "Robbery": 1}
+    assert stats["injury_percentage"] == pytest.approx(200 / 3)
+    assert stats["domestic_violence_percentage"] == pytest.approx(200 / 3)
+    assert stats["offender_sex_dist"] == pytest.approx({"Male": 200 / 3, "Female": 100 / 3})
+
+
+def test_unchanged_file_is_read_once(incidents):
+    statistics = IncidentStatistics(str(incidents))
+    first = statistics.get()
+    assert statistics.get() is first
+    assert statistics.loads == 1
+
+
+def test_size_change_recomputes(incidents):
+    statistics = IncidentStatistics(str(incidents))
+    statistics.get()
+    write_incidents(incidents, ROWS + [ROWS[0]])
+    assert statistics.get()["total_incidents"] == 4
+    assert statistics.loads == 2
+
+
+def test_mtime_change_with_same_size_recomputes(incidents):
+    statistics = IncidentStatistics(str(incidents))
+    statistics.get()
+    before = os.stat(incidents)
+    # Same number of bytes, different crime type
+    write_incidents(incidents, [ROWS[0][:1] + ("Robbery",) + ROWS[0][2:]] + ROWS[1:])
+    os.utime(incidents, ns=(before.st_atime_ns, before.st_mtime_ns + 1_000_000_000))
+    assert os.stat(incidents).st_size == before.st_size
+    assert statistics.get()["crime_types"] == {"Robbery": 2, "Assault": 1}
+    assert statistics.loads == 2
+
+
+def test_missing_file_raises_until_it_appears(tmp_path):
+    path = tmp_path / "incidents.csv"
+    statistics = IncidentStatistics(str(path))
+    with pytest.raises(OSError):
+        statistics.get()
+    write_incidents(path, ROWS)
+    assert statistics.get()["total_incidents"] == 3
@@ -0,0 +1,53 @@
+import asyncio
+import os
+
+for provider in ("TEST_PRIMARY", "TEST_SECONDARY"):
+    os.environ.setdefault(f"LLM_RPM_{provider}", "1000000")
+
+from utilities.llm_config import BaseLLM, LLMConfig, collect_response, run_async  # noqa: E402
+from utilities.llm_hedging import CLOSED, HALF_OPEN, HedgedLLM  # noqa: E402
+
+
+class FakeLLM(BaseLLM):
+    def __init__(self, name, delay=0.0):
+        super().__init__(LLMConfig(name, name, api_key="unused"))
+        self.delay = delay
+        self.calls = 0
+
+    def _create_client(self):
+        return None
+
+    def _get_response(self, prompt):
+        raise NotImplementedError
+
+    async def _get_aresponse(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        yield f"{self.config.model}: {prompt}"
+
+
+def test_refused_hedge_releases_half_open_trial():
+    primary = FakeLLM("test-primary", delay=0.05)
+    secondary = FakeLLM("test-secondary")
+    llm = HedgedLLM([primary, secondary], default_hedge_delay=0.01, max_hedge_ratio=0.0)
+    breaker = llm.breakers[1]
+    breaker.state = HALF_OPEN
+
+    # The primary is slow enough to hedge, but the budget refuses every hedge
+    assert run_async(collect_response(llm, "first")) == "test-primary: first"
+    assert secondary.calls == 0
+
+    # The secondary's trial is still available to a later call
+    assert breaker.allow()
+
+
+def test_hedge_goes_to_half_open_provider_once_budget_allows():
+    primary = FakeLLM("test-primary", delay=0.2)
+    secondary = FakeLLM("test-secondary")
+    llm = HedgedLLM([primary, secondary], default_hedge_delay=0.01, max_hedge_ratio=0.0)
+    llm.breakers[1].state = HALF_OPEN
+    run_async(collect_response(llm, "first"))
+
+    llm.max_hedge_ratio = 1.0
+    assert run_async(collect_response(llm, "second")) == "test-secondary: second"
+    assert llm.breakers[1].state == CLOSED
@@ -0,0 +1,85 @@
+import json
+
+import json_repair
+import pytest
+
+from utilities.parse_output import IncrementalJSONParser, parse_output_json
+
+REPORT = {
+    "policy_summary": {"title": "An Act Concerning Pay Equity", "focus_area": "Employment"},
+    "sdg5_alignment": {"overall_score": 62, "breakdown": [{"target": "5.1", "score": 7}]},
+    "conclusion": {"summary": "Closes the gap, [partly]", "key_takeaways": ["a", "b, c"]},
+}
+BODY = json.dumps(REPORT, indent=2)
+
+
+def parse_in_chunks(text, size):
+    parser = IncrementalJSONParser()
+    streamed = []
+    for i in range(0, len(text), size):
+        streamed.extend(parser.feed(text[i:i + size]))
+    return parser, streamed, parser.close()
+
+
+def test_fenced_payload():
+    assert parse_output_json(f"```json\n{BODY}\n```") == REPORT
+
+
+def test_bare_payload():
+    assert parse_output_json(BODY) == REPORT
+
+
+def test_bracket_in_prose_before_the_fence():
+    text = f"Sure [note: see below], here it is:\n```json\n{BODY}\n```\nAnything else?"
+    assert parse_output_json(text) == REPORT
+
+
+def test_unescaped_inner_quotes_are_repaired_in_their_member_only(monkeypatch):
+    text = BODY.replace("Closes the gap", 'Closes the "gap')
+    repaired = []
+    loads = json_repair.loads
+    monkeypatch.setattr(json_repair, "loads", lambda s: repaired.append(s) or loads(s))
+
+    parsed = parse_output_json(text)
+
+    assert parsed["conclusion"]["summary"] == 'Closes the "gap, [partly]'
+    assert parsed["policy_summary"] == REPORT["policy_summary"]
+    assert parsed["sdg5_alignment"] == REPORT["sdg5_alignment"]
+    # Only the damaged member went through the repair
+    assert repaired and not any("policy_summary" in text or "sdg5_alignment" in text for text in repaired)
+
+
+def test_odd_number_of_unescaped_quotes():
+    text = '```json\n{"a": "a 5" screen", "b": 2, "c": [3]}\n```'
+    assert parse_output_json(text) == {"a": 'a 5" screen', "b": 2, "c": [3]}
+
+
+def test_truncated_last_member():
+    text = "```json\n" + BODY[:BODY.index('"key_takeaways"') + 30]
+    parsed = parse_output_json(text)
+    assert parsed["policy_summary"] == REPORT["policy_summary"]
+    assert parsed["conclusion"]["summary"] == REPORT["conclusion"]["summary"]
+    assert parsed["conclusion"]["key_takeaways"][0] == "a"
+
+
+@pytest.mark.parametrize("text", [
+    f"```json\n{BODY}\n```",
+    f"Sure [note: see below]\n```json\n{BODY}\n```",
+    BODY.replace("Closes the gap", 'Closes the "gap" as such'),
+    "```json\n" + BODY[:-40],
+])
+@pytest.mark.parametrize("size", [1, 7, 64])
+def test_chunked_feed_matches_a_single_parse(text, size):
+    parser, streamed, parsed = parse_in_chunks(text, size)
+    assert parsed == parse_output_json(text)
+    # Members are handed out as they complete, each once
+    assert len({key for key, _ in streamed}) == len(streamed)
+    assert all(parsed[key] == value for key, value in streamed)
+
+
+def test_members_stream_before_the_payload_ends():
+    parser = IncrementalJSONParser()
+    cut = BODY.index('"conclusion"')
+    assert [key for key, _ in parser.feed(BODY[:cut])] == ["policy_summary", "sdg5_alignment"]
+    assert [key for key, _ in parser.feed(BODY[cut:])] == ["conclusion"]
+    assert parser.close() == REPORT
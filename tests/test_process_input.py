@@ -0,0 +1,71 @@
+import os
+import tempfile
+from io import BytesIO
+
+import pytest
+from reportlab.pdfgen import canvas
+
+import process_input
+
+
+def make_pdf(pages):
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for page in range(pages):
+        pdf.drawString(72, 720, f"Page {page + 1} text")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def closes(monkeypatch):
+    """Counts documents closed by the pypdfium2 backend."""
+    closed = []
+    opener = process_input.PDF_BACKENDS["pypdfium2"]
+
+    def counting_opener(source):
+        page_count, page_text, close = opener(source)
+        return page_count, page_text, lambda: (close(), closed.append(True))
+
+    monkeypatch.setitem(process_input.PDF_BACKENDS, "pypdfium2", counting_opener)
+    return closed
+
+
+def test_pages_stream_in_order(closes):
+    pages = list(process_input.iter_pdf_pages(make_pdf(3), backend="pypdfium2", parallel=False))
+    assert [text.strip() for text in pages] == ["Page 1 text", "Page 2 text", "Page 3 text"]
+    assert closes == [True]
+
+
+def test_failed_spill_closes_the_document(closes, monkeypatch):
+    def full_disk(source):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(process_input, "_spill_pdf", full_disk)
+    with pytest.raises(OSError):
+        list(process_input.iter_pdf_pages(make_pdf(2), backend="pypdfium2", parallel=True))
+    assert closes == [True]
+
+
+def test_failed_spill_leaves_no_temporary_file(tmp_path, monkeypatch):
+    class Unreadable(BytesIO):
+        def getbuffer(self):
+            raise OSError(5, "Input/output error")
+
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    with pytest.raises(OSError):
+        process_input._spill_pdf(Unreadable())
+    assert os.listdir(tmp_path) == []
+
+
+def test_parallel_extraction_matches_and_removes_the_spilled_file(tmp_path, monkeypatch):
+    pdf = make_pdf(5)
+    monkeypatch.setattr(process_input, "PAGES_PER_TASK", 2)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    parallel = list(process_input.iter_pdf_pages(pdf, backend="pypdfium2", parallel=True))
+
+    assert parallel == list(process_input.iter_pdf_pages(pdf, backend="pypdfium2", parallel=False))
+    # The pool's forkserver may keep its socket directory there
+    assert list(tmp_path.glob("*.pdf")) == []
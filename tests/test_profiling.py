@@ -0,0 +1,26 @@
+import app
+from conftest import analysis
+from utilities.jobs import Job
+
+
+def test_profiled_job_includes_building_the_report(tmp_path, monkeypatch):
+    policy_report = analysis(scale=2)
+    # Profiles are written to the relative PROFILE_DIR
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app, "run_analysis", lambda job, **kwargs: policy_report)
+    rendered = []
+    monkeypatch.setattr(app.render_service, "_render_in_pool", rendered.append)
+    job = Job()
+
+    assert app.run_profiled_analysis(job, policy_content="text") is policy_report
+
+    assert rendered == []
+    event, summary = job.events[-1]
+    assert event == "profile" and summary["samples"] > 0
+    collapsed = (tmp_path / "profiles" / f"{summary['name']}.collapsed").read_text()
+    # render_report draws the chart (create_plots, too quick to be sampled
+    # reliably) and then the PDF
+    assert "render_report (render_service.py" in collapsed
+    assert "create_policy_report_pdf" in collapsed
+    # The download serves the PDF built during the profile
+    assert job.artifact("pdf", lambda: b"rendered again").startswith(b"%PDF")
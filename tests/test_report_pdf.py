@@ -0,0 +1,63 @@
+import re
+
+import pypdfium2
+import pytest
+
+from conftest import analysis
+from plots.create_plots import create_plots
+from reports.create_policy_report import create_policy_report_pdf
+
+TOC_PAGE = 2
+PAGE_NUMBER = re.compile(r"^[ .]+ (\d+)$")
+
+
+@pytest.fixture(scope="module")
+def pdf():
+    # Long enough for sections to run over several pages
+    report = analysis(scale=2)
+    document = pypdfium2.PdfDocument(create_policy_report_pdf(report, create_plots(report)))
+    yield document
+    document.close()
+
+
+def page_lines(pdf):
+    return [pdf[i].get_textpage().get_text_range().splitlines() for i in range(len(pdf))]
+
+
+def toc_entries(lines):
+    """``(title, page)`` of each table of contents entry, the line before its dot leader."""
+    return [(lines[i - 1], int(match.group(1)))
+            for i, line in enumerate(lines) if (match := PAGE_NUMBER.match(line))]
+
+
+def test_every_page_numbers_itself_out_of_the_total(pdf):
+    pages = page_lines(pdf)
+    assert len(pages) > 10
+    for number, lines in enumerate(pages, 1):
+        assert lines[-1] == f"Page {number} of {len(pages)}"
+
+
+def test_toc_entries_point_to_the_page_of_their_heading(pdf):
+    pages = page_lines(pdf)
+    entries = toc_entries(pages[TOC_PAGE - 1])
+    titles = [title for title, _ in entries]
+    assert titles[:3] == ["Table of Contents", "United Nations Goal 5 Targets:", "Goal 5 Alignment Chart"]
+    assert titles[-2:] == ["Overall Assessment", "Conclusion"]
+    assert sum(title.startswith("Area of Improvement") for title in titles) == 6
+
+    for title, page in entries:
+        heading_page = next(number for number, lines in enumerate(pages, 1)
+                            if title in lines and (number != TOC_PAGE or title == "Table of Contents"))
+        assert page == heading_page, title
+
+
+def test_toc_page_numbers_sit_on_their_entry_line(pdf):
+    text = pdf[TOC_PAGE - 1].get_textpage()
+    for title, page in toc_entries(page_lines(pdf)[TOC_PAGE - 1]):
+        # The entry is the last occurrence: "Table of Contents" also heads the page
+        searcher = text.search(title)
+        matches = iter(searcher.get_next, None)
+        *_, (index, _) = matches
+        _, bottom, _, top = text.get_charbox(index)
+        line = text.get_text_bounded(bottom=bottom - 1, top=top + 1)
+        assert line.split()[-1] == str(page), title
@@ -0,0 +1,39 @@
+from process_input import ExtractedText
+from utilities.text_cache import ExtractedTextCache
+
+
+def extracted(chars):
+    return ExtractedText("x" * chars, 1, "text")
+
+
+def test_least_recently_used_text_is_evicted_past_the_budget():
+    cache = ExtractedTextCache(max_chars=10)
+    cache.set("a", extracted(4))
+    cache.set("b", extracted(4))
+    assert cache.get("a") is not None  # "b" is now the least recently used
+
+    cache.set("c", extracted(4))
+
+    assert cache.get("b") is None
+    assert cache.get("a").text == "xxxx" and cache.get("c").text == "xxxx"
+    assert cache.stats() == {"hits": 3, "misses": 1, "entries": 2, "chars": 8}
+
+
+def test_replacing_an_entry_counts_its_new_size_only():
+    cache = ExtractedTextCache(max_chars=10)
+    cache.set("a", extracted(6))
+    cache.set("a", extracted(3))
+    cache.set("b", extracted(7))
+
+    assert cache.stats()["chars"] == 10
+    assert cache.get("a") is not None and cache.get("b") is not None
+
+
+def test_text_larger_than_the_budget_is_not_cached():
+    cache = ExtractedTextCache(max_chars=10)
+    cache.set("a", extracted(5))
+    cache.set("huge", extracted(11))
+
+    assert cache.get("huge") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["chars"] == 5
@@ -0,0 +1,86 @@
+import random
+import re
+
+import pytest
+
+from utilities.topic_matcher import TOPIC_QUERIES, QuerySyntaxError, TopicMatcher, tokenize, topic_matcher
+
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\()|(\))|(\S+?)(?=[\s()]|$)')
+
+
+def term_pattern(term):
+    # Whole words, as the matcher tokenizes them: "women" is not part of "women's"
+    words = tokenize(term)
+    return re.compile(r"(?<![a-z0-9])(?<![a-z0-9]')" + r"\W+".join(map(re.escape, words))
+                      + r"(?!'?[a-z0-9])", re.IGNORECASE)
+
+
+def per_query_match(query, text):
+    """Evaluate one query on its own, with one regex search per term, as Python boolean logic."""
+    parts = []
+    for phrase, open_paren, close_paren, word in _QUERY_TOKEN.findall(query):
+        token = open_paren or close_paren or (word.lower() if word in ("AND", "OR", "NOT") else None)
+        if token is None:
+            found = bool(term_pattern(phrase or word).search(text))
+            # Adjacent terms are implicitly ANDed
+            if parts and parts[-1] not in ("(", "and", "or", "not"):
+                parts.append("and")
+            token = str(found)
+        elif token in ("(", "not") and parts and parts[-1] not in ("(", "and", "or", "not"):
+            parts.append("and")
+        parts.append(token)
+    return eval(" ".join(parts))
+
+
+def vocabulary():
+    """The words and phrases of every query, plus filler."""
+    units = set()
+    for query in TOPIC_QUERIES.values():
+        for phrase, _, _, word in _QUERY_TOKEN.findall(query):
+            if phrase or word not in ("AND", "OR", "NOT"):
+                units.add(phrase or word)
+    return sorted(units) + ["the", "state", "shall", "report", "highway", "women's", "Women", "HEALTH"] * 3
+
+
+def test_matches_per_query_evaluation_on_every_topic():
+    rng = random.Random(5)
+    units = vocabulary()
+    documents = [" ".join(rng.choice(units) for _ in range(rng.randint(3, 40))) + "." for _ in range(1500)]
+
+    outcomes = {name: set() for name in TOPIC_QUERIES}
+    for text in documents:
+        matched = topic_matcher.match(text)
+        for name, query in TOPIC_QUERIES.items():
+            assert matched[name] == per_query_match(query, text), (name, text)
+            outcomes[name].add(matched[name])
+    # Every topic was seen both matching and not matching
+    assert all(seen == {True, False} for seen in outcomes.values())
+
+
+@pytest.mark.parametrize("query, text, expected", [
+    ('"health care"', "Health\n  care for all", True),
+    ('"health care"', "healthcare", False),
+    ("women", "women's shelters", False),
+    ("women's", "Women's shelters", True),
+    ("a NOT b", "a c", True),
+    ("a NOT b", "a b", False),
+    ("a b OR c", "c", True),
+    ("a (b OR c)", "a c", True),
+    ("a (b OR c)", "c", False),
+    ("NOT (a OR b) c", "c", True),
+])
+def test_operators_phrases_and_whole_words(query, text, expected):
+    assert TopicMatcher({"q": query}).match(text) == {"q": expected}
+    assert per_query_match(query, text) == expected
+
+
+def test_classify_names_the_matching_topics():
+    matcher = TopicMatcher({"pay": "wage gap", "safety": "shelter OR refuge"})
+    assert matcher.classify("A shelter for the wage gap study") == ["pay", "safety"]
+    assert matcher.classify("Highway funds") == []
+
+
+@pytest.mark.parametrize("query", ["(a OR b", "a OR", "a )"])
+def test_malformed_queries_are_rejected(query):
+    with pytest.raises(QuerySyntaxError):
+        TopicMatcher({"bad": query})
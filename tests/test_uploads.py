@@ -0,0 +1,86 @@
+import hashlib
+import io
+
+import pytest
+from werkzeug.exceptions import UnsupportedMediaType
+
+import app
+from utilities.uploads import OLE2_SIGNATURE, UploadSpool
+
+DOCX = b"PK\x03\x04" + b"\0" * 100
+
+
+def write_in_chunks(spool, data, size):
+    for i in range(0, len(data), size):
+        spool.write(data[i:i + size])
+
+
+@pytest.mark.parametrize("size", [1, 3, 4096])
+def test_matching_signature_is_accepted_however_it_is_chunked(size):
+    spool = UploadSpool("pdf")
+    write_in_chunks(spool, b"%PDF-1.7\n" + b"x" * 50, size)
+    assert spool.size == 59
+
+
+@pytest.mark.parametrize("size", [1, 4096])
+def test_mislabelled_upload_is_refused_on_its_first_bytes(size):
+    spool = UploadSpool("pdf")
+    with pytest.raises(UnsupportedMediaType):
+        write_in_chunks(spool, b"<html>" + b"x" * 50, size)
+    # Refused before the rest of the upload was buffered
+    assert spool.size < 8
+
+
+def test_docx_renamed_to_doc_is_accepted():
+    spool = UploadSpool("doc")
+    spool.write(DOCX)
+    assert spool.read() == DOCX
+
+
+@pytest.mark.parametrize("extension", ["doc", "docx"])
+def test_legacy_ole2_word_document_is_refused(extension):
+    spool = UploadSpool(extension)
+    with pytest.raises(UnsupportedMediaType, match="Legacy Word"):
+        spool.write(OLE2_SIGNATURE + b"\0" * 100)
+
+
+def test_text_uploads_are_not_sniffed():
+    spool = UploadSpool("txt")
+    spool.write(b"\xd0\xcf plain text")
+    assert spool.read() == b"\xd0\xcf plain text"
+
+
+def test_spills_to_disk_past_the_memory_threshold():
+    data = b"%PDF-" + bytes(range(256)) * 4
+    spool = UploadSpool("pdf", max_memory=512)
+    write_in_chunks(spool, data[:512], 256)
+    assert spool.in_memory and bytes(spool.getbuffer()) == data[:512]
+
+    write_in_chunks(spool, data[512:], 256)
+
+    assert not spool.in_memory and spool.getbuffer() is None
+    spool.seek(0)
+    assert spool.read() == data
+    assert spool.digest == hashlib.sha256(data).hexdigest()
+    spool.close()
+    assert spool.closed
+
+
+def test_detached_spool_keeps_the_data():
+    spool = UploadSpool("docx")
+    spool.write(DOCX)
+    detached = spool.detach()
+    spool.close()
+
+    assert detached.read() == DOCX
+    assert detached.digest == spool.digest
+
+
+def test_analyze_refuses_a_legacy_doc_with_415():
+    client = app.app.test_client()
+    response = client.post("/analyze", data={
+        "file": (io.BytesIO(OLE2_SIGNATURE + b"\0" * 100), "bill.doc"),
+    }, content_type="multipart/form-data")
+
+    assert response.status_code == 415
+    assert "Legacy Word" in response.get_json()["error"]
@@ -1,12 +1,40 @@
 import os
 from dotenv import load_dotenv
 from pathlib import Path
-import google.generativeai as genai
+from utilities.llm_registry import registry
 
 env_path = Path('.') / '.env'
 load_dotenv(dotenv_path=env_path)
 
-genai.configure(api_key=os.environ.get('GENAI_API_KEY'))
+MODEL_NAME = "models/gemini-1.5-pro"
 
-llm = genai.GenerativeModel("models/gemini-1.5-pro")
+# Optional secondary provider for hedged requests and failover, e.g.
+# LLM_SECONDARY_PROVIDER=openai LLM_SECONDARY_MODEL=gpt-4o
+SECONDARY_PROVIDER = os.environ.get('LLM_SECONDARY_PROVIDER')
+SECONDARY_MODEL = os.environ.get('LLM_SECONDARY_MODEL')
 
+
+def analysis_model_name():
+    """Every model ``analysis_llm()`` may answer with; keys cached analyses."""
+    if not SECONDARY_PROVIDER:
+        return MODEL_NAME
+    return f"{MODEL_NAME}+{SECONDARY_PROVIDER}/{SECONDARY_MODEL}"
+
+
+def analysis_llm():
+    """The shared LLM used for policy analysis, created on first use."""
+    primary = registry.get("gemini", MODEL_NAME, api_key=os.environ.get('GENAI_API_KEY'))
+    if not SECONDARY_PROVIDER:
+        return primary
+
+    from utilities.llm_hedging import HedgedLLM
+
+    secondary = registry.get(SECONDARY_PROVIDER, SECONDARY_MODEL)
+    return registry.get_or_create(
+        ("hedged", analysis_model_name()),
+        lambda: HedgedLLM(
+            [primary, secondary],
+            hedge_percentile=float(os.environ.get('LLM_HEDGE_PERCENTILE', 0.95)),
+            max_hedge_ratio=float(os.environ.get('LLM_MAX_HEDGE_RATIO', 0.1)),
+        ),
+    )
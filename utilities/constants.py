@@ -20,4 +20,17 @@ us_states = [
     "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ",
     "NM", "NY", "NC", "ND", "OH", "OK", "OR", "PA", "RI", "SC",
     "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY"
-]
\ No newline at end of file
+]
+
+# The UN Sustainable Development Goal 5 targets, as the reports quote them
+GOAL5_TARGETS = (
+    "5.1 End all forms of discrimination against all women and girls everywhere.",
+    "5.2 Eliminate all forms of violence against all women and girls in the public and private spheres, including trafficking and sexual and other types of exploitation.",
+    "5.3 Eliminate all harmful practices, such as child, early and forced marriage and female genital mutilation.",
+    "5.4 Recognize and value unpaid care and domestic work through the provision of public services, infrastructure and social protection policies and the promotion of shared responsibility within the household and the family as nationally appropriate.",
+    "5.5 Ensure women's full and effective participation and equal opportunities for leadership at all levels of decision-making in political, economic and public life.",
+    "5.6 Ensure universal access to sexual and reproductive health and reproductive rights as agreed in accordance with the Programme of Action of the International Conference on Population and Development and the Beijing Platform for Action and the outcome documents of their review conferences.",
+    "5.A Undertake reforms to give women equal rights to economic resources, as well as access to ownership and control over land and other forms of property, financial services, inheritance and natural resources, in accordance with national laws.",
+    "5.B Enhance the use of enabling technology, in particular information and communications technology, to promote the empowerment of women.",
+    "5.C Adopt and strengthen sound policies and enforceable legislation for for the promotion of gender equality and the empowerment of all women and girls at all levels.",
+)
@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Job:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.result = None
+        self.events = []
+        self._events_changed = threading.Condition()
+        self._artifacts = {}
+        self._artifact_locks = {}
+        self._artifacts_lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def publish(self, event, data):
+        """Record a progress event for listeners of this job."""
+        with self._events_changed:
+            self.events.append((event, data))
+            self._events_changed.notify_all()
+
+    def wait_for_events(self, start, timeout=None):
+        """Return events after index ``start``, waiting up to ``timeout`` seconds for one to arrive."""
+        with self._events_changed:
+            if len(self.events) <= start and not self.finished:
+                self._events_changed.wait(timeout)
+            return self.events[start:]
+
+    def artifact(self, name, build):
+        """``build()``, a form of the result derived on first request and kept with the job.
+
+        Concurrent first requests for the same artifact build it once.
+        """
+        with self._artifacts_lock:
+            lock = self._artifact_locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._artifacts:
+                self._artifacts[name] = build()
+            return self._artifacts[name]
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Runs analysis jobs on a bounded thread pool.
+
+    At most ``max_workers`` jobs run at once and at most ``max_pending`` may be
+    queued or running; further submissions raise ``QueueFullError``. Finished
+    jobs, and whatever results they hold, are dropped ``ttl`` seconds after
+    they complete. Jobs exist only in this process: every request about a
+    job must reach the process that runs it (see gunicorn.conf.py).
+    """
+
+    def __init__(self, max_workers=4, max_pending=32, ttl=3600):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue ``fn(job, *args, **kwargs)``; its return value becomes ``job.result``."""
+        self.cleanup()
+        job = Job()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"{self._pending} analyses already in progress")
+            self._pending += 1
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.finished_at = time.time()
+            job.status = DONE
+            job.publish(DONE, job.to_dict())
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            job.error = str(e)
+            job.finished_at = time.time()
+            job.status = FAILED
+            job.publish(FAILED, job.to_dict())
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    @property
+    def pending(self):
+        """Jobs queued or running."""
+        with self._lock:
+            return self._pending
+
+    def get(self, job_id):
+        self.cleanup()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cleanup(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if expired:
+            logger.info(f"Expired {len(expired)} finished job(s)")
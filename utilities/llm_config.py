@@ -2,18 +2,32 @@ import os
 from dotenv import load_dotenv
 from pathlib import Path
 import asyncio
+import functools
+import logging
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Optional, Dict, List, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Optional, Dict, List, Union
 
-import google.generativeai as genai
-from huggingface_hub import InferenceClient
-from openai import AsyncOpenAI, OpenAI
-from PIL import Image
+# Provider SDKs are imported when a client of that provider is first created:
+# google.generativeai, openai and huggingface_hub each take hundreds of
+# milliseconds to import, and a process usually needs one of them.
+if TYPE_CHECKING:
+    from PIL import Image
+
+from utilities import metrics
+from utilities.rate_limit import CHARS_PER_TOKEN, estimate_tokens, get_limiter, is_retryable
+
+logger = logging.getLogger(__name__)
 
 
 path = Path(__file__).parent / ".env"   
 load_dotenv(dotenv_path=path)
 
+# Threads for providers that only have a blocking client.
+OFFLOAD_THREADS = int(os.environ.get("LLM_OFFLOAD_THREADS", 4))
+
 class LLMConfig:
     def __init__(self, provider: str, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None, **kwargs):
         self.provider = provider.lower()
@@ -47,8 +61,18 @@ class LLMConfig:
         return None
 
 class BaseLLM(ABC):
+    """Common interface for all providers.
+
+    ``get_response`` and ``get_aresponse`` go through the provider's shared
+    ``ProviderLimiter`` and retry rate-limit and transient errors with
+    backoff; subclasses implement the raw calls in ``_get_response`` and
+    ``_get_aresponse``. A stream is only retried if it failed before
+    yielding anything.
+    """
+
     def __init__(self, config: LLMConfig):
         self.config = config
+        self.limiter = get_limiter(config.provider)
         self.client = self._create_client()
 
     @abstractmethod
@@ -56,13 +80,79 @@ class BaseLLM(ABC):
         pass
 
     @abstractmethod
-    def get_response(self, prompt: str) -> Any:
+    def _get_response(self, prompt: str, *args, **kwargs) -> Any:
         pass
 
     @abstractmethod
-    async def get_aresponse(self, prompt: str) -> Any:
+    async def _get_aresponse(self, prompt: str, *args, **kwargs) -> Any:
         pass
 
+    def get_response(self, prompt: str, *args, **kwargs) -> Any:
+        provider = self.config.provider
+        tokens = estimate_tokens(prompt, self.config.params)
+        with metrics.LLM_REQUEST_SECONDS.time(provider=provider):
+            for attempt in range(self.limiter.max_retries + 1):
+                started = self.limiter.acquire(tokens)
+                try:
+                    response = self._get_response(prompt, *args, **kwargs)
+                except Exception as e:
+                    self.limiter.release(started, e)
+                    if attempt == self.limiter.max_retries or not is_retryable(e):
+                        metrics.LLM_ERRORS.inc(provider=provider)
+                        raise
+                    metrics.LLM_RETRIES.inc(provider=provider)
+                    delay = self.limiter.backoff(attempt, e)
+                    logger.warning(f"{provider} call failed ({e}); retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+                self.limiter.release(started)
+                self._count_tokens(prompt, len(response) if isinstance(response, str) else 0)
+                return response
+
+    async def get_aresponse(self, prompt: str, *args, **kwargs):
+        provider = self.config.provider
+        tokens = estimate_tokens(prompt, self.config.params)
+        call_started = time.perf_counter()
+        output_chars = 0
+        try:
+            for attempt in range(self.limiter.max_retries + 1):
+                started = await self.limiter.aacquire(tokens)
+                released = False
+                yielded = False
+                try:
+                    async for chunk in self._get_aresponse(prompt, *args, **kwargs):
+                        if not yielded:
+                            metrics.LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - call_started, provider=provider)
+                        yielded = True
+                        output_chars += len(chunk) if isinstance(chunk, str) else 0
+                        yield chunk
+                except Exception as e:
+                    released = True
+                    self.limiter.release(started, e)
+                    if yielded or attempt == self.limiter.max_retries or not is_retryable(e):
+                        metrics.LLM_ERRORS.inc(provider=provider)
+                        raise
+                    metrics.LLM_RETRIES.inc(provider=provider)
+                    delay = self.limiter.backoff(attempt, e)
+                    logger.warning(f"{provider} stream failed ({e}); retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                finally:
+                    if not released:
+                        self.limiter.release(started)
+                return
+        finally:
+            metrics.LLM_REQUEST_SECONDS.observe(time.perf_counter() - call_started, provider=provider)
+            self._count_tokens(prompt, output_chars)
+
+    def _count_tokens(self, prompt, output_chars):
+        prompt_chars = len(prompt) if isinstance(prompt, str) else len(str(prompt))
+        metrics.LLM_TOKENS.inc(prompt_chars // CHARS_PER_TOKEN, provider=self.config.provider, kind="prompt")
+        metrics.LLM_TOKENS.inc(output_chars // CHARS_PER_TOKEN, provider=self.config.provider, kind="completion")
+
+    async def warm_up(self) -> None:
+        """Open connections and authenticate before the first real call."""
+
     def get_model_info(self) -> Dict[str, Any]:
         return {
             "provider": self.config.provider,
@@ -72,10 +162,14 @@ class BaseLLM(ABC):
     
 class OpenAILLM(BaseLLM):
     def _create_client(self):
+        from openai import AsyncOpenAI, OpenAI
         self.sync_client = OpenAI(base_url=self.config.base_url, api_key=self.config.api_key)
         self.async_client = AsyncOpenAI(base_url=self.config.base_url, api_key=self.config.api_key)
 
-    def get_response(self, prompt: str) -> str:
+    async def warm_up(self) -> None:
+        await self.async_client.models.list()
+
+    def _get_response(self, prompt: str) -> str:
         response = self.sync_client.chat.completions.create(
             model=self.config.model,
             messages=[{"role": "user", "content": prompt}],
@@ -83,7 +177,7 @@ class OpenAILLM(BaseLLM):
         )
         return response.choices[0].message.content
 
-    async def get_aresponse(self, prompt: str):
+    async def _get_aresponse(self, prompt: str):
         stream = await self.async_client.chat.completions.create(
             model=self.config.model,
             messages=[{"role": "user", "content": prompt}],
@@ -96,35 +190,42 @@ class OpenAILLM(BaseLLM):
 
 class GeminiLLM(BaseLLM):
     def _create_client(self):
+        import google.generativeai as genai
         genai.configure(api_key=self.config.api_key)
+        self._generation_config = genai.GenerationConfig(**{k: v for k, v in self.config.params.items() if k in ['temperature', 'max_output_tokens', 'top_p', 'top_k']})
         return genai.GenerativeModel(model_name=self.config.model)
 
-    def _prepare_content(self, prompt: Union[str, List[Union[str, Image.Image]]]) -> Union[str, List[Union[str, Image.Image]]]:
+    async def warm_up(self) -> None:
+        # Authenticates and opens the channel that generate_content_async reuses
+        await self.client.count_tokens_async("warm-up")
+
+    def _prepare_content(self, prompt: Union[str, List[Union[str, "Image.Image"]]]) -> Union[str, List[Union[str, "Image.Image"]]]:
         if isinstance(prompt, str):
             return prompt
         elif isinstance(prompt, list):
+            from PIL import Image
             return [item if isinstance(item, (str, Image.Image)) else str(item) for item in prompt]
         else:
             return str(prompt)
 
-    def get_response(self, prompt: Union[str, List[Union[str, Image.Image]]]) -> str:
-        generation_config = genai.GenerationConfig(**{k: v for k, v in self.config.params.items() if k in ['temperature', 'max_output_tokens', 'top_p', 'top_k']})
+    def _get_response(self, prompt: Union[str, List[Union[str, "Image.Image"]]]) -> str:
+        generation_config = self._generation_config
         content = self._prepare_content(prompt)
         response = self.client.generate_content(content, generation_config=generation_config)
         response.resolve()
         return response.text
 
-    async def get_aresponse(self, prompt: Union[str, List[Union[str, Image.Image]]]):
-        generation_config = genai.GenerationConfig(**{k: v for k, v in self.config.params.items() if k in ['temperature', 'max_output_tokens', 'top_p', 'top_k']})
+    async def _get_aresponse(self, prompt: Union[str, List[Union[str, "Image.Image"]]]):
+        generation_config = self._generation_config
         content = self._prepare_content(prompt)
-        response = self.client.generate_content(content, generation_config=generation_config, stream=True)
-        for chunk in response:
+        response = await self.client.generate_content_async(content, generation_config=generation_config, stream=True)
+        async for chunk in response:
             yield chunk.text
-            await asyncio.sleep(0.01)
 
 class SDXLLLM(BaseLLM):
     
     def _create_client(self):
+        from huggingface_hub import InferenceClient
         return InferenceClient(model=self.config.model, token=self.config.api_key)
 
     def _generate_filename(self, prompt: str) -> str:
@@ -136,12 +237,13 @@ class SDXLLLM(BaseLLM):
         prompt_part = prompt_part.replace(" ", "_")
         return f"{timestamp}_{prompt_part}.jpg"
 
-    def get_response(self, prompt: str, save_dir: str = "./generated_images") -> str:
+    def _get_response(self, prompt: str, save_dir: str = "./generated_images") -> str:
         try:
             # Ensure the save directory exists
             os.makedirs(save_dir, exist_ok=True)
 
             image = self.client.text_to_image(prompt, **self.config.params)
+            from PIL import Image
             if isinstance(image, Image.Image):
                 filename = self._generate_filename(prompt)
                 image_path = os.path.join(save_dir, filename)
@@ -152,17 +254,21 @@ class SDXLLLM(BaseLLM):
         except Exception as e:
             return f"Error generating image: {str(e)}"
 
-    async def get_aresponse(self, prompt: str, save_dir: str = "./generated_images"):
-        # SDXL doesn't support async streaming, so we'll return the full response
-        yield self.get_response(prompt, save_dir)
+    async def _get_aresponse(self, prompt: str, save_dir: str = "./generated_images"):
+        # SDXL doesn't support async streaming; generate in an offload thread and return the full response
+        yield await offload(self._get_response, prompt, save_dir)
 
 class HFOpenAIAPILLM(BaseLLM):
     def _create_client(self):
         base_url = f"https://api-inference.huggingface.co/models/{self.config.model}/v1/"
+        from openai import AsyncOpenAI, OpenAI
         self.sync_client = OpenAI(base_url=base_url, api_key=self.config.api_key)
         self.async_client = AsyncOpenAI(base_url=base_url, api_key=self.config.api_key)
 
-    def get_response(self, prompt: str) -> str:
+    async def warm_up(self) -> None:
+        await self.async_client.models.list()
+
+    def _get_response(self, prompt: str) -> str:
         response = self.sync_client.chat.completions.create(
             model=self.config.model,
             messages=[{"role": "user", "content": prompt}],
@@ -171,7 +277,7 @@ class HFOpenAIAPILLM(BaseLLM):
         )
         return response.choices[0].message.content
 
-    async def get_aresponse(self, prompt: str):
+    async def _get_aresponse(self, prompt: str):
         stream = await self.async_client.chat.completions.create(
             model=self.config.model,
             messages=[{"role": "user", "content": prompt}],
@@ -184,10 +290,14 @@ class HFOpenAIAPILLM(BaseLLM):
 
 class Ollama(BaseLLM):
     def _create_client(self):
+        from openai import AsyncOpenAI, OpenAI
         self.sync_client = OpenAI(base_url=self.config.base_url, api_key=self.config.api_key)
         self.async_client = AsyncOpenAI(base_url=self.config.base_url, api_key=self.config.api_key)
 
-    def get_response(self, prompt: str) -> str:
+    async def warm_up(self) -> None:
+        await self.async_client.models.list()
+
+    def _get_response(self, prompt: str) -> str:
         response = self.sync_client.chat.completions.create(
             model=self.config.model,
             messages=[{"role": "user", "content": prompt}],
@@ -196,7 +306,7 @@ class Ollama(BaseLLM):
         )
         return response.choices[0].message.content
 
-    async def get_aresponse(self, prompt: str):
+    async def _get_aresponse(self, prompt: str):
         stream = await self.async_client.chat.completions.create(
             model=self.config.model,
             messages=[{"role": "user", "content": prompt}],
@@ -209,9 +319,11 @@ class Ollama(BaseLLM):
 
 class HFTextLLM(BaseLLM):
     def _create_client(self):
+        from huggingface_hub import AsyncInferenceClient, InferenceClient
+        self.async_client = AsyncInferenceClient(model=self.config.model, token=self.config.api_key)
         return InferenceClient(model=self.config.model, token=self.config.api_key)
 
-    def get_response(self, prompt: str) -> str:
+    def _get_response(self, prompt: str) -> str:
         parameters = {k: v for k, v in self.config.params.items() if k in ['temperature', 'max_new_tokens', 'top_p', 'top_k', 'tools', 'tool_choice', 'tool_prompt']}
         response = self.client.text_generation(prompt, **parameters)
         if 'tools' in self.config.params:
@@ -219,11 +331,11 @@ class HFTextLLM(BaseLLM):
         else:
             return response
 
-    async def get_aresponse(self, prompt: str):
+    async def _get_aresponse(self, prompt: str):
         parameters = {k: v for k, v in self.config.params.items() if k in ['temperature', 'max_new_tokens', 'top_p', 'top_k', 'tools', 'tool_choice', 'tool_prompt']}
-        parameters['stream'] = True
-        async for response in self.client.text_generation(prompt, **parameters, stream=True):
-            yield response
+        stream = await self.async_client.text_generation(prompt, stream=True, **parameters)
+        async for token in stream:
+            yield token
 
 
 class LLMFactory:
@@ -251,20 +363,98 @@ def batch_process(llm: BaseLLM, prompts: List[str]) -> List[str]:
     """Process a batch of prompts and return their responses."""
     return [llm.get_response(prompt) for prompt in prompts]
 
-async def batch_process_async(llm: BaseLLM, prompts: List[str]) -> List[str]:
-    """Process a batch of prompts asynchronously and return their responses."""
-    async def process_prompt(prompt):
-        result = ""
-        async for chunk in llm.get_aresponse(prompt):
-            result += chunk
-        return result
-    
-    return await asyncio.gather(*[process_prompt(prompt) for prompt in prompts])
+async def gather_limited(fn, items, max_concurrency: Optional[int] = None) -> List[Any]:
+    """Await ``fn(item)`` for every item and return the results in order.
+
+    At most ``max_concurrency`` calls are in flight at once; None means no limit.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    async def limited(item):
+        async with semaphore:
+            return await fn(item)
+
+    if semaphore is None:
+        return await asyncio.gather(*[fn(item) for item in items])
+    return await asyncio.gather(*[limited(item) for item in items])
+
+async def batch_process_async(llm: BaseLLM, prompts: List[str], max_concurrency: Optional[int] = None) -> List[str]:
+    """Process a batch of prompts asynchronously and return their responses.
+
+    At most ``max_concurrency`` prompts are in flight at once; None means no limit.
+    """
+    return await gather_limited(lambda prompt: collect_response(llm, prompt), prompts, max_concurrency)
+
+async def collect_response(llm: BaseLLM, prompt: str) -> str:
+    """Await the complete streamed response to one prompt."""
+    chunks = []
+    async for chunk in llm.get_aresponse(prompt):
+        chunks.append(chunk)
+    return "".join(chunks)
 
 def compare_responses(llms: List[BaseLLM], prompt: str) -> Dict[str, str]:
     """Compare responses from multiple LLMs for the same prompt."""
     return {llm.get_model_info()['model']: llm.get_response(prompt) for llm in llms}
 
+_loop = None
+_loop_lock = threading.Lock()
+_offload_executor = None
+
+def _reset_after_fork():
+    # Threads do not survive fork: a worker forked from a preloaded master
+    # starts its own loop and offload pool on first use.
+    global _loop, _loop_lock, _offload_executor
+    _loop = None
+    _loop_lock = threading.Lock()
+    _offload_executor = None
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+async def offload(fn, *args, **kwargs):
+    """Run a blocking provider call on a small dedicated thread pool.
+
+    The pool is bounded by ``OFFLOAD_THREADS`` so blocking clients cannot
+    exhaust the default executor that extraction and other work share.
+    """
+    global _offload_executor
+    with _loop_lock:
+        if _offload_executor is None:
+            _offload_executor = ThreadPoolExecutor(OFFLOAD_THREADS, thread_name_prefix="llm-offload")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_offload_executor, functools.partial(fn, *args, **kwargs))
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide event loop that runs async LLM calls for synchronous callers.
+
+    Async clients (gRPC channels, HTTP pools) bind to the loop they are first
+    used on, so every bridged call goes through this one long-lived loop.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True).start()
+    return _loop
+
+def run_async(coro):
+    """Run ``coro`` on the shared LLM event loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+async def _next_chunk(stream):
+    return await stream.__anext__()
+
+def iter_response(llm: BaseLLM, prompt: str):
+    """Drive ``llm.get_aresponse`` from synchronous code, yielding chunks as they arrive."""
+    stream = llm.get_aresponse(prompt)
+    try:
+        while True:
+            try:
+                yield run_async(_next_chunk(stream))
+            except StopAsyncIteration:
+                break
+    finally:
+        run_async(stream.aclose())
+
 async def stream_to_file(llm: BaseLLM, prompt: str, filename: str):
     """Stream the LLM response to a file."""
     with open(filename, 'w') as f:
@@ -0,0 +1,285 @@
+"""Hedged requests and failover across several LLM providers.
+
+``HedgedLLM`` wraps an ordered list of ``BaseLLM`` instances. A call goes
+to the first provider whose circuit is closed. If no chunk has arrived once
+the call has waited longer than that provider's recent ``hedge_percentile``
+time-to-first-chunk, one duplicate request is sent to the next provider,
+and whichever streams a non-empty first chunk first wins; the other request
+is cancelled. Hedging is capped at ``max_hedge_ratio`` of all calls, so
+average cost rises by about that fraction at most.
+
+Each provider has a ``CircuitBreaker``: after ``failure_threshold``
+consecutive failures it is skipped for ``reset_timeout`` seconds, then a
+single trial call decides whether it is used again. A call whose provider
+fails before streaming anything moves on to the next provider.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+from utilities.llm_config import collect_response, run_async
+
+logger = logging.getLogger(__name__)
+
+HEDGE_PERCENTILE = 0.95
+MIN_SAMPLES = 20
+# Hedge delay used until a provider has MIN_SAMPLES latencies recorded.
+DEFAULT_HEDGE_DELAY = 10.0
+MAX_HEDGE_RATIO = 0.1
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class NoProviderAvailable(RuntimeError):
+    """Every provider's circuit is open or every provider failed."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may be sent now; in half-open state only one trial at a time."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """A trial call ended without an outcome (it was cancelled)."""
+        with self._lock:
+            self._trial_running = False
+
+
+class LatencyTracker:
+    """Recent time-to-first-chunk samples of one provider."""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q, default):
+        with self._lock:
+            if len(self._samples) < MIN_SAMPLES:
+                return default
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _rounded(value):
+    return None if value is None else round(value, 3)
+
+
+class _Attempt:
+    """One provider's stream, started in the background up to its first chunk."""
+
+    def __init__(self, index, llm, prompt):
+        self.index = index
+        self.stream = llm.get_aresponse(prompt)
+        self.started = time.monotonic()
+        self.task = asyncio.ensure_future(self._first_chunk())
+
+    async def _first_chunk(self):
+        async for chunk in self.stream:
+            if chunk:
+                return chunk
+        raise ValueError("empty response")
+
+    async def cancel(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except BaseException:
+            pass
+        await self.stream.aclose()
+
+
+class HedgedLLM:
+    """Composite provider with hedging, failover and per-provider circuit breakers.
+
+    It offers the public interface of ``BaseLLM`` (``get_response``,
+    ``get_aresponse``, ``get_model_info``, ``warm_up``) but is not one: rate
+    limiting, retries and the raw calls stay with the wrapped providers.
+    """
+
+    def __init__(self, providers, hedge_percentile=HEDGE_PERCENTILE, default_hedge_delay=DEFAULT_HEDGE_DELAY,
+                 max_hedge_ratio=MAX_HEDGE_RATIO, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        if not providers:
+            raise ValueError("HedgedLLM needs at least one provider")
+        self.providers = list(providers)
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.breakers = [CircuitBreaker(failure_threshold, reset_timeout) for _ in self.providers]
+        self.latencies = [LatencyTracker() for _ in self.providers]
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    async def warm_up(self):
+        """Nothing to do: the providers are registered, and warmed up, on their own."""
+
+    def get_model_info(self):
+        models = [llm.get_model_info() for llm in self.providers]
+        return {
+            "provider": "hedged",
+            "model": "+".join(info["model"] for info in models),
+            "models": models,
+        }
+
+    def get_response(self, prompt, *args, **kwargs):
+        return run_async(collect_response(self, prompt))
+
+    def _next_provider(self, after):
+        for index in range(after + 1, len(self.providers)):
+            if self.breakers[index].allow():
+                return index
+        return None
+
+    def _may_hedge(self):
+        with self._lock:
+            if self.hedges < self.max_hedge_ratio * self.calls:
+                self.hedges += 1
+                return True
+            return False
+
+    def _settle(self, attempt, error=None):
+        if error is None:
+            self.breakers[attempt.index].record_success()
+            self.latencies[attempt.index].add(time.monotonic() - attempt.started)
+        elif isinstance(error, asyncio.CancelledError):
+            self.breakers[attempt.index].release()
+        else:
+            logger.warning(f"Provider {attempt.index} failed: {error}")
+            self.breakers[attempt.index].record_failure()
+
+    async def _first_response(self, prompt):
+        """Race providers until one streams a first chunk; return (attempt, chunk)."""
+        with self._lock:
+            self.calls += 1
+        index = self._next_provider(-1)
+        if index is None:
+            raise NoProviderAvailable("All LLM providers are unavailable")
+        running = [_Attempt(index, self.providers[index], prompt)]
+        hedged = False
+        last_error = None
+
+        while running:
+            primary = running[0]
+            timeout = None
+            if not hedged and len(running) == 1:
+                delay = self.latencies[primary.index].percentile(self.hedge_percentile, self.default_hedge_delay)
+                timeout = max(0.0, delay - (time.monotonic() - primary.started))
+            try:
+                done, _ = await asyncio.wait([a.task for a in running], timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+            except asyncio.CancelledError:
+                for attempt in running:
+                    await attempt.cancel()
+                    self._settle(attempt, asyncio.CancelledError())
+                raise
+
+            if not done:
+                # The primary is slower than usual: hedge once, if the budget allows
+                hedged = True
+                index = self._next_provider(primary.index)
+                if index is not None:
+                    if self._may_hedge():
+                        logger.info(f"Hedging slow provider {primary.index} with provider {index}")
+                        running.append(_Attempt(index, self.providers[index], prompt))
+                    else:
+                        # allow() may have claimed the provider's half-open trial
+                        self.breakers[index].release()
+                continue
+
+            for attempt in [a for a in running if a.task in done]:
+                running.remove(attempt)
+                error = attempt.task.exception()
+                self._settle(attempt, error)
+                if error is None:
+                    for loser in running:
+                        await loser.cancel()
+                        self._settle(loser, asyncio.CancelledError())
+                    if attempt is not primary:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return attempt, attempt.task.result()
+                last_error = error
+
+            if not running:
+                # Every running attempt failed before streaming: fail over
+                index = self._next_provider(attempt.index)
+                if index is not None:
+                    with self._lock:
+                        self.failovers += 1
+                    logger.warning(f"Failing over to provider {index}")
+                    running.append(_Attempt(index, self.providers[index], prompt))
+
+        raise NoProviderAvailable(f"All LLM providers failed: {last_error}") from last_error
+
+    async def get_aresponse(self, prompt, *args, **kwargs):
+        attempt, chunk = await self._first_response(prompt)
+        try:
+            yield chunk
+            async for chunk in attempt.stream:
+                yield chunk
+        except Exception:
+            self.breakers[attempt.index].record_failure()
+            raise
+        finally:
+            await attempt.stream.aclose()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "failovers": self.failovers,
+                "providers": [
+                    {
+                        "model": llm.config.model,
+                        "circuit": breaker.state,
+                        "first_chunk_p{:.0f}".format(self.hedge_percentile * 100):
+                            _rounded(tracker.percentile(self.hedge_percentile, None)),
+                    }
+                    for llm, breaker, tracker in zip(self.providers, self.breakers, self.latencies)
+                ],
+            }
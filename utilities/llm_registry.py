@@ -0,0 +1,103 @@
+"""Process-wide registry of LLM clients.
+
+Building a provider client is not free: the OpenAI-style clients open an
+HTTP connection pool, Gemini configures credentials and a gRPC channel on
+first use. ``LLMRegistry.get`` creates one ``BaseLLM`` per distinct
+``LLMConfig`` (provider, model, endpoint, key and parameters) the first time
+it is asked for and hands the same instance to every later caller, so its
+keep-alive connections are reused across requests. ``warm_up`` opens those
+connections and authenticates ahead of traffic, on the shared LLM event loop
+that later calls run on.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+from utilities.llm_config import LLMConfig, LLMFactory, get_event_loop, run_async
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_TIMEOUT = float(os.environ.get("LLM_WARM_UP_TIMEOUT", 15))
+
+
+def config_key(config):
+    params = json.dumps(config.params, sort_keys=True, default=str)
+    return (config.provider, config.model, config.base_url, config.api_key, params)
+
+
+class LLMRegistry:
+    def __init__(self):
+        self._llms = {}
+        self._lock = threading.Lock()
+        self.warm_ups = {}
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # Connections and gRPC channels must not be shared with the parent
+        self._llms = {}
+        self._lock = threading.Lock()
+        self.warm_ups = {}
+
+    def get_or_create(self, key, factory):
+        """The instance registered under ``key``, built with ``factory()`` on first use."""
+        with self._lock:
+            llm = self._llms.get(key)
+            if llm is None:
+                llm = factory()
+                self._llms[key] = llm
+            return llm
+
+    def get(self, provider, model, **kwargs):
+        """The shared client for this provider, model and configuration."""
+        config = LLMConfig(provider, model, **kwargs)
+        return self.get_or_create(config_key(config), lambda: LLMFactory.create_llm(config))
+
+    def clear(self):
+        """Forget every client, e.g. in a freshly forked worker."""
+        with self._lock:
+            self._llms.clear()
+            self.warm_ups.clear()
+
+    async def _warm_up_one(self, key, llm):
+        name = f"{key[0]}/{key[1]}"
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(llm.warm_up(), WARM_UP_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Warm-up of {name} failed: {e!r}")
+            return
+        self.warm_ups[name] = round(time.monotonic() - started, 3)
+        logger.info(f"Warmed up {name} in {self.warm_ups[name]}s")
+
+    async def _warm_up_all(self):
+        with self._lock:
+            llms = list(self._llms.items())
+        await asyncio.gather(*[self._warm_up_one(key, llm) for key, llm in llms])
+
+    def warm_up(self):
+        """Open connections for every registered client and wait until done."""
+        run_async(self._warm_up_all())
+
+    def warm_up_in_background(self, *factories):
+        """Create clients with ``factories`` and warm them up without blocking the caller."""
+        def run():
+            for factory in factories:
+                try:
+                    factory()
+                except Exception as e:
+                    logger.warning(f"Could not create LLM client: {e}")
+            self.warm_up()
+
+        get_event_loop()
+        threading.Thread(target=run, name="llm-warm-up", daemon=True).start()
+
+    def stats(self):
+        with self._lock:
+            clients = [f"{key[0]}/{key[1]}" for key in self._llms]
+        return {"clients": clients, "warm_up_seconds": dict(self.warm_ups)}
+
+
+registry = LLMRegistry()
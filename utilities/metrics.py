@@ -0,0 +1,185 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+``Counter`` and ``Histogram`` are minimal, thread-safe stand-ins for the
+prometheus_client types, so no extra dependency is needed. Values that
+other components already count (cache hits, rate-limit stats) are read at
+scrape time through collectors registered with ``register_collector``.
+``render`` produces the body served at ``/metrics``.
+
+Each process keeps its own values: with several gunicorn workers, every
+worker reports only the requests it served.
+"""
+import bisect
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Seconds; analysis stages range from milliseconds (parsing) to minutes (LLM calls).
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+_metrics = []
+_collectors = []
+_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        with _lock:
+            _metrics.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [per-bucket counts, sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+        with _lock:
+            _metrics.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            entry[0][bisect.bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the ``with`` block, also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            return entry[2] if entry else 0
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+def register_collector(collector):
+    """Add ``collector()``, called at scrape time, returning ``(name, type, help, samples)``
+    tuples where ``samples`` is a list of ``(labels dict, value)``."""
+    with _lock:
+        _collectors.append(collector)
+
+
+def render():
+    lines = []
+    with _lock:
+        metrics = list(_metrics)
+        collectors = list(_collectors)
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples())
+    for collector in collectors:
+        try:
+            families = list(collector())
+        except Exception as e:
+            logger.warning(f"Metrics collector {collector.__name__} failed: {e}")
+            continue
+        for name, metric_type, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "analysis_stage_seconds",
+    "Time spent in each stage of an analysis: upload, process_input, prompt, parse, render_queue, create_plots, create_pdf.",
+    ["stage"],
+)
+LLM_FIRST_TOKEN_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from starting an LLM call, including rate-limit waits, to its first streamed chunk.",
+    ["provider"],
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_seconds", "Total duration of LLM calls, including retries.", ["provider"]
+)
+LLM_RETRIES = Counter("llm_retries_total", "LLM calls retried after a rate-limit or transient error.", ["provider"])
+LLM_ERRORS = Counter("llm_errors_total", "LLM calls that failed after all retries.", ["provider"])
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens sent to and received from LLM providers, estimated from characters.", ["provider", "kind"]
+)
+EXTERNAL_SECONDS = Histogram(
+    "external_request_seconds", "Duration of calls to external APIs.", ["service", "operation"]
+)
+
+
+def stage(name):
+    """Time an analysis stage: ``with metrics.stage("parse"): ...``."""
+    return STAGE_SECONDS.time(stage=name)
@@ -3,8 +3,31 @@ import json
 import json_repair
 import logging
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements, json is the fallback
+    orjson = None
+
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+
+_FENCE = "```"
+_JSON_FENCE = "```json"
+_OPENERS = {"{": "}", "[": "]"}
+_OPEN = re.compile(r"[{\[]")
+_WHITESPACE = re.compile(r"\s*")
+_TAIL = re.compile(r"\s*(?:```\s*)?\Z")
+# Characters that matter outside and inside JSON strings; everything else is skipped in C.
+_STRUCTURAL = re.compile(r'["{}\[\],:`]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+# Where a top-level member of each kind of container can end
+_BOUNDARIES = {"{": re.compile(r"[,}]"), "[": re.compile(r"[,\]]")}
+
+
+def _loads(fragment):
+    if orjson is not None:
+        return orjson.loads(fragment)
+    return json.loads(fragment)
+
 
 def extract_json_from_string(s):
     match = re.search(r'\[[\s\S]*\]', s)
@@ -12,57 +35,492 @@ def extract_json_from_string(s):
         return match.group(0)
     return None
 
+
+def _find_payload(output, start=0, final=True):
+    """Locate the bracket that opens the JSON payload of an LLM response.
+
+    A response that starts with a bracket is the payload itself. Otherwise a
+    bracket inside a ``` fence wins over one in the prose around it, so a
+    ``[note]`` ahead of the fenced block is not taken for the payload.
+    Returns ``(index, in_prose)``, with index -1 when there is no payload
+    (yet: unless ``final``, a fence whose bracket has not arrived is waited for).
+    """
+    first = _WHITESPACE.match(output, start).end()
+    if first == len(output):
+        return -1, False
+    if output[first] in _OPENERS:
+        return first, False
+
+    fence = output.find(_FENCE, start)
+    if fence != -1:
+        match = _OPEN.search(output, fence + len(_FENCE))
+        if match:
+            return match.start(), False
+        if not final:
+            return -1, False
+
+    match = _OPEN.search(output, start)
+    if not match:
+        return -1, False
+    return match.start(), True
+
+
+def _payload_end(output, start):
+    """End bound of the payload opened at ``start``: its last closer, before the closing fence if fenced."""
+    limit = len(output)
+    fence = output.rfind(_FENCE, 0, start)
+    if fence != -1:
+        closing_fence = output.find(_FENCE, start)
+        if closing_fence != -1:
+            limit = closing_fence
+
+    end = output.rfind(_OPENERS[output[start]], start, limit)
+    return end + 1 if end != -1 else None
+
+
+def _member_end(text, i):
+    """Index of the ``,`` or closer that ends a member starting at ``i``, or None if the text ends first.
+
+    Scans from a clean state, as if ``i`` followed a top-level boundary.
+    """
+    depth = 1
+    while True:
+        match = _STRUCTURAL.search(text, i)
+        if not match:
+            return None
+        i = match.start()
+        c = text[i]
+        if c == '"':
+            i += 1
+            while True:
+                match = _STRING_SPECIAL.search(text, i)
+                if not match:
+                    return None
+                i = match.end() + (text[match.start()] == "\\")
+                if text[match.start()] == '"':
+                    break
+            continue
+        if c in "{[":
+            depth += 1
+        elif c in "}]":
+            depth -= 1
+            if depth == 0:
+                return i
+        elif c == "," and depth == 1:
+            return i
+        i += 1
+
+
+def _payload_bounds(output):
+    """Locate the JSON payload in an LLM response without copying it.
+
+    Returns ``(start, end)`` slice bounds, where ``end`` is None when no
+    matching closer was found (e.g. a truncated response).
+    """
+    start, _ = _find_payload(output)
+    if start == -1:
+        return None, None
+    return start, _payload_end(output, start)
+
+
 def parse_output_json(output):
-    print("Entered parse_output_json")
-    print(f"Received output: {output[:100]}...")  # Log first 100 characters
+    """Decode the JSON payload of an LLM response.
 
+    The payload (bare, fenced or wrapped in prose) is located with a single
+    scan and decoded in one go. If that fails, the payload is split into its
+    top-level members and only the members that do not decode, or a
+    truncated last member, go through ``json_repair``.
+    """
     if isinstance(output, (list, dict)):
-        print("Input is already a list or dict, returning as is.")
         return output
 
     if not isinstance(output, str):
-        print(f"Unexpected input type: {type(output)}")
+        logger.warning(f"Unexpected input type: {type(output)}")
         return None
 
-    # Function to try parsing JSON
-    def try_json_parse(json_str):
+    start, end = _payload_bounds(output)
+    if start is None:
         try:
-            return json.loads(json_str)
-        except json.JSONDecodeError:
+            return _loads(output.strip())
+        except ValueError:
+            pass
+        try:
+            return json_repair.loads(output)
+        except Exception as e:
+            logger.warning(f"Failed to parse JSON: {e}")
             return None
 
-    # 1. Try parsing the entire string as JSON
-    parsed = try_json_parse(output)
-    print("Parsed: ", parsed)   
-    if parsed:
-        print("Parsed JSON: ", parsed)
-        return parsed
-
-    # 2. Try to extract JSON from markdown code blocks
-    json_block_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', output)
-    if json_block_match:
-        json_str = json_block_match.group(1)
-        parsed = try_json_parse(json_str)
-        if parsed:
-            print("Parsed JSON block: ", parsed)
-            return parsed
-
-    # 3. Try to extract anything that looks like a JSON object or array
-    json_like_match = re.search(r'\{[\s\S]*\}|\[[\s\S]*\]', output)
-    if json_like_match:
-        json_str = json_like_match.group(0)
-        parsed = try_json_parse(json_str)
-        if parsed:
-            print("Parsed JSON-like: ", parsed)
-            return parsed
-
-    # 4. If all else fails, try to repair and parse the JSON
-    try:
-        repaired_json = json_repair.loads(output)
-        print("Repaired JSON: ", repaired_json)
-        return repaired_json
-    except Exception as e:
-        print(f"Error: {e}")
-
-    print("Failed to parse JSON in all attempts.")
-    return None
\ No newline at end of file
+    if end is not None:
+        try:
+            return _loads(output[start:end])
+        except ValueError as e:
+            logger.debug(f"Payload did not decode cleanly ({e}); repairing")
+
+    # The scanner finds the real end of the payload itself, which matters
+    # for truncated responses where the last closer belongs to an inner value.
+    parser = IncrementalJSONParser()
+    parser.feed(output)
+    parsed = parser.close()
+    if parsed is None:
+        logger.warning("Failed to parse JSON in all attempts.")
+    return parsed
+
+
+class IncrementalJSONParser:
+    """Single-pass scanner for a JSON payload that arrives in chunks.
+
+    Text around the payload (a ```json fence or prose) is skipped as in
+    ``parse_output_json``; a bracket in the prose is only used until a fence
+    shows up. ``feed`` returns each top-level ``(key, value)`` member of an
+    object as soon as its value is complete, so callers can act on report
+    sections while the response is still streaming; array payloads yield
+    ``(None, item)``.
+
+    A member that fails to decode, typically over an unescaped quote, is
+    repaired on its own: from its start up to the first later boundary that
+    is followed by a member that decodes cleanly, or by the end of the
+    payload. Scanning resumes after that boundary, since the quote may have
+    thrown off where the scanner thought strings and members ended. Only if
+    that fails, or the damaged payload was a bracket in prose, does ``close``
+    repair the whole payload. ``close`` returns the whole decoded payload.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+        self._search_from = 0
+        self._restart_at = None
+        self._reset()
+
+    def _reset(self):
+        self._container = None
+        self._payload_start = None
+        self._in_prose = False
+        self._end = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._key = None
+        self._member_start = None
+        self._value_start = None
+        self._repair_from = None
+        self._repair_at = None
+        self.members = []
+        self.repaired = 0
+        self.damaged = False
+        self.done = False
+
+    @property
+    def text(self):
+        """Everything fed so far."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, chunk):
+        """Add a chunk of the response and return the members it completed."""
+        self._chunks.append(chunk)
+        base = self._offset
+        self._offset += len(chunk)
+
+        if self._container is None:
+            completed = self._seek()
+        elif self._repair_from is not None:
+            # Waiting for the member after a damaged one: only a boundary can complete it
+            completed = self._recover([]) if _BOUNDARIES[self._container].search(chunk) else []
+        elif not self.done:
+            completed = self._recover(self._scan(chunk, base, 0))
+        else:
+            completed = []
+
+        while True:
+            if self._restart_at is None and self.done and self._in_prose:
+                fence = self.text.find(_FENCE, self._end)
+                if fence != -1:
+                    self._restart_at = fence
+            if self._restart_at is None:
+                return completed
+            # The bracket was in prose ahead of a fenced block: parse the block instead
+            self._search_from, self._restart_at = self._restart_at, None
+            self._reset()
+            completed = self._seek()
+
+    def close(self):
+        """Finish the stream and return the decoded payload, or None if there was none."""
+        if self._container is None:
+            self._seek(final=True)
+        if self._container is None:
+            text = self.text.strip()
+            try:
+                return _loads(text) if text else None
+            except ValueError:
+                return None
+
+        while not (self.done or self.damaged):
+            if self._repair_from is None:
+                text = self.text
+                end = _payload_end(text, self._payload_start)
+                if self._in_string and not self._in_prose and end is not None and _TAIL.match(text, end):
+                    # The payload is complete, so an odd number of unescaped
+                    # quotes left the scanner inside a string
+                    self._repair_from = self._repair_at = self._member_start
+                else:
+                    # Truncated response: repair whatever is left of the last member.
+                    self._finish_member(self._offset, [], truncated=True)
+                    self.done = True
+                    break
+            self._recover([], final=True)
+
+        if self.damaged:
+            logger.debug("Payload structure is damaged; repairing it as a whole")
+            text = self.text
+            start = self._payload_start
+            fence = text.rfind(_JSON_FENCE, self._search_from, start)
+            if fence != -1 and _WHITESPACE.match(text, fence + len(_JSON_FENCE)).end() == start:
+                # json_repair takes a faster path for a ```json block than for the bare payload
+                start = fence
+            end = _payload_end(text, self._payload_start)
+            if end is None or _TAIL.match(text, end):
+                end = len(text)  # nothing but the closing fence follows; spares a copy of the text
+            try:
+                return json_repair.loads(text[start:end])
+            except Exception as e:
+                logger.warning(f"Failed to repair JSON: {e}")
+                return None
+
+        if self._container == "{":
+            return {key: value for key, value in self.members}
+        return [value for _, value in self.members]
+
+    def _seek(self, final=False):
+        text = self.text
+        start, in_prose = _find_payload(text, self._search_from, final)
+        if start == -1:
+            return []
+        self._container = text[start]
+        self._payload_start = start
+        self._in_prose = in_prose
+        self._depth = 1
+        self._member_start = start + 1
+        return self._recover(self._scan(text, 0, start + 1))
+
+    def _scan(self, chunk, base, i):
+        completed = []
+        length = len(chunk)
+        while i < length:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    i += 1
+                    continue
+                match = _STRING_SPECIAL.search(chunk, i)
+                if not match:
+                    break
+                i = match.start()
+                if chunk[i] == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
+                    if self._awaiting_key():
+                        self._key = self._decode_key(base + i + 1)
+                i += 1
+                continue
+
+            match = _STRUCTURAL.search(chunk, i)
+            if not match:
+                break
+            i = match.start()
+            c = chunk[i]
+            if c == '"':
+                self._in_string = True
+                self._string_start = base + i
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_member(base + i, completed)
+                    if self._repair_from is not None:
+                        return completed
+                    self._end = base + i + 1
+                    self.done = True
+                    break
+            elif c == "`":
+                # Backticks are not JSON: this was prose, and a fence follows
+                if self._in_prose:
+                    self._restart_at = base + i
+                    return []
+            elif self._depth == 1:
+                if c == ":" and self._container == "{":
+                    self._value_start = base + i + 1
+                elif c == ",":
+                    self._finish_member(base + i, completed)
+                    if self._repair_from is not None:
+                        return completed
+                    self._member_start = base + i + 1
+            i += 1
+        return completed
+
+    def _awaiting_key(self):
+        return self._depth == 1 and self._container == "{" and self._key is None and self._value_start is None
+
+    def _decode_key(self, end):
+        try:
+            return _loads(self.text[self._string_start:end])
+        except ValueError:
+            return None  # the member is repaired when it ends
+
+    def _finish_member(self, end, completed, truncated=False):
+        start = self._value_start if self._container == "{" else self._member_start
+        member_start, self._key, key, self._value_start = self._member_start, None, self._key, None
+        if self.damaged:
+            return
+        text = self.text
+
+        if truncated:
+            self._repair_truncated(text[member_start:end])
+        elif start is not None:
+            if _WHITESPACE.match(text, start).end() >= end:
+                return
+            if self._container == "{" and key is None:
+                self._failed(member_start, end)
+                return
+            try:
+                value = _loads(text[start:end])
+            except ValueError:
+                # Possibly an unescaped quote, which also throws off where members end
+                self._failed(member_start, end)
+                return
+            self.members.append((key, value))
+            completed.append((key, value))
+        elif _WHITESPACE.match(text, member_start).end() < end:
+            # Object member with no colon, e.g. an unquoted key
+            self._failed(member_start, end)
+
+    def _failed(self, member_start, end):
+        if self._in_prose:
+            # Likely not the payload at all; a fence may still follow
+            self.damaged = True
+        else:
+            self._repair_from, self._repair_at = member_start, end
+
+    def _recover(self, completed, final=False):
+        """Repair the damaged member, if any, and resume scanning after it.
+
+        Without ``final``, a boundary whose next member has not fully arrived
+        is waited for. Returns ``completed`` with the members added.
+        """
+        while self._repair_from is not None:
+            text = self.text
+            payload_end = _payload_end(text, self._payload_start) if final else None
+            boundaries = _BOUNDARIES[self._container]
+            i = self._repair_at
+            while True:
+                match = boundaries.search(text, i)
+                if match is None or (payload_end is not None and match.start() >= payload_end):
+                    if not final:
+                        self._repair_at = i
+                        return completed
+                    # No later boundary holds: the rest of the payload is the damaged region
+                    end = payload_end - 1 if payload_end is not None else len(text)
+                    if not self._repair_truncated(text[self._repair_from:end]):
+                        self.damaged = True
+                    self._repair_from = None
+                    self._end = payload_end
+                    self.done = True
+                    return completed
+                boundary = match.start()
+                members = self._repair_through(text, boundary, payload_end, final)
+                if members is None:
+                    self._repair_at = boundary
+                    return completed
+                if members:
+                    break
+                i = boundary + 1
+
+            self._repair_from = None
+            self.members.extend(members)
+            completed.extend(members)
+            self._in_string = self._escape = False
+            self._key = self._value_start = None
+            self._depth = 1
+            if text[boundary] == _OPENERS[self._container]:
+                self._end = boundary + 1
+                self.done = True
+            else:
+                self._member_start = boundary + 1
+                completed.extend(self._scan(text, 0, boundary + 1))
+        return completed
+
+    def _repair_through(self, text, boundary, payload_end, final):
+        """Members repaired from the damaged member up to ``boundary``.
+
+        An empty list if ``boundary`` does not hold, i.e. what follows it is
+        neither a member that decodes cleanly nor the end of the payload;
+        None if that is not known until more text arrives.
+        """
+        closer = _OPENERS[self._container]
+        if text[boundary] == closer:
+            after = _WHITESPACE.match(text, boundary + 1).end()
+            if after == len(text) and not final:
+                return None
+            if not (after == len(text) or text.startswith(_FENCE, after)
+                    or (payload_end is not None and boundary == payload_end - 1)):
+                return []
+            context = ""
+        else:
+            end = _member_end(text, boundary + 1)
+            if end is None:
+                return None if not final else []
+            context = text[boundary:end]
+            try:
+                following = _loads(self._container + context[1:] + closer)
+            except ValueError:
+                return []
+            if not following:
+                return []
+
+        self.repaired += 1
+        try:
+            # Repaired together with the member that follows, whose text tells
+            # json_repair where the damaged strings end; that member is dropped.
+            repaired = json_repair.loads(self._container + text[self._repair_from:boundary] + context + closer)
+        except Exception as e:
+            logger.debug(f"Could not repair member: {e}")
+            return []
+        if self._container == "{":
+            if not isinstance(repaired, dict):
+                return []
+            members = list(repaired.items())
+            tail = list(following.items()) if context else []
+        else:
+            if not isinstance(repaired, list):
+                return []
+            members = [(None, item) for item in repaired]
+            tail = [(None, item) for item in following] if context else []
+        if tail:
+            if members[-len(tail):] != tail:
+                return []
+            members = members[:-len(tail)]
+        return members
+
+    def _repair_truncated(self, member_text):
+        """Repair the members in ``member_text``, the rest of a payload; False if that failed."""
+        if not member_text.strip():
+            return True
+        self.repaired += 1
+        try:
+            # Reopen the container around the cut-off member so the repair sees
+            # the key as a key, whatever point the stream stopped at.
+            repaired = json_repair.loads(self._container + member_text)
+        except Exception as e:
+            logger.debug(f"Could not repair truncated member: {e}")
+            return False
+        if isinstance(repaired, dict) and self._container == "{":
+            self.members.extend(repaired.items())
+        elif isinstance(repaired, list) and self._container == "[":
+            self.members.extend((None, item) for item in repaired)
+        else:
+            return False
+        return True
@@ -0,0 +1,49 @@
+"""Import the lazily loaded heavy libraries ahead of time.
+
+The web app imports reportlab, pandas, the document parsers and the LLM
+SDKs only when a route first needs them, which keeps worker start-up fast.
+Under a pre-forking server that preloads the app (``GUNICORN_PRELOAD=1``,
+see gunicorn.conf.py) it is cheaper to import them once in the master:
+forked workers then share those pages instead of each importing them
+again. ``gc.freeze`` moves everything imported so far out of the garbage
+collector's reach, so collections in the workers do not touch, and copy,
+the shared pages.
+"""
+import gc
+import importlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+HEAVY_MODULES = (
+    "reportlab.platypus",
+    "plots.create_plots",
+    "reports.create_policy_report",
+    "PyPDF2",
+    "docx",
+    "chardet",
+    "pandas",
+    "google.generativeai",
+    "openai",
+    "huggingface_hub",
+)
+
+
+def preload(modules=HEAVY_MODULES, freeze=True):
+    """Import ``modules`` (and the preferred PDF backend) and return seconds per module."""
+    from process_input import _BACKEND_MODULES, default_pdf_backend
+
+    timings = {}
+    for name in (*modules, _BACKEND_MODULES[default_pdf_backend()]):
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Could not preload {name}: {e}")
+            continue
+        timings[name] = round(time.perf_counter() - started, 3)
+    if freeze:
+        gc.freeze()
+    logger.info(f"Preloaded {len(timings)} modules in {sum(timings.values()):.2f}s")
+    return timings
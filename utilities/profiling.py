@@ -0,0 +1,149 @@
+"""On-demand sampling profiler for single analyses.
+
+``profile(name)`` samples the calling thread's stack every ``interval``
+seconds from a background thread (``sys._current_frames``), so the
+profiled code runs unmodified and there is no cost at all when no profile
+is active. While it runs, ``tracemalloc`` records the peak memory traced
+during the profile. On exit it writes two files to ``PROFILE_DIR``:
+
+* ``<name>.collapsed``: one ``frame;frame;frame count`` line per distinct
+  stack, the input format of flamegraph.pl, speedscope and inferno;
+* ``<name>.json``: duration, sample count, peak memory and the functions
+  with the most samples, on their own and including callees.
+
+tracemalloc is process-wide, so only one profile runs at a time; a
+request for another while one is active is skipped.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+DEFAULT_INTERVAL = float(os.environ.get("PROFILE_INTERVAL_MS", 5)) / 1000
+TOP_FUNCTIONS = 25
+
+_active = threading.Lock()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Collects stack samples of one thread until stopped."""
+
+    def __init__(self, thread_id, interval=DEFAULT_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit=TOP_FUNCTIONS):
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return {
+            "self": [{"function": f, "samples": n} for f, n in own.most_common(limit)],
+            "total": [{"function": f, "samples": n} for f, n in total.most_common(limit)],
+        }
+
+
+class ProfileResult:
+    def __init__(self, name):
+        self.name = name
+        self.summary = None
+
+
+@contextmanager
+def profile(name, interval=DEFAULT_INTERVAL, directory=PROFILE_DIR):
+    """Profile the calling thread for the duration of the ``with`` block.
+
+    Yields a ``ProfileResult`` whose ``summary`` is filled in on exit; it
+    stays None if another profile was already running.
+    """
+    result = ProfileResult(name)
+    if not _active.acquire(blocking=False):
+        logger.warning(f"Profile {name} skipped: another profile is running")
+        yield result
+        return
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    profiler = SamplingProfiler(threading.get_ident(), interval)
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        yield result
+    finally:
+        profiler.stop()
+        duration = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        if not tracing:
+            tracemalloc.stop()
+        _active.release()
+        try:
+            result.summary = _write(profiler, name, directory, duration, peak - baseline)
+        except OSError as e:
+            logger.warning(f"Could not write profile {name}: {e}")
+
+
+def _write(profiler, name, directory, duration, peak_bytes):
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, name)
+    with open(base + ".collapsed", "w", encoding="utf-8") as f:
+        f.write(profiler.collapsed())
+    summary = {
+        "name": name,
+        "duration_seconds": round(duration, 3),
+        "interval_ms": profiler.interval * 1000,
+        "samples": profiler.samples,
+        "peak_memory_bytes": peak_bytes,
+        "flamegraph": base + ".collapsed",
+        "top_functions": profiler.top_functions(),
+    }
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    logger.info(f"Profile {name}: {duration:.2f}s, {profiler.samples} samples, "
+                f"peak {peak_bytes / 2 ** 20:.1f} MiB -> {base}.collapsed")
+    return summary
@@ -0,0 +1,222 @@
+"""Per-provider admission control for LLM calls.
+
+Every ``BaseLLM`` of a provider shares one ``ProviderLimiter`` per process
+(see ``get_limiter``). A call must obtain a request token, an estimate of
+its tokens from the tokens-per-minute bucket, and a slot in the concurrency
+window before it is sent. The window adapts AIMD-style: it grows by one
+slot per window of successful calls, halves when the provider answers 429
+or reports overload, and shrinks gently when latency climbs well above its
+moving average. A 429 that carries ``Retry-After`` pauses the whole
+provider for that long, so callers queue instead of piling on errors.
+
+Budgets come from ``DEFAULT_LIMITS`` and can be overridden per provider
+with ``LLM_RPM_<PROVIDER>``, ``LLM_TPM_<PROVIDER>`` and
+``LLM_MAX_CONCURRENCY_<PROVIDER>`` (provider upper-cased, ``-`` as ``_``).
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# requests/min, tokens/min, max concurrency
+DEFAULT_LIMITS = {
+    "gemini": (360, 4_000_000, 16),
+    "openai": (500, 800_000, 16),
+    "huggingface-openai": (60, 200_000, 4),
+    "huggingface-text": (60, 200_000, 4),
+    "sdxl": (30, 10_000_000, 2),
+    "ollama": (10_000, 100_000_000, 4),
+}
+FALLBACK_LIMITS = (60, 1_000_000, 4)
+
+CHARS_PER_TOKEN = 4
+DEFAULT_OUTPUT_TOKENS = 2048
+MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 4))
+BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_SECONDS", 1.0))
+BACKOFF_MAX = 60.0
+# A call slower than this multiple of the latency moving average counts as
+# a congestion signal.
+LATENCY_TOLERANCE = 3.0
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _status_code(error):
+    for candidate in (error, getattr(error, "response", None)):
+        for attribute in ("status_code", "code"):
+            code = getattr(candidate, attribute, None)
+            if callable(code):
+                try:
+                    code = code()
+                except Exception:
+                    code = None
+            if isinstance(code, int):
+                return code
+            value = getattr(code, "value", None)
+            if isinstance(value, tuple) and value and isinstance(value[0], int):
+                return value[0]
+    return None
+
+
+def is_rate_limited(error):
+    """True for provider errors that mean "slow down" (HTTP 429 / quota exhausted)."""
+    return _status_code(error) == 429 or type(error).__name__ in ("ResourceExhausted", "RateLimitError")
+
+
+def is_retryable(error):
+    return is_rate_limited(error) or _status_code(error) in RETRYABLE_STATUSES or \
+        type(error).__name__ in ("ServiceUnavailable", "InternalServerError", "APIConnectionError",
+                                 "APITimeoutError", "DeadlineExceeded", "ConnectionError", "TimeoutError")
+
+
+def retry_after(error):
+    """Seconds the provider asked us to wait, if it said."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def estimate_tokens(prompt, params):
+    output = next((params[k] for k in ("max_output_tokens", "max_tokens", "max_new_tokens") if k in params),
+                  DEFAULT_OUTPUT_TOKENS)
+    return len(prompt if isinstance(prompt, str) else str(prompt)) // CHARS_PER_TOKEN + output
+
+
+class ProviderLimiter:
+    """Token buckets plus an AIMD concurrency window for one provider."""
+
+    def __init__(self, name, rpm, tpm, max_concurrency, min_concurrency=1, max_retries=MAX_RETRIES):
+        self.name = name
+        self.max_retries = max_retries
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.window = float(max(min_concurrency, min(4, max_concurrency)))
+        self.in_flight = 0
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._latency = None
+        self._cond = threading.Condition()
+        self.sent = 0
+        self.throttled = 0
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+        self._updated = now
+
+    def _try_acquire(self, tokens):
+        """Take a slot and budget now, or return how long to wait before trying again."""
+        tokens = min(tokens, self.tpm)
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.in_flight >= int(self.window):
+            return None
+        if self._requests < 1:
+            return (1 - self._requests) * 60 / self.rpm
+        if self._tokens < tokens:
+            return (tokens - self._tokens) * 60 / self.tpm
+        self._requests -= 1
+        self._tokens -= tokens
+        self.in_flight += 1
+        self.sent += 1
+        return 0
+
+    def acquire(self, tokens):
+        with self._cond:
+            while True:
+                wait = self._try_acquire(tokens)
+                if wait == 0:
+                    return time.monotonic()
+                # None: the window is full; a release will wake us
+                self._cond.wait(timeout=wait)
+
+    async def aacquire(self, tokens):
+        while True:
+            with self._cond:
+                wait = self._try_acquire(tokens)
+            if wait == 0:
+                return time.monotonic()
+            await asyncio.sleep(min(wait if wait is not None else 0.05, 1.0))
+
+    def release(self, started, error=None):
+        """Return the slot and feed the outcome of the call into the window."""
+        latency = time.monotonic() - started
+        with self._cond:
+            self.in_flight -= 1
+            if error is not None and is_rate_limited(error):
+                self.throttled += 1
+                self.window = max(self.min_concurrency, self.window / 2)
+                pause = retry_after(error)
+                if pause:
+                    self._paused_until = max(self._paused_until, time.monotonic() + pause)
+                logger.warning(f"{self.name} rate limited; concurrency window now {self.window:.1f}")
+            elif error is not None and _status_code(error) in (500, 502, 503, 504):
+                self.window = max(self.min_concurrency, self.window / 2)
+            elif error is None:
+                if self._latency is not None and latency > self._latency * LATENCY_TOLERANCE:
+                    self.window = max(self.min_concurrency, self.window * 0.9)
+                else:
+                    self.window = min(self.max_concurrency, self.window + 1 / self.window)
+                self._latency = latency if self._latency is None else 0.9 * self._latency + 0.1 * latency
+            self._cond.notify_all()
+
+    def backoff(self, attempt, error):
+        delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+        return max(delay, retry_after(error) or 0)
+
+    def stats(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "window": round(self.window, 2),
+                "in_flight": self.in_flight,
+                "requests_available": round(self._requests, 1),
+                "tokens_available": round(self._tokens),
+                "sent": self.sent,
+                "throttled": self.throttled,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _env_key(provider):
+    return provider.upper().replace("-", "_")
+
+
+def get_limiter(provider):
+    """The process-wide limiter for ``provider``."""
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            rpm, tpm, concurrency = DEFAULT_LIMITS.get(provider, FALLBACK_LIMITS)
+            key = _env_key(provider)
+            limiter = ProviderLimiter(
+                provider,
+                rpm=int(os.environ.get(f"LLM_RPM_{key}", rpm)),
+                tpm=int(os.environ.get(f"LLM_TPM_{key}", tpm)),
+                max_concurrency=int(os.environ.get(f"LLM_MAX_CONCURRENCY_{key}", concurrency)),
+            )
+            _limiters[provider] = limiter
+        return limiter
+
+
+def limiter_stats():
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.stats() for name, limiter in limiters.items()}
@@ -0,0 +1,62 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MAX_CHARS = int(os.environ.get("TEXT_CACHE_MAX_CHARS", 64 * 1024 * 1024))
+
+
+class ExtractedTextCache:
+    """LRU store of extracted document text keyed by the SHA-256 of the document.
+
+    Each entry is an ``ExtractedText`` (text, page count and extraction
+    backend). The total length of cached text is capped at ``max_chars``;
+    least recently used documents are evicted first.
+    """
+
+    def __init__(self, max_chars=MAX_CHARS):
+        self.max_chars = max_chars
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry
+
+    def set(self, digest, extracted):
+        size = len(extracted.text)
+        if size > self.max_chars:
+            logger.info(f"Not caching {digest[:12]}: {size} chars exceeds the cache size")
+            return
+        with self._lock:
+            previous = self._entries.pop(digest, None)
+            if previous is not None:
+                self._size -= len(previous.text)
+            self._entries[digest] = extracted
+            self._size += size
+            while self._size > self.max_chars:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.text)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "chars": self._size,
+            }
+
+
+text_cache = ExtractedTextCache()
@@ -0,0 +1,190 @@
+"""Local evaluation of the boolean topic queries in ``utilities.constants``.
+
+The queries use LegiScan's search syntax: ``AND``, ``OR``, ``NOT``,
+parentheses, ``"quoted phrases"`` and bare words, with adjacent terms
+implicitly ANDed. ``TopicMatcher`` parses every query once, collects the
+distinct words and phrases of all of them into a single Aho-Corasick
+automaton over word tokens, and classifies a document with one pass over
+its tokens followed by evaluating each query's expression tree against the
+set of terms that were found.
+
+Matching is case-insensitive and on whole words: ``"health care"`` matches
+"Health  care" but not "healthcare".
+"""
+import re
+from collections import deque
+
+from utilities.constants import topics
+
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\()|(\))|([^\s()"]+)')
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+
+
+def tokenize(text):
+    return _WORD.findall(text.lower())
+
+
+class QuerySyntaxError(ValueError):
+    """A topic query could not be parsed."""
+
+
+class _Parser:
+    """Recursive-descent parser producing nested tuples.
+
+    Nodes are ``("term", term_id)``, ``("not", node)`` and ``("and" | "or",
+    [nodes])``. ``NOT`` binds tightest, then ``AND`` (explicit or implicit),
+    then ``OR``.
+    """
+
+    def __init__(self, expression, terms):
+        expression = clean_query(expression)
+        self.expression = expression
+        self.tokens = []
+        for phrase, open_paren, close_paren, word in _QUERY_TOKEN.findall(expression):
+            if open_paren or close_paren:
+                self.tokens.append(open_paren or close_paren)
+            elif word in ("AND", "OR", "NOT"):
+                self.tokens.append(word)
+            else:
+                words = tuple(tokenize(phrase if phrase else word))
+                if words:
+                    self.tokens.append(words)
+        self.pos = 0
+        self.terms = terms
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"Unexpected {self.peek()!r} in query {self.expression[:60]!r}")
+        return node
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek() == "OR":
+            self.pos += 1
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_not()]
+        while self.peek() not in (None, "OR", ")"):
+            if self.peek() == "AND":
+                self.pos += 1
+            nodes.append(self.parse_not())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def parse_not(self):
+        if self.peek() == "NOT":
+            self.pos += 1
+            return ("not", self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        token = self.peek()
+        self.pos += 1
+        if token == "(":
+            node = self.parse_or()
+            if self.peek() != ")":
+                raise QuerySyntaxError(f"Unbalanced parentheses in query {self.expression[:60]!r}")
+            self.pos += 1
+            return node
+        if isinstance(token, tuple):
+            return ("term", self.terms.setdefault(token, len(self.terms)))
+        raise QuerySyntaxError(f"Unexpected {token!r} in query {self.expression[:60]!r}")
+
+
+def _evaluate(node, found):
+    kind, value = node
+    if kind == "term":
+        return value in found
+    if kind == "and":
+        return all(_evaluate(child, found) for child in value)
+    if kind == "or":
+        return any(_evaluate(child, found) for child in value)
+    return not _evaluate(value, found)
+
+
+class TopicMatcher:
+    """Classify documents against a set of named boolean queries.
+
+    ``queries`` maps a topic name to its query string. All queries share one
+    automaton, so adding topics does not add passes over the document.
+    """
+
+    def __init__(self, queries):
+        self.terms = {}
+        self.queries = {name: _Parser(query, self.terms).parse() for name, query in queries.items()}
+        self._build()
+
+    def _build(self):
+        # Trie over word tokens: goto[state] maps a word to the next state,
+        # output[state] lists the term ids ending there.
+        goto = [{}]
+        output = [[]]
+        for words, term_id in self.terms.items():
+            state = 0
+            for word in words:
+                if word not in goto[state]:
+                    goto.append({})
+                    output.append([])
+                    goto[state][word] = len(goto) - 1
+                state = goto[state][word]
+            output[state].append(term_id)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in goto[state].items():
+                queue.append(child)
+                target = fail[state]
+                while target and word not in goto[target]:
+                    target = fail[target]
+                fail[child] = goto[target].get(word, 0) if goto[target].get(word) != child else 0
+                output[child] = output[child] + output[fail[child]]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = [frozenset(ids) for ids in output]
+        self._root = goto[0]
+
+    def found_terms(self, text):
+        """Ids of every term that occurs in ``text``, from one pass over its words."""
+        goto, fail, output, root = self._goto, self._fail, self._output, self._root
+        found = set()
+        state = 0
+        for word in tokenize(text):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0) if state else root.get(word, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+    def match(self, text):
+        """``{topic: bool}`` for every query."""
+        found = self.found_terms(text)
+        return {name: _evaluate(node, found) for name, node in self.queries.items()}
+
+    def classify(self, text):
+        """Names of the topics whose query matches ``text``."""
+        found = self.found_terms(text)
+        return [name for name, node in self.queries.items() if _evaluate(node, found)]
+
+
+def clean_query(expression):
+    """``expression`` without surrounding whitespace or the single quotes some queries are wrapped in."""
+    expression = expression.strip()
+    if len(expression) > 1 and expression[0] == expression[-1] == "'":
+        expression = expression[1:-1]
+    return expression
+
+
+# The one definition of each topic's search, shared by the matcher, the
+# local bill index and live LegiScan searches.
+TOPIC_QUERIES = {name: clean_query(query) for topic in topics for name, query in topic.items()}
+
+topic_matcher = TopicMatcher(TOPIC_QUERIES)
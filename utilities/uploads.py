@@ -0,0 +1,178 @@
+import hashlib
+import os
+import tempfile
+
+from flask import Request
+from werkzeug.exceptions import UnsupportedMediaType
+
+ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt'}
+
+# Uploads up to this size stay in memory; larger ones spill to a temporary file.
+SPOOL_MAX_MEMORY = int(os.environ.get("UPLOAD_SPOOL_MAX_MEMORY", 8 * 1024 * 1024))
+
+# Leading bytes each binary format must start with. Uploads named .doc are
+# frequently renamed .docx files, which are accepted.
+SIGNATURES = {
+    'pdf': (b'%PDF-',),
+    'docx': (b'PK\x03\x04',),
+    'doc': (b'PK\x03\x04',),
+}
+# Legacy binary Word documents (OLE2 compound files): python-docx cannot read
+# them, so they are refused up front rather than failing after the upload.
+OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+SNIFF_BYTES = 8
+
+
+def file_extension(filename):
+    if not filename or '.' not in filename:
+        return ''
+    return filename.rsplit('.', 1)[1].lower()
+
+
+def allowed_file(filename):
+    return file_extension(filename) in ALLOWED_EXTENSIONS
+
+
+class UploadSpool:
+    """Write-once buffer for one uploaded file.
+
+    Werkzeug streams the multipart body straight into it. The SHA-256 is
+    computed as chunks arrive and the format signature is checked on the
+    first bytes, so a mislabelled upload is rejected before the rest of it
+    is read. Data stays in memory up to ``max_memory`` bytes and spills to an
+    anonymous temporary file beyond that. Once written it can be read back
+    like a binary file; ``getbuffer`` exposes in-memory data as a memoryview
+    without copying.
+    """
+
+    def __init__(self, extension, max_memory=SPOOL_MAX_MEMORY):
+        self.extension = extension
+        self.max_memory = max_memory
+        self.size = 0
+        self.closed = False
+        self._sha256 = hashlib.sha256()
+        self._memory = bytearray()
+        self._file = None
+        self._pos = 0
+
+    @property
+    def digest(self):
+        return self._sha256.hexdigest()
+
+    @property
+    def in_memory(self):
+        return self._file is None
+
+    def _check_signature(self, data):
+        signatures = SIGNATURES.get(self.extension)
+        if not signatures:
+            return
+        head = bytes(self._memory[:SNIFF_BYTES]) + data[:SNIFF_BYTES]
+        head = head[:SNIFF_BYTES]
+        if self.extension in ('doc', 'docx') and head and OLE2_SIGNATURE.startswith(head):
+            raise UnsupportedMediaType("Legacy Word .doc files are not supported. "
+                                       "Please save the document as .docx or PDF.")
+        if not any(sig.startswith(head) or head.startswith(sig) for sig in signatures):
+            raise UnsupportedMediaType(f"The uploaded file is not a valid .{self.extension} file.")
+
+    def write(self, data):
+        if self.size < SNIFF_BYTES:
+            self._check_signature(data)
+        self._sha256.update(data)
+        self.size += len(data)
+        if self._file is None and self.size > self.max_memory:
+            self._file = tempfile.TemporaryFile()
+            self._file.write(self._memory)
+            self._memory = bytearray()
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._memory += data
+        return len(data)
+
+    def getbuffer(self):
+        """Zero-copy view of the upload, or None once it has spilled to disk."""
+        return memoryview(self._memory) if self._file is None else None
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if self._file is not None:
+            return self._file.seek(offset, whence)
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += len(self._memory)
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def tell(self):
+        return self._file.tell() if self._file is not None else self._pos
+
+    def read(self, size=-1):
+        if self._file is not None:
+            return self._file.read(size)
+        end = len(self._memory) if size is None or size < 0 else self._pos + size
+        data = bytes(self._memory[self._pos:end])
+        self._pos += len(data)
+        return data
+
+    def readinto(self, buffer):
+        if self._file is not None:
+            return self._file.readinto(buffer)
+        data = memoryview(self._memory)[self._pos:self._pos + len(buffer)]
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def detach(self):
+        """Move the data into a new spool that outlives the request.
+
+        Werkzeug closes request files when the request ends; background jobs
+        take ownership of the upload through this instead.
+        """
+        spool = UploadSpool(self.extension, self.max_memory)
+        spool.size = self.size
+        spool._sha256 = self._sha256.copy()
+        spool._memory, spool._file = self._memory, self._file
+        self._memory, self._file = bytearray(), None
+        spool.seek(0)
+        return spool
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._memory = bytearray()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class UploadRequest(Request):
+    """Request class that spools file uploads into ``UploadSpool``s.
+
+    Unsupported extensions are rejected as soon as the part's headers are
+    parsed, before any of its body is buffered.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        extension = file_extension(filename)
+        if extension not in ALLOWED_EXTENSIONS:
+            raise UnsupportedMediaType("Please upload a PDF, DOC, DOCX, or TXT file.")
+        return UploadSpool(extension)